@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Generate a synthetic reference library for the GestureMate benchmarks.
+
+Only a handful of distinct images are encoded per format and size; every other
+file in the library is a hardlink to one of them, so even a million-file tree
+takes seconds to build and almost no disk space. Falls back to copying where
+the filesystem doesn't support hardlinks.
+
+    python bench/generate_library.py /tmp/gm-bench-lib --files 100000 --depth 4
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+DEFAULT_FORMATS = ("jpg", "png", "webp", "bmp")
+DEFAULT_SIZES = ((1600, 1200), (1080, 1920), (4000, 3000))
+MANIFEST = "library.json"
+
+
+def render_source(path, width, height, variant):
+    """Encode one synthetic reference image with some structure for the decoder to chew on."""
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor.fromHsv((variant * 47) % 360, 60, 200))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    for i in range(24):
+        painter.setBrush(QColor.fromHsv((variant * 47 + i * 15) % 360, 160, 80 + (i * 7) % 160))
+        x = (i * 131 + variant * 17) % width
+        y = (i * 197 + variant * 29) % height
+        painter.drawEllipse(QRect(x - width // 8, y - height // 8, width // 4, height // 4))
+    painter.end()
+    if not image.save(str(path), quality=90):
+        raise RuntimeError(f"Qt could not write {path}")
+
+
+def directory_layout(root, depth, fanout):
+    """Return the leaf directories of a `fanout`-ary tree `depth` levels deep under root."""
+    dirs = [root]
+    for level in range(depth):
+        dirs = [os.path.join(parent, f"d{level}_{i:02d}") for parent in dirs for i in range(fanout)]
+    return dirs
+
+
+def generate_library(root, files=1000, depth=2, fanout=4, formats=DEFAULT_FORMATS,
+                     sizes=DEFAULT_SIZES, variants=3):
+    """Build (or reuse) a synthetic library under root and return its manifest.
+
+    Images land in root/library; root/sources holds the encoded originals the
+    library links to. An existing library built with the same parameters is
+    reused as is.
+    """
+    params = {
+        'files': files, 'depth': depth, 'fanout': fanout, 'formats': list(formats),
+        'sizes': [list(size) for size in sizes], 'variants': variants,
+    }
+    manifest_path = os.path.join(root, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('params') == params:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    library = os.path.join(root, "library")
+    sources_dir = os.path.join(root, "sources")
+    shutil.rmtree(library, ignore_errors=True)
+    shutil.rmtree(sources_dir, ignore_errors=True)
+    os.makedirs(sources_dir)
+
+    sources = []
+    for ext in formats:
+        for width, height in sizes:
+            for variant in range(variants):
+                path = os.path.join(sources_dir, f"{width}x{height}_{variant}.{ext}")
+                render_source(path, width, height, variant)
+                sources.append(path)
+
+    leaves = directory_layout(library, depth, fanout)
+    for leaf in leaves:
+        os.makedirs(leaf, exist_ok=True)
+
+    link = os.link
+    for i in range(files):
+        source = sources[i % len(sources)]
+        target = os.path.join(leaves[i % len(leaves)], f"img_{i:07d}{os.path.splitext(source)[1]}")
+        try:
+            link(source, target)
+        except OSError:
+            link = shutil.copyfile
+            link(source, target)
+
+    manifest = {
+        'params': params,
+        'library': library,
+        'directories': len(leaves),
+        'bytes_per_image': {
+            os.path.basename(path): os.path.getsize(path) for path in sources
+        },
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def add_library_arguments(parser):
+    """Library shape options shared with run_bench.py."""
+    parser.add_argument("--files", type=int, default=1000, help="number of image files (default 1000)")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth (default 2)")
+    parser.add_argument("--fanout", type=int, default=4, help="subdirectories per directory (default 4)")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS),
+                        help="comma-separated image formats (default %(default)s)")
+    parser.add_argument("--sizes", default=",".join(f"{w}x{h}" for w, h in DEFAULT_SIZES),
+                        help="comma-separated WIDTHxHEIGHT sizes (default %(default)s)")
+    parser.add_argument("--variants", type=int, default=3,
+                        help="distinct images per format and size (default 3)")
+
+
+def library_from_args(root, args):
+    return generate_library(
+        root, files=args.files, depth=args.depth, fanout=args.fanout,
+        formats=[ext.strip() for ext in args.formats.split(",") if ext.strip()],
+        sizes=[parse_size(size) for size in args.sizes.split(",") if size.strip()],
+        variants=args.variants,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to build the library in")
+    add_library_arguments(parser)
+    args = parser.parse_args()
+    manifest = library_from_args(args.root, args)
+    print(f"{args.files} images in {manifest['directories']} folders under {manifest['library']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Replay a recorded GestureMate session headlessly and report how long each input took.
+
+Recordings come from Debug > Record Sessions (or GESTUREMATE_RECORD_SESSIONS=1)
+and are kept in the gesturemate_recordings folder next to the settings. The
+replay drives the real GestureMate window on Qt's offscreen platform, the same
+way run_bench.py does: the recorded settings, window size and play order are
+restored, the window's own timers are muted, and the recorded key presses,
+clicks, resizes and timer ticks are applied in order, each followed by
+processEvents(). A user's "it froze on image 40" becomes a repeatable
+benchmark; results use run_bench.py's format, so --compare works the same.
+
+    python bench/replay_session.py ~/.config/GestureMate/gesturemate_recordings/session-20261019-101500.jsonl
+    python bench/replay_session.py RECORDING --library /tmp/gm-bench-library/library --output replay.json
+    python bench/replay_session.py RECORDING --compare replay.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from run_bench import compare, git_revision, summarize  # also isolates the config
+
+from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+import gesturemate
+from gesturemate_core import (
+    DECODERS_FILE_NAME, DecoderRegistry, read_recording, scan_image_folder, write_json_atomic,
+)
+
+# Inputs a recording may contain; anything else is skipped rather than called
+REPLAYABLE = {
+    'start_session', 'pause_session', 'stop_session', 'next_image', 'previous_image',
+    'toggle_flip_horizontal', 'toggle_flip_vertical', 'toggle_greyscale', 'rotate_clockwise',
+    'rotate_counter_clockwise', 'reset_transformations', 'update_session_timer',
+    'update_image_timer', 'end_pose', 'resize',
+}
+
+
+def stand_in_images(images, library):
+    """Map recorded images missing on this machine to images from library, in turn."""
+    missing = [path for path in dict.fromkeys(images) if not os.path.exists(path)]
+    if not missing:
+        return images, 0
+    if library is None:
+        raise SystemExit(f"{len(missing)} of the {len(set(images))} recorded images don't exist here; "
+                         "pass --library to stand in images from another folder")
+    available = sorted(scan_image_folder(library)[0])
+    if not available:
+        raise SystemExit(f"No images found under {library}")
+    mapping = {path: available[i % len(available)] for i, path in enumerate(missing)}
+    return [mapping.get(path, path) for path in images], len(missing)
+
+
+class Replay:
+    """One GestureMate window set up like the recorded session, and the inputs to feed it."""
+
+    def __init__(self, app, start, images):
+        self.app = app
+        self.start = start
+        self.images = images
+
+        self.win = gesturemate.GestureMate()
+        self.win.recorder.enabled = False
+        if start.get('decoders'):
+            # Use the recorded decoder choice instead of benchmarking again
+            write_json_atomic(self.win.config_file.with_name(DECODERS_FILE_NAME),
+                              {'backends': sorted(DecoderRegistry().backends),
+                               'selection': start['decoders']})
+        self.win.showNormal()
+        self.win.resize(*start['window'])
+        self.app.processEvents()
+        self.win.finish_startup()
+        if not start.get('display_cache') and self.win.display_cache is not None:
+            self.win.display_cache.close()
+            self.win.display_cache = None
+
+        self.win.image_duration = start['image_duration']
+        self.win.session_duration = start['session_duration']
+        self.win.halfway_sound_enabled = start['halfway_sound']
+        self.win.rapid_fire = start.get('rapid_fire', False)
+        self.win.pacer.pose_ms = start.get('rapid_fire_ms', self.win.pacer.pose_ms)
+        # The play order comes from the recording, so nothing is shuffled or filtered again
+        self.win.shuffle_enabled = False
+        self.win.folder_images = {'replay': list(images)}
+        self.win.images = list(images)
+        self.win.images_per_folder = {'replay': len(images)}
+        # Ticks come from the recording, never from the window's own timers
+        self.win.session_timer.blockSignals(True)
+        self.win.image_timer.blockSignals(True)
+        self.win.pose_timer.blockSignals(True)
+
+    def apply(self, event):
+        name = event['event']
+        if name == 'resize':
+            self.win.resize(event['width'], event['height'])
+        else:
+            getattr(self.win, name)()
+
+    def run(self, events, realtime=False):
+        """Replay events; return (samples by input, [(seconds, position, event)], divergences)."""
+        samples = {}
+        timings = []
+        divergences = []
+        origin = time.perf_counter()
+        for position, event in enumerate([dict(self.start, event='start_session')] + events):
+            name = event['event']
+            if name not in REPLAYABLE:
+                continue
+            if realtime:
+                # Let background work (hashing, revalidation) run as it did in the recording
+                while time.perf_counter() - origin < event.get('t', 0):
+                    self.app.processEvents()
+                    time.sleep(0.005)
+            if position and self.win.current_image_index != event.get('image'):
+                divergences.append(position)
+            started = time.perf_counter()
+            self.apply(event)
+            self.app.processEvents()
+            while self.win.display_pending:
+                # Count an image change as done once the full image is on screen
+                time.sleep(0.001)
+                self.app.processEvents()
+            seconds = time.perf_counter() - started
+            samples.setdefault(name, []).append(seconds)
+            timings.append((seconds, position, event))
+        self.win.stop_session()
+        self.win.close()
+        return samples, timings, divergences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="session recording (.jsonl) to replay")
+    parser.add_argument("--library", help="folder of images to stand in for recorded images that don't exist here")
+    parser.add_argument("--realtime", action="store_true",
+                        help="keep the recorded gaps between inputs instead of replaying back to back")
+    parser.add_argument("--slowest", type=int, default=10, help="how many of the slowest inputs to list (default 10)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    try:
+        start, events = read_recording(args.recording)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    images, substituted = stand_in_images(start['images'], args.library)
+
+    app = QApplication(sys.argv)
+    app.setApplicationName("GestureMate")
+    app.setStyle("Fusion")
+
+    print(f"Replaying {len(events)} inputs over {len(images)} images "
+          f"({events[-1]['t'] if events else 0:.0f}s recorded"
+          + (f", {substituted} images stood in from {args.library}" if substituted else "") + ")\n")
+    samples, timings, divergences = Replay(app, start, images).run(events, args.realtime)
+
+    results = {}
+    for name, values in samples.items():
+        results[name] = summarize(values)
+        print(f"{name:28s} median {results[name]['median_ms']:10.3f} ms  "
+              f"p95 {results[name]['p95_ms']:10.3f}  max {results[name]['max_ms']:10.3f}  (runs {len(values)})")
+
+    slowest = []
+    print(f"\nSlowest {min(args.slowest, len(timings))} inputs:")
+    for seconds, position, event in sorted(timings, key=lambda timing: -timing[0])[:args.slowest]:
+        image = event.get('image', 0)
+        entry = {'position': position, 'event': event['event'], 't': event.get('t', 0), 'image': image,
+                 'path': images[image] if 0 <= image < len(images) else None,
+                 'replayed_ms': round(seconds * 1000, 3), 'recorded_ms': event.get('ms')}
+        slowest.append(entry)
+        print(f"  #{position:<5d} t={entry['t']:8.1f}s  {entry['event']:26s} image {image:<5d} "
+              f"replayed {entry['replayed_ms']:9.1f} ms  recorded {entry['recorded_ms'] or 0:9.1f} ms")
+    if divergences:
+        print(f"\nThe replay was on a different image than the recording for {len(divergences)} inputs, "
+              f"first at #{divergences[0]}")
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ["QT_QPA_PLATFORM"],
+            'recording': os.path.abspath(args.recording),
+            'recorded': start.get('created'),
+            'realtime': args.realtime,
+            'substituted_images': substituted,
+            'divergences': len(divergences),
+        },
+        'results': results,
+        'slowest': slowest,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    regressions = compare(results, args.compare) if args.compare else []
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Headless performance benchmarks for GestureMate.
+
+Drives the real GestureMate window on Qt's offscreen platform (the same way
+promo/shoot_stills.py does) against a synthetic library from
+generate_library.py, and writes the timings as JSON so runs from different
+versions can be compared.
+
+    python bench/run_bench.py --files 10000 --output bench-results.json
+    python bench/run_bench.py --files 10000 --compare bench-results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Isolate from the real user config, stats and practice log
+os.environ["XDG_CONFIG_HOME"] = tempfile.mkdtemp(prefix="gm-bench-config-")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication
+
+import gesturemate
+import gesturemate_core
+from generate_library import add_library_arguments, library_from_args
+
+REGRESSION_THRESHOLD = 0.10  # flag medians more than 10% slower than the baseline
+
+
+def summarize(samples):
+    """Reduce a list of durations in seconds to millisecond statistics."""
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        'runs': len(ms),
+        'min_ms': round(ms[0], 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+class Bench:
+    """Runs each scenario against one GestureMate window and collects the results."""
+
+    def __init__(self, app, library, repeat, images):
+        self.app = app
+        self.library = library
+        self.repeat = repeat
+        self.images = images
+        self.results = {}
+
+        self.win = gesturemate.GestureMate()
+        self.win.showNormal()
+        self.win.resize(1600, 1000)
+        self.win.shuffle_enabled = False
+        self.win.halfway_sound_enabled = False
+        self.win.saved_folders = {library: True}
+        app.processEvents()
+        self.win.finish_startup()
+
+    def record(self, name, samples, **extra):
+        self.results[name] = dict(summarize(samples), **extra)
+        print(f"{name:28s} median {self.results[name]['median_ms']:10.3f} ms  "
+              f"(min {self.results[name]['min_ms']:.3f}, runs {len(samples)})")
+
+    def reset_images(self):
+        self.win.stop_session()
+        self.win.images = []
+        self.win.folder_images = {}
+        self.win.revalidated_playset = None
+        self.win.folder_scans = gesturemate_core.FolderScans()  # scan everything again
+
+    def bench_scan(self):
+        found = []
+
+        def scan():
+            found[:] = gesturemate_core.scan_image_folder(self.library)[0]
+
+        self.record('scan_image_folder', timed(scan, self.repeat), images=len(found))
+
+    def bench_load_images(self):
+        def load():
+            self.win.folder_scans = gesturemate_core.FolderScans()
+            self.win.load_images([self.library])
+
+        self.record('load_images', timed(load, self.repeat), images=len(self.win.images))
+
+    def bench_toggle_folder(self):
+        """Time applying settings with one subfolder switched off, then back on."""
+        subfolders = sorted(entry.path for entry in os.scandir(self.library) if entry.is_dir())
+        self.win.load_images(subfolders)
+        samples = []
+        for i in range(self.repeat):
+            started = time.perf_counter()
+            self.win.load_images(subfolders[:i % len(subfolders)] + subfolders[i % len(subfolders) + 1:])
+            self.win.load_images(subfolders)
+            samples.append((time.perf_counter() - started) / 2)
+        self.record('load_images_toggle_folder', samples, folders=len(subfolders))
+        self.reset_images()
+
+    def bench_start_session(self):
+        """Time from pressing Start (nothing loaded yet) to the first image on screen."""
+        samples = []
+        for _ in range(self.repeat):
+            self.reset_images()
+            started = time.perf_counter()
+            self.win.start_session()
+            self.app.processEvents()
+            samples.append(time.perf_counter() - started)
+            assert self.win.image_label.pixmap() is not None and not self.win.image_label.pixmap().isNull()
+        self.record('start_session_first_image', samples)
+
+    def bench_display(self):
+        if not self.win.is_session_active:
+            self.win.start_session()
+        count = min(self.images, len(self.win.images))
+
+        def show(index):
+            self.win.current_image_index = index
+            self.win.display_current_image()
+            self.app.processEvents()
+
+        samples = []
+        for index in range(count):
+            started = time.perf_counter()
+            show(index)
+            samples.append(time.perf_counter() - started)
+        self.record('display_current_image', samples)
+
+        samples = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            show(0)
+            samples.append(time.perf_counter() - started)
+        self.record('display_same_image', samples)
+
+    def bench_held_arrow(self, presses=20):
+        """Time holding Right Arrow: key repeats, then until the image it stops on is shown in full."""
+        if not self.win.is_session_active:
+            self.win.start_session()
+        samples = []
+        for _ in range(self.repeat):
+            self.win.image_cache.clear()
+            self.win.thumbnails.clear()
+            started = time.perf_counter()
+            for _ in range(presses):
+                self.win.next_image()
+                self.app.processEvents()
+            while self.win.display_pending:
+                time.sleep(0.001)
+                self.app.processEvents()
+            samples.append(time.perf_counter() - started)
+        self.record('held_arrow', samples, presses=presses)
+
+    def bench_rapid_fire(self, poses=12, pose_ms=500):
+        """Run rapid-fire poses in real time; samples are how late each pose's image appeared."""
+        self.win.stop_session()
+        self.win.image_cache.clear()
+        self.win.rapid_fire = True
+        self.win.pacer.pose_ms = pose_ms
+        self.win.start_session()
+        while self.win.pacer.poses <= poses:
+            time.sleep(0.001)
+            self.app.processEvents()
+        late = [ms / 1000 for _, _, ms in self.win.pacer.late]
+        samples = late + [0.0] * (self.win.pacer.poses - len(late))
+        self.win.stop_session()
+        self.win.rapid_fire = False
+        self.record('rapid_fire_lateness', samples, pose_ms=pose_ms, late_poses=len(late))
+
+    def bench_transforms(self):
+        if not self.win.is_session_active:
+            self.win.start_session()
+        self.win.current_image_index = 0
+        self.win.display_current_image()
+        toggles = {
+            'flip_horizontal': self.win.toggle_flip_horizontal,
+            'greyscale': self.win.toggle_greyscale,
+            'rotate': self.win.rotate_clockwise,
+        }
+        for name, toggle in toggles.items():
+            def run():
+                toggle()
+                self.app.processEvents()
+            self.record(f'transform_{name}', timed(run, self.repeat))
+            self.win.reset_transformations()
+
+    def bench_resize(self):
+        if not self.win.is_session_active:
+            self.win.start_session()
+        sizes = [(1600, 1000), (1280, 800), (1920, 1080), (1024, 768)]
+        samples = []
+        for i in range(self.repeat):
+            width, height = sizes[i % len(sizes)]
+            started = time.perf_counter()
+            self.win.resize(width, height)
+            self.app.processEvents()
+            samples.append(time.perf_counter() - started)
+        self.record('resize_during_session', samples)
+        self.win.resize(1600, 1000)
+
+    def bench_home_paint(self):
+        self.win.stop_session()
+        home = self.win.home_widget
+        stats = gesturemate_core.StatsStore()
+        today = date.today()
+        for offset in range(3 * 365):
+            if offset % 3:
+                stats.add_session(600 + offset % 7 * 60, 20, today - timedelta(days=offset))
+        home.set_stats(stats)
+        target = QPixmap(home.size())
+
+        def cold():
+            home.invalidate()
+            home.render(target)
+
+        def warm():
+            home.render(target)
+
+        self.record('home_paint_cold', timed(cold, self.repeat))
+        self.record('home_paint_cached', timed(warm, self.repeat))
+        home._set_all_time_trend(True)
+        self.record('home_paint_all_time_cold', timed(cold, self.repeat))
+        home._set_all_time_trend(False)
+
+    def run(self):
+        self.bench_scan()
+        self.bench_load_images()
+        self.bench_toggle_folder()
+        self.bench_start_session()
+        self.bench_display()
+        self.bench_held_arrow()
+        self.bench_rapid_fire()
+        self.bench_transforms()
+        self.bench_resize()
+        self.bench_home_paint()
+        self.win.stop_session()
+        self.win.close()
+        return self.results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print median changes against a previous results file; return the regressed benchmark names."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('revision')}):")
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['median_ms']:
+            continue
+        change = current['median_ms'] / previous['median_ms'] - 1
+        flag = ""
+        if change > REGRESSION_THRESHOLD:
+            regressions.append(name)
+            flag = "  <-- slower"
+        print(f"  {name:28s} {previous['median_ms']:10.3f} -> {current['median_ms']:10.3f} ms "
+              f"({change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_library_arguments(parser)
+    parser.add_argument("--library-root", default=os.path.join(tempfile.gettempdir(), "gm-bench-library"),
+                        help="where to build (or reuse) the synthetic library (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark (default 5)")
+    parser.add_argument("--images", type=int, default=30,
+                        help="distinct images to time display_current_image over (default 30)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    app.setApplicationName("GestureMate")
+    app.setStyle("Fusion")
+
+    started = time.perf_counter()
+    manifest = library_from_args(args.library_root, args)
+    print(f"Library: {args.files} images in {manifest['directories']} folders "
+          f"({time.perf_counter() - started:.1f}s to prepare)\n")
+
+    results = Bench(app, manifest['library'], args.repeat, args.images).run()
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ["QT_QPA_PLATFORM"],
+            'library': manifest['params'],
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    regressions = compare(results, args.compare) if args.compare else []
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
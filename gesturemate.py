@@ -5,38 +5,370 @@ GestureMate - A gesture drawing app for timed figure drawing practice.
 
 import sys
 import os
-import random
-import json
-import subprocess
+import copy
+import functools
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import date, timedelta
 from pathlib import Path
 from typing import List
 
+# Reference point for the startup timing report (includes the Qt imports below)
+PROCESS_STARTED = time.perf_counter()
+
+from gesturemate_core import (
+    CONFIG_FILE_NAME, DECODERS_FILE_NAME, LIBRARY_INDEX_FILE_NAME, MEMORY_REPORT_FILE_NAME,
+    PLAYSET_FILE_NAME, PRACTICE_LOG_FILE_NAME, RECORDINGS_DIR_NAME, REDUCED_TEXT_KEY,
+    STATS_FILE_NAME, TRACER, WEB_CACHE_DIR_NAME, ConfigWriter, ConnectionPool, DecodePool,
+    DecoderRegistry, DisplayCache, FolderScans, ImageQuery, LibraryIndex, MemoryMonitor, PosePacer,
+    PracticeLog, QtDecoder, SessionEngine, SessionRecorder, StatsStore, WebSource, enabled_folders,
+    encode_playset, format_duration, read_json_file, read_playset, scan_folders, sniff_format,
+    traced, tree_mtimes,
+)
+from gesturemate_core.cli import COMMANDS as CLI_COMMANDS
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+    # Command-line tools run without loading Qt at all
+    from gesturemate_core.cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFileDialog, QSpinBox, QListWidget,
     QDialog, QDialogButtonBox, QGroupBox, QFormLayout, QMessageBox,
-    QProgressBar, QCheckBox, QListWidgetItem, QTreeWidget, QTreeWidgetItem,
-    QComboBox, QInputDialog, QToolTip
+    QProgressBar, QCheckBox, QListWidgetItem, QTreeView,
+    QComboBox, QInputDialog, QToolTip, QProgressDialog, QLineEdit
+)
+from PyQt6.QtCore import (
+    QTimer, Qt, QSize, QStandardPaths, QUrl, QRect, QEvent, QAbstractItemModel, QModelIndex, pyqtSignal
 )
-from PyQt6.QtCore import QTimer, Qt, QSize, QStandardPaths, QUrl, QRect
 from PyQt6.QtGui import (
     QPixmap, QPalette, QColor, QAction, QImage, QTransform, QIcon,
-    QPainter, QFont, QFontMetrics
+    QPainter, QFont, QFontMetrics, QFontDatabase, QDesktopServices, QPixmapCache
 )
 
 
-# Supported image formats (module-level constant)
-SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp'}
+class StartupTimer:
+    """Record named startup phases and print them as a report.
+
+    Enabled with the --startup-timing flag or the GESTUREMATE_STARTUP_TIMING
+    environment variable; when disabled, mark() returns immediately.
+    """
+
+    def __init__(self, started):
+        self.enabled = bool(os.environ.get('GESTUREMATE_STARTUP_TIMING'))
+        self.started = started
+        self.last = started
+        self.phases = []  # (name, phase ms, elapsed ms)
+
+    def mark(self, phase):
+        """Close the phase that has been running since the previous mark."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000, (now - self.started) * 1000))
+        self.last = now
+
+    def report(self):
+        """Print the recorded phases once."""
+        if not self.enabled or not self.phases:
+            return
+        print("GestureMate startup timing:")
+        for name, phase_ms, elapsed_ms in self.phases:
+            print(f"  {name:<24} {phase_ms:8.1f} ms  (at {elapsed_ms:8.1f} ms)")
+        self.phases = []
+
+
+STARTUP_TIMER = StartupTimer(PROCESS_STARTED)
 
-# Maximum number of files to check when scanning folders (prevents UI freezing)
-MAX_FILES_TO_CHECK = 5000
+
+class _FolderNode:
+    """One folder in a FolderTreeModel."""
+
+    __slots__ = ('path', 'parent', 'row', 'state', 'inherited', 'children', 'child_paths', 'checked', 'partial')
+
+    def __init__(self, path, parent, row, state, child_paths):
+        self.path = path
+        self.parent = parent
+        self.row = row
+        self.state = state
+        # State of children not fetched yet; None while the saved settings decide
+        self.inherited = None if state == Qt.CheckState.PartiallyChecked else state
+        self.children = None  # fetched so far
+        self.child_paths = child_paths
+        self.checked = 0  # children checked, and partially checked, once fetched
+        self.partial = 0
+
+
+class FolderTreeModel(QAbstractItemModel):
+    """Checkable folder tree over the library index, to any depth.
+
+    Subfolders (those leading to images) are only turned into rows when
+    their parent is expanded, FETCH_BATCH at a time, and counts come from
+    LibraryIndex.folder_totals(), so deep or wide libraries open quickly.
+    Each folder keeps counts of its checked and partially checked children:
+    checking a folder touches the rows already fetched below it and walks
+    up through its parents only as far as their state changes.
+
+    Folders load from, and selection() returns, the saved folders format:
+    {path: enabled} where a folder with saved subfolders contributes
+    through those (see gesturemate_core.enabled_folders()).
+    """
+
+    FETCH_BATCH = 1000
+    HEADERS = ("Folder", "Images")
+
+    def __init__(self, library_index, parent=None):
+        super().__init__(parent)
+        self.library_index = library_index
+        self.roots = []
+        self.totals = {}  # folder -> images below it
+        self.subfolders = {}  # folder -> sorted subfolders with images
+        self._saved = {}
+        self._saved_parents = set()  # folders with saved folders below them
+        self._initial = {}
+
+    # --- building ---
+
+    def load(self, saved_folders):
+        """Show saved folders ({path: enabled}); top-level ones become roots."""
+        self.beginResetModel()
+        self._saved = dict(saved_folders)
+        self._saved_parents = set()
+        self._initial = {}
+        for folder in self._saved:
+            parent = os.path.dirname(folder)
+            while parent and parent not in self._saved_parents and parent != os.path.dirname(parent):
+                self._saved_parents.add(parent)
+                parent = os.path.dirname(parent)
+        self.roots = []
+        self.totals = {}
+        self.subfolders = {}
+        folders = sorted(folder for folder in self._saved if os.path.isdir(folder))
+        for folder in folders:
+            if not any(folder.startswith(os.path.join(root.path, '')) for root in self.roots):
+                self._add_root(folder)
+        self.endResetModel()
+
+    def add_root(self, folder):
+        """Add a checked top-level folder; return its row."""
+        row = len(self.roots)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._add_root(folder, Qt.CheckState.Checked)
+        self.endInsertRows()
+        return row
+
+    def remove_root(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.roots[row]
+        for i, root in enumerate(self.roots[row:], row):
+            root.row = i
+        self.endRemoveRows()
+
+    def _add_root(self, folder, state=None):
+        # Cheap when nothing changed: one stat() per folder
+        self.library_index.update(folder)
+        totals = self.library_index.folder_totals(folder)
+        self.totals.update(totals)
+        for path in sorted(totals):
+            if path != folder:
+                self.subfolders.setdefault(os.path.dirname(path), []).append(path)
+        if state is None:
+            state = self._initial_state(folder, True)
+        self.roots.append(_FolderNode(folder, None, len(self.roots), state, self.subfolders.get(folder, [])))
+
+    def _initial_state(self, folder, default):
+        """Check state of a folder from the saved folders, before any changes."""
+        state = self._initial.get(folder)
+        if state is None:
+            states = set()
+            if folder in self._saved_parents:
+                states = {self._initial_state(child, False) for child in self.subfolders.get(folder, [])}
+            if len(states) > 1 or Qt.CheckState.PartiallyChecked in states:
+                state = Qt.CheckState.PartiallyChecked
+            elif states:
+                state = states.pop()
+            else:
+                state = Qt.CheckState.Checked if self._saved.get(folder, default) else Qt.CheckState.Unchecked
+            self._initial[folder] = state
+        return state
+
+    def _unfetched_state(self, node, path):
+        return node.inherited if node.inherited is not None else self._initial_state(path, False)
+
+    # --- QAbstractItemModel ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        nodes = self.roots if not parent.isValid() else parent.internalPointer().children or []
+        if 0 <= row < len(nodes) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, nodes[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid() or index.internalPointer().parent is None:
+            return QModelIndex()
+        node = index.internalPointer().parent
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.roots)
+        if parent.column() != 0:
+            return 0
+        return len(parent.internalPointer().children or [])
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.roots)
+        return parent.column() == 0 and bool(parent.internalPointer().child_paths)
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        node = parent.internalPointer()
+        return len(node.children or []) < len(node.child_paths)
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            return
+        node = parent.internalPointer()
+        if node.children is None:
+            node.children = []
+            if node.inherited is not None:
+                node.checked = len(node.child_paths) if node.inherited == Qt.CheckState.Checked else 0
+            else:
+                states = [self._initial_state(path, False) for path in node.child_paths]
+                node.checked = states.count(Qt.CheckState.Checked)
+                node.partial = states.count(Qt.CheckState.PartiallyChecked)
+        start = len(node.children)
+        paths = node.child_paths[start:start + self.FETCH_BATCH]
+        if not paths:
+            return
+        self.beginInsertRows(parent, start, start + len(paths) - 1)
+        for row, path in enumerate(paths, start):
+            node.children.append(_FolderNode(path, node, row, self._unfetched_state(node, path),
+                                             self.subfolders.get(path, [])))
+        self.endInsertRows()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return os.path.basename(node.path) or node.path
+            return str(self.totals.get(node.path, 0))
+        if role == Qt.ItemDataRole.CheckStateRole and index.column() == 0:
+            return node.state
+        if role in (Qt.ItemDataRole.ToolTipRole, Qt.ItemDataRole.UserRole):
+            return node.path
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not index.isValid():
+            return False
+        state = Qt.CheckState(value)
+        if state == Qt.CheckState.PartiallyChecked:
+            state = Qt.CheckState.Checked
+        node = index.internalPointer()
+        if node.state != state:
+            previous = node.state
+            self._set_subtree(node, state)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+            self._update_parents(node, previous)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    # --- check states ---
+
+    def _set_subtree(self, node, state):
+        node.state = node.inherited = state
+        if node.children is None:
+            return
+        node.checked = len(node.child_paths) if state == Qt.CheckState.Checked else 0
+        node.partial = 0
+        changed = [child for child in node.children if child.state != state]
+        for child in changed:
+            self._set_subtree(child, state)
+        if changed:
+            self.dataChanged.emit(self.createIndex(changed[0].row, 0, changed[0]),
+                                  self.createIndex(changed[-1].row, 0, changed[-1]),
+                                  [Qt.ItemDataRole.CheckStateRole])
+
+    def _update_parents(self, node, previous):
+        parent = node.parent
+        while parent is not None:
+            for state, step in ((previous, -1), (node.state, 1)):
+                if state == Qt.CheckState.Checked:
+                    parent.checked += step
+                elif state == Qt.CheckState.PartiallyChecked:
+                    parent.partial += step
+            if parent.checked == len(parent.child_paths):
+                state = Qt.CheckState.Checked
+            elif parent.checked or parent.partial:
+                state = Qt.CheckState.PartiallyChecked
+            else:
+                state = Qt.CheckState.Unchecked
+            if state == parent.state:
+                return
+            previous, parent.state = parent.state, state
+            self.dataChanged.emit(self.createIndex(parent.row, 0, parent), self.createIndex(parent.row, 0, parent),
+                                  [Qt.ItemDataRole.CheckStateRole])
+            node, parent = parent, parent.parent
+
+    def selection(self):
+        """Return the saved folders format for the current check states.
+
+        Fully checked or unchecked folders are stored alone; only partially
+        checked ones list their subfolders.
+        """
+        saved = {}
+
+        def visit(path, state, node, inherited):
+            saved[path] = state != Qt.CheckState.Unchecked
+            if state != Qt.CheckState.PartiallyChecked:
+                return
+            children = (node.children or []) if node is not None else []
+            for row, child_path in enumerate(self.subfolders.get(path, [])):
+                if row < len(children):
+                    child = children[row]
+                    visit(child_path, child.state, child, child.inherited)
+                else:
+                    child_state = inherited if inherited is not None else self._initial_state(child_path, False)
+                    visit(child_path, child_state, None,
+                          None if child_state == Qt.CheckState.PartiallyChecked else child_state)
+
+        for root in self.roots:
+            visit(root.path, root.state, root, root.inherited)
+        return saved
 
 
 class SettingsDialog(QDialog):
     """Dialog for configuring session settings."""
     
-    def __init__(self, parent=None, saved_folders=None, image_duration=60, session_duration=30, halfway_sound=True, presets=None):
+    ORIENTATIONS = [("Any", 'any'), ("Portrait", 'portrait'), ("Landscape", 'landscape'), ("Square", 'square')]
+    
+    def __init__(self, parent=None, saved_folders=None, image_duration=60, session_duration=30, halfway_sound=True, presets=None,
+                 orientation='any', min_size=0, hide_duplicates=False, decode_processes=False, web_sources=None,
+                 rapid_fire=False, rapid_fire_ms=3000):
         super().__init__(parent)
         self.setWindowTitle("Session Settings")
         self.setModal(True)
@@ -45,8 +377,16 @@ class SettingsDialog(QDialog):
         self.default_image_duration = image_duration
         self.default_session_duration = session_duration
         self.default_halfway_sound = halfway_sound
+        self.default_orientation = orientation
+        self.default_min_size = min_size
+        self.default_hide_duplicates = hide_duplicates
+        self.default_decode_processes = decode_processes
+        self.default_rapid_fire = rapid_fire
+        self.default_rapid_fire_ms = rapid_fire_ms
+        self.web_sources = dict(web_sources or {})
         self.presets = presets if presets is not None else {}
         self.presets_modified = False
+        self.library_index = parent.get_library_index() if parent is not None else LibraryIndex(":memory:")
         self.setup_ui()
         self.load_saved_folders()
         
@@ -85,10 +425,11 @@ class SettingsDialog(QDialog):
         folder_group = QGroupBox("Image Folders")
         folder_layout = QVBoxLayout()
         
-        self.folder_tree = QTreeWidget()
-        self.folder_tree.setHeaderLabels(["Folder", "Images"])
+        self.folder_model = FolderTreeModel(self.library_index, self)
+        self.folder_tree = QTreeView()
+        self.folder_tree.setModel(self.folder_model)
+        self.folder_tree.setUniformRowHeights(True)
         self.folder_tree.setColumnWidth(0, 400)
-        self.folder_tree.itemChanged.connect(self.on_item_changed)
         folder_layout.addWidget(self.folder_tree)
         
         folder_btn_layout = QHBoxLayout()
@@ -113,14 +454,44 @@ class SettingsDialog(QDialog):
             }
         """)
         
+        warm_cache_btn = QPushButton("Warm Cache")
+        warm_cache_btn.clicked.connect(self.warm_cache)
+        warm_cache_btn.setToolTip(
+            "Pre-render display-size copies of the selected folders (or all checked folders)\n"
+            "so sessions over them start instantly"
+        )
+        
         folder_btn_layout.addWidget(add_folder_btn)
         folder_btn_layout.addWidget(remove_folder_btn)
         folder_btn_layout.addWidget(refresh_btn)
+        folder_btn_layout.addWidget(warm_cache_btn)
         folder_layout.addLayout(folder_btn_layout)
         
         folder_group.setLayout(folder_layout)
         layout.addWidget(folder_group)
         
+        # Image sets served over HTTP (see gesturemate_core.remote)
+        web_group = QGroupBox("Web Sources")
+        web_layout = QVBoxLayout()
+        self.web_source_list = QListWidget()
+        self.web_source_list.setMaximumHeight(80)
+        for url, enabled in self.web_sources.items():
+            self.add_web_source_item(url, enabled)
+        web_layout.addWidget(self.web_source_list)
+        web_btn_layout = QHBoxLayout()
+        add_web_btn = QPushButton("Add Web Source...")
+        add_web_btn.clicked.connect(self.add_web_source)
+        add_web_btn.setToolTip("Add the JSON manifest of an image set on a web server;\n"
+                               "its images are downloaded as sessions need them and kept for offline use")
+        remove_web_btn = QPushButton("Remove Selected")
+        remove_web_btn.clicked.connect(self.remove_web_source)
+        web_btn_layout.addWidget(add_web_btn)
+        web_btn_layout.addWidget(remove_web_btn)
+        web_btn_layout.addStretch()
+        web_layout.addLayout(web_btn_layout)
+        web_group.setLayout(web_layout)
+        layout.addWidget(web_group)
+        
         # Timer settings group
         timer_group = QGroupBox("Timer Settings")
         timer_layout = QFormLayout()
@@ -137,6 +508,20 @@ class SettingsDialog(QDialog):
         self.session_duration.setSuffix(" minutes")
         timer_layout.addRow("Total session duration:", self.session_duration)
         
+        self.rapid_fire_checkbox = QCheckBox("Rapid-fire poses:")
+        self.rapid_fire_checkbox.setToolTip(
+            "Short warm-up poses, timed to the millisecond instead of the duration per image.\n"
+            "Upcoming images are prepared ahead, and each pose starts once its image is on screen.")
+        self.rapid_fire_ms = QSpinBox()
+        self.rapid_fire_ms.setRange(500, 30000)
+        self.rapid_fire_ms.setSingleStep(250)
+        self.rapid_fire_ms.setValue(self.default_rapid_fire_ms)
+        self.rapid_fire_ms.setSuffix(" ms")
+        self.rapid_fire_checkbox.toggled.connect(self.set_rapid_fire)
+        self.rapid_fire_checkbox.setChecked(self.default_rapid_fire)
+        self.set_rapid_fire(self.default_rapid_fire)
+        timer_layout.addRow(self.rapid_fire_checkbox, self.rapid_fire_ms)
+        
         timer_group.setLayout(timer_layout)
         layout.addWidget(timer_group)
         
@@ -152,6 +537,38 @@ class SettingsDialog(QDialog):
         self.halfway_sound_checkbox.setChecked(self.default_halfway_sound)
         options_layout.addWidget(self.halfway_sound_checkbox)
         
+        self.hide_duplicates_checkbox = QCheckBox("Show only one of each group of near-duplicate images")
+        self.hide_duplicates_checkbox.setToolTip(
+            "Resized, recompressed or slightly cropped copies of the same picture are shown once.\n"
+            "Images are compared in the background, so new folders are covered after a short while.")
+        self.hide_duplicates_checkbox.setChecked(self.default_hide_duplicates)
+        options_layout.addWidget(self.hide_duplicates_checkbox)
+        
+        self.decode_processes_checkbox = QCheckBox("Decode images in separate processes")
+        self.decode_processes_checkbox.setToolTip(
+            "A damaged image then can't freeze or crash GestureMate; it's skipped after a few seconds.\n"
+            "Large images also decode on the other processor cores.")
+        self.decode_processes_checkbox.setChecked(self.default_decode_processes)
+        options_layout.addWidget(self.decode_processes_checkbox)
+        
+        # Size filters, answered from the image headers rather than by decoding
+        size_layout = QFormLayout()
+        self.orientation_combo = QComboBox()
+        for label, value in self.ORIENTATIONS:
+            self.orientation_combo.addItem(label, value)
+        self.set_orientation(self.default_orientation)
+        size_layout.addRow("Orientation:", self.orientation_combo)
+        
+        self.min_size = QSpinBox()
+        self.min_size.setRange(0, 20000)
+        self.min_size.setSingleStep(100)
+        self.min_size.setSuffix(" px")
+        self.min_size.setSpecialValueText("Any")
+        self.min_size.setValue(self.default_min_size)
+        self.min_size.setToolTip("Leave out images whose shorter side is smaller than this, such as thumbnails")
+        size_layout.addRow("Minimum size:", self.min_size)
+        options_layout.addLayout(size_layout)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -166,104 +583,79 @@ class SettingsDialog(QDialog):
         
         self.setLayout(layout)
         
-    def on_item_changed(self, item, column):
-        """Handle item checkbox state changes.
-        
-        When a top-level folder's checkbox is changed, propagate the state to all children.
-        Only top-level items trigger propagation to allow individual subfolder control.
-        """
-        # Only handle checkbox changes in column 0
-        if column != 0:
+    def warm_cache(self):
+        """Pre-render display-size copies of the selected (or all checked) folders' images."""
+        folders = [index.data(Qt.ItemDataRole.UserRole) for index in self.folder_tree.selectionModel().selectedRows()]
+        if not folders:
+            folders = self.get_settings()['folders']
+        if not folders:
+            QMessageBox.information(self, "Warm Cache", "Select or check the folders to warm first.")
             return
         
-        # Only propagate from top-level items (parent is None)
-        # This allows users to manually adjust individual subfolders after bulk operations
-        # and prevents infinite recursion when we programmatically update child items
-        if item.parent() is None:
-            # This is a top-level folder, propagate state to all children
-            new_state = item.checkState(0)
-            
-            # Block signals to avoid recursive calls
-            self.folder_tree.blockSignals(True)
-            
-            try:
-                # Set all children to the same state
-                for i in range(item.childCount()):
-                    child = item.child(i)
-                    child.setCheckState(0, new_state)
-            finally:
-                # Unblock signals
-                self.folder_tree.blockSignals(False)
-    
-    def count_images_in_folder(self, folder_path):
-        """Count images in a specific folder (non-recursive)."""
-        count = 0
-        folder = Path(folder_path)
-        if folder.exists() and folder.is_dir():
-            for file_path in folder.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-                    count += 1
-        return count
-    
-    def get_subfolders_with_images(self, parent_folder):
-        """Get all subfolders that contain images (directly or in sub-subfolders)."""
-        subfolders = []
-        parent_path = Path(parent_folder)
-        
-        if not parent_path.exists():
-            return subfolders
-        
-        # Get immediate subfolders
-        for item in parent_path.iterdir():
-            if item.is_dir():
-                # Check if this subfolder or any of its descendants has images
-                # Limit iteration to prevent excessive scanning
-                has_images = False
-                try:
-                    file_count = 0
-                    for file_path in item.rglob('*'):
-                        file_count += 1
-                        if file_count > MAX_FILES_TO_CHECK:
-                            break
-                        if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-                            has_images = True
-                            break
-                except (PermissionError, OSError):
-                    # Skip folders we can't access
-                    continue
-                
-                if has_images:
-                    subfolders.append(str(item))
+        parent = self.parent()
+        cache_dir = parent.get_cache_dir() if parent is not None else Path(
+            QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation))
+        screen = self.screen()
+        screen_edge = math.ceil(max(screen.size().width(), screen.size().height()) * screen.devicePixelRatio())
+        max_edge = max(DisplayCache.DEFAULT_MAX_EDGE, screen_edge)
         
-        return sorted(subfolders)
-    
-    def count_images_recursive(self, folder_path):
-        """Count all images in a folder recursively.
+        state = {'done': 0, 'total': 0, 'rate': 0.0, 'result': None, 'error': None}
+        cancel = threading.Event()
         
-        Note: Uses a file count limit to prevent UI freezing on very large folders.
-        """
-        count = 0
-        folder = Path(folder_path)
-        if folder.exists() and folder.is_dir():
+        def run():
             try:
-                # Use single rglob('*') and filter by extension for efficiency
-                # Limit iteration to prevent UI freezing on very large folders
-                file_count = 0
-                for file_path in folder.rglob('*'):
-                    file_count += 1
-                    if file_count > MAX_FILES_TO_CHECK:
-                        # If we hit the limit, return approximate count with indicator
-                        # This prevents UI freezing but gives user an idea of size
-                        return count
-                    if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-                        count += 1
-            except (PermissionError, OSError):
-                # Skip folders we can't access
-                pass
-        return count
-    
+                folder_images, _ = scan_folders(folders)
+                paths = [path for images in folder_images.values() for path in images]
+                with DisplayCache(cache_dir) as cache:
+                    state['result'] = cache.warm(
+                        paths, max_edge, cancel=cancel,
+                        progress=lambda done, total, rate: state.update(done=done, total=total, rate=rate))
+            except Exception as e:
+                state['error'] = e
+        
+        progress_dialog = QProgressDialog("Finding images...", "Cancel", 0, 0, self)
+        progress_dialog.setWindowTitle("Warm Cache")
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+        progress_dialog.canceled.connect(cancel.set)
+        
+        worker = threading.Thread(target=run, name="WarmCache", daemon=True)
+        worker.start()
+        
+        def poll():
+            if state['total']:
+                progress_dialog.setMaximum(state['total'])
+                progress_dialog.setValue(state['done'])
+                progress_dialog.setLabelText(
+                    f"Caching {state['done']} of {state['total']} images ({state['rate']:.1f} images/s)")
+            if worker.is_alive():
+                return
+            timer.stop()
+            progress_dialog.close()
+            result = state['result']
+            if state['error'] is not None:
+                QMessageBox.warning(self, "Warm Cache", f"Caching failed:\n{state['error']}")
+            elif result['cancelled']:
+                QMessageBox.information(
+                    self, "Warm Cache",
+                    f"Stopped after {result['rendered']} images. Warm the cache again to continue."
+                )
+            else:
+                QMessageBox.information(
+                    self, "Warm Cache",
+                    f"{result['rendered']} images cached, {result['skipped']} were already cached"
+                    + (f", {result['failed']} could not be read" if result['failed'] else "")
+                    + f" ({result['seconds']:.0f}s)."
+                )
+        
+        timer = QTimer(self)
+        timer.timeout.connect(poll)
+        timer.start(200)
+        
     def add_folder(self):
-        """Add a folder to the tree with subfolders."""
+        """Add a folder to the tree; its subfolders load as they're expanded."""
         folder = QFileDialog.getExistingDirectory(
             self, "Select Image Folder"
         )
@@ -271,15 +663,16 @@ class SettingsDialog(QDialog):
             return
         
         # Check if folder already exists in tree
-        root = self.folder_tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
-            if item.data(0, Qt.ItemDataRole.UserRole) == folder:
-                QMessageBox.information(self, "Folder Exists", "This folder has already been added.")
-                return
+        if any(root.path == folder for root in self.folder_model.roots):
+            QMessageBox.information(self, "Folder Exists", "This folder has already been added.")
+            return
         
-        # Count images in the main folder
-        total_images = self.count_images_recursive(folder)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self.library_index.update(folder)
+            total_images = self.library_index.image_count(folder)
+        finally:
+            QApplication.restoreOverrideCursor()
         
         if total_images == 0:
             response = QMessageBox.question(
@@ -290,212 +683,64 @@ class SettingsDialog(QDialog):
             if response == QMessageBox.StandardButton.No:
                 return
         
-        # Create tree item for the main folder
-        folder_item = QTreeWidgetItem()
-        folder_item.setText(0, Path(folder).name)
-        folder_item.setText(1, str(total_images))
-        folder_item.setCheckState(0, Qt.CheckState.Checked)
-        folder_item.setData(0, Qt.ItemDataRole.UserRole, folder)
-        folder_item.setToolTip(0, folder)
-        
-        # Get subfolders
-        subfolders = self.get_subfolders_with_images(folder)
-        
-        # Add subfolder items
-        for subfolder in subfolders:
-            # Count images for this subfolder
-            subfolder_images = self.count_images_recursive(subfolder)
-            subfolder_item = QTreeWidgetItem()
-            subfolder_item.setText(0, Path(subfolder).name)
-            subfolder_item.setText(1, str(subfolder_images))
-            subfolder_item.setCheckState(0, Qt.CheckState.Checked)
-            subfolder_item.setData(0, Qt.ItemDataRole.UserRole, subfolder)
-            subfolder_item.setToolTip(0, subfolder)
-            folder_item.addChild(subfolder_item)
-        
-        self.folder_tree.addTopLevelItem(folder_item)
-        folder_item.setExpanded(True)
+        row = self.folder_model.add_root(folder)
+        self.folder_tree.expand(self.folder_model.index(row, 0))
     
     def load_saved_folders(self):
         """Load saved folders into the tree."""
-        # Group folders by parent-child relationships
-        parent_folders = {}
-        subfolder_states = {}
-        
-        # First pass: identify parent folders and their children
-        for folder, enabled in self.saved_folders.items():
-            folder_path = Path(folder)
-            if not folder_path.exists():
-                continue
-            
-            # Check if this folder is a subfolder of any other saved folder
-            is_subfolder = False
-            for other_folder in self.saved_folders.keys():
-                if folder != other_folder:
-                    other_path = Path(other_folder)
-                    try:
-                        # Check if folder is a child of other_folder
-                        # relative_to() raises ValueError if paths are unrelated
-                        folder_path.relative_to(other_path)
-                        # It's a subfolder
-                        is_subfolder = True
-                        if other_folder not in parent_folders:
-                            parent_folders[other_folder] = []
-                        parent_folders[other_folder].append(folder)
-                        subfolder_states[folder] = enabled
-                        break
-                    except ValueError:
-                        # Not a subfolder - paths are unrelated
-                        pass
-            
-            if not is_subfolder:
-                # It's a top-level folder
-                if folder not in parent_folders:
-                    parent_folders[folder] = []
-        
-        # Second pass: create tree items for parent folders
-        for parent_folder in sorted(parent_folders.keys()):
-            parent_path = Path(parent_folder)
-            if not parent_path.exists():
-                continue
-            
-            # Count images
-            total_images = self.count_images_recursive(parent_folder)
-            
-            # Create tree item for parent
-            folder_item = QTreeWidgetItem()
-            folder_item.setText(0, parent_path.name)
-            folder_item.setText(1, str(total_images))
-            folder_item.setCheckState(0, Qt.CheckState.Checked if self.saved_folders.get(parent_folder, True) else Qt.CheckState.Unchecked)
-            folder_item.setData(0, Qt.ItemDataRole.UserRole, parent_folder)
-            folder_item.setToolTip(0, parent_folder)
-            
-            # Add subfolders if any
-            saved_subfolders = parent_folders[parent_folder]
-            if saved_subfolders:
-                # These are explicitly saved subfolders
-                for subfolder in sorted(saved_subfolders):
-                    subfolder_path = Path(subfolder)
-                    if not subfolder_path.exists():
-                        continue
-                    
-                    subfolder_images = self.count_images_recursive(subfolder)
-                    subfolder_item = QTreeWidgetItem()
-                    subfolder_item.setText(0, subfolder_path.name)
-                    subfolder_item.setText(1, str(subfolder_images))
-                    subfolder_item.setCheckState(0, Qt.CheckState.Checked if subfolder_states.get(subfolder, True) else Qt.CheckState.Unchecked)
-                    subfolder_item.setData(0, Qt.ItemDataRole.UserRole, subfolder)
-                    subfolder_item.setToolTip(0, subfolder)
-                    folder_item.addChild(subfolder_item)
-            else:
-                # Discover subfolders that weren't explicitly saved
-                discovered_subfolders = self.get_subfolders_with_images(parent_folder)
-                for subfolder in discovered_subfolders:
-                    subfolder_path = Path(subfolder)
-                    subfolder_images = self.count_images_recursive(subfolder)
-                    subfolder_item = QTreeWidgetItem()
-                    subfolder_item.setText(0, subfolder_path.name)
-                    subfolder_item.setText(1, str(subfolder_images))
-                    # Default to checked for newly discovered subfolders
-                    subfolder_item.setCheckState(0, Qt.CheckState.Checked)
-                    subfolder_item.setData(0, Qt.ItemDataRole.UserRole, subfolder)
-                    subfolder_item.setToolTip(0, subfolder)
-                    folder_item.addChild(subfolder_item)
-            
-            self.folder_tree.addTopLevelItem(folder_item)
-            folder_item.setExpanded(True)
+        # Indexes the folders the first time; after that one stat() per folder
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self.folder_model.load(self.saved_folders)
+        finally:
+            QApplication.restoreOverrideCursor()
+        for row in range(self.folder_model.rowCount()):
+            self.folder_tree.expand(self.folder_model.index(row, 0))
             
     def remove_folder(self):
-        """Remove selected folder from the tree."""
-        current_item = self.folder_tree.currentItem()
-        if current_item:
-            # If it's a child item, remove from parent
-            parent = current_item.parent()
-            if parent:
-                parent.removeChild(current_item)
-            else:
-                # It's a top-level item
-                index = self.folder_tree.indexOfTopLevelItem(current_item)
-                self.folder_tree.takeTopLevelItem(index)
+        """Remove the selected top-level folder; a selected subfolder is unchecked instead."""
+        current = self.folder_tree.currentIndex()
+        if not current.isValid():
+            return
+        if current.parent().isValid():
+            self.folder_model.setData(current.siblingAtColumn(0), Qt.CheckState.Unchecked,
+                                      Qt.ItemDataRole.CheckStateRole)
+        else:
+            self.folder_model.remove_root(current.row())
+    
+    def add_web_source_item(self, url, enabled=True):
+        item = QListWidgetItem(url)
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+        item.setCheckState(Qt.CheckState.Checked if enabled else Qt.CheckState.Unchecked)
+        self.web_source_list.addItem(item)
+    
+    def add_web_source(self):
+        """Ask for a manifest URL and add it once its manifest has downloaded."""
+        url, ok = QInputDialog.getText(self, "Add Web Source", "Manifest URL (http:// or https://):")
+        url = url.strip()
+        if not ok or not url:
+            return
+        if url in self.web_sources:
+            return
+        if self.parent() is not None:
+            errors = self.parent().sync_web_sources([url])
+            if errors:
+                QMessageBox.warning(self, "Web Source Unavailable", errors[0])
+                return
+        self.web_sources[url] = True
+        self.add_web_source_item(url)
+    
+    def remove_web_source(self):
+        row = self.web_source_list.currentRow()
+        if row >= 0:
+            item = self.web_source_list.takeItem(row)
+            self.web_sources.pop(item.text(), None)
     
     def refresh_folders(self):
         """Refresh the folder tree to detect newly added subfolders."""
-        # Store current checkbox states
-        current_states = {}
-        root = self.folder_tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
-            folder_path = item.data(0, Qt.ItemDataRole.UserRole)
-            current_states[folder_path] = item.checkState(0) == Qt.CheckState.Checked
-            
-            # Store child states
-            for j in range(item.childCount()):
-                child_item = item.child(j)
-                child_folder = child_item.data(0, Qt.ItemDataRole.UserRole)
-                current_states[child_folder] = child_item.checkState(0) == Qt.CheckState.Checked
-        
-        # Clear the tree
-        self.folder_tree.clear()
-        
-        # Reload folders with preserved states
-        parent_folders = {}
-        
-        # Identify parent folders from current states
-        for folder in current_states.keys():
-            folder_path = Path(folder)
-            if not folder_path.exists():
-                continue
-            
-            is_subfolder = False
-            for other_folder in current_states.keys():
-                if folder != other_folder:
-                    other_path = Path(other_folder)
-                    try:
-                        folder_path.relative_to(other_path)
-                        is_subfolder = True
-                        if other_folder not in parent_folders:
-                            parent_folders[other_folder] = []
-                        break
-                    except ValueError:
-                        pass
-            
-            if not is_subfolder:
-                if folder not in parent_folders:
-                    parent_folders[folder] = []
-        
-        # Recreate tree items with current states
-        for parent_folder in sorted(parent_folders.keys()):
-            parent_path = Path(parent_folder)
-            if not parent_path.exists():
-                continue
-            
-            # Count images
-            total_images = self.count_images_recursive(parent_folder)
-            
-            # Create tree item for parent
-            folder_item = QTreeWidgetItem()
-            folder_item.setText(0, parent_path.name)
-            folder_item.setText(1, str(total_images))
-            folder_item.setCheckState(0, Qt.CheckState.Checked if current_states.get(parent_folder, True) else Qt.CheckState.Unchecked)
-            folder_item.setData(0, Qt.ItemDataRole.UserRole, parent_folder)
-            folder_item.setToolTip(0, parent_folder)
-            
-            # Discover all subfolders (including newly added ones)
-            discovered_subfolders = self.get_subfolders_with_images(parent_folder)
-            for subfolder in discovered_subfolders:
-                subfolder_path = Path(subfolder)
-                subfolder_images = self.count_images_recursive(subfolder)
-                subfolder_item = QTreeWidgetItem()
-                subfolder_item.setText(0, subfolder_path.name)
-                subfolder_item.setText(1, str(subfolder_images))
-                # Use existing state if available, otherwise default to checked
-                subfolder_item.setCheckState(0, Qt.CheckState.Checked if current_states.get(subfolder, True) else Qt.CheckState.Unchecked)
-                subfolder_item.setData(0, Qt.ItemDataRole.UserRole, subfolder)
-                subfolder_item.setToolTip(0, subfolder)
-                folder_item.addChild(subfolder_item)
-            
-            self.folder_tree.addTopLevelItem(folder_item)
-            folder_item.setExpanded(True)
+        # Keep the current check states
+        self.saved_folders = self.folder_model.selection()
+        self.load_saved_folders()
             
     def refresh_preset_combo(self, select=None):
         """Repopulate the preset dropdown, optionally selecting a preset by name."""
@@ -518,10 +763,14 @@ class SettingsDialog(QDialog):
         self.session_duration.setValue(preset.get('session_duration', self.default_session_duration * 60) // 60)
         self.shuffle_checkbox.setChecked(preset.get('shuffle', True))
         self.halfway_sound_checkbox.setChecked(preset.get('halfway_sound', True))
+        self.set_orientation(preset.get('orientation', 'any'))
+        self.min_size.setValue(preset.get('min_size', 0))
+        self.hide_duplicates_checkbox.setChecked(preset.get('hide_duplicates', False))
+        self.rapid_fire_checkbox.setChecked(preset.get('rapid_fire', False))
+        self.rapid_fire_ms.setValue(preset.get('rapid_fire_ms', self.default_rapid_fire_ms))
 
         # Rebuild the folder tree from the preset's saved folder states
         self.saved_folders = dict(preset.get('folders', {}))
-        self.folder_tree.clear()
         self.load_saved_folders()
 
     def save_preset(self):
@@ -551,7 +800,12 @@ class SettingsDialog(QDialog):
             'image_duration': settings['image_duration'],
             'session_duration': settings['session_duration'],
             'shuffle': settings['shuffle'],
-            'halfway_sound': settings['halfway_sound']
+            'halfway_sound': settings['halfway_sound'],
+            'orientation': settings['orientation'],
+            'min_size': settings['min_size'],
+            'hide_duplicates': settings['hide_duplicates'],
+            'rapid_fire': settings['rapid_fire'],
+            'rapid_fire_ms': settings['rapid_fire_ms']
         }
         self.presets_modified = True
         self.refresh_preset_combo(select=name)
@@ -574,74 +828,216 @@ class SettingsDialog(QDialog):
         self.presets_modified = True
         self.refresh_preset_combo()
 
+    def set_rapid_fire(self, checked):
+        """Switch between the rapid-fire pose length and the duration per image."""
+        self.rapid_fire_ms.setEnabled(checked)
+        self.image_duration.setEnabled(not checked)
+
+    def set_orientation(self, orientation):
+        """Select an orientation filter by its config value."""
+        index = self.orientation_combo.findData(orientation)
+        self.orientation_combo.setCurrentIndex(max(index, 0))
+    
     def get_settings(self):
         """Return the current settings."""
-        # Get enabled folders from tree
-        enabled_folders = []
-        all_folders = {}
-        
-        root = self.folder_tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
-            folder_path = item.data(0, Qt.ItemDataRole.UserRole)
-            is_checked = item.checkState(0) == Qt.CheckState.Checked
-            
-            # For parent folders, if checked and has no children, add the whole folder
-            if item.childCount() == 0:
-                all_folders[folder_path] = is_checked
-                if is_checked:
-                    enabled_folders.append(folder_path)
-            else:
-                # If has children, check each child
-                has_checked_children = False
-                for j in range(item.childCount()):
-                    child_item = item.child(j)
-                    child_folder = child_item.data(0, Qt.ItemDataRole.UserRole)
-                    child_checked = child_item.checkState(0) == Qt.CheckState.Checked
-                    all_folders[child_folder] = child_checked
-                    if child_checked:
-                        enabled_folders.append(child_folder)
-                        has_checked_children = True
-                
-                # Also store the parent folder state for persistence
-                all_folders[folder_path] = is_checked
-        
+        all_folders = self.folder_model.selection()
         return {
-            'folders': enabled_folders,
+            'folders': enabled_folders(all_folders),
             'all_folders': all_folders,
             'image_duration': self.image_duration.value(),
             'session_duration': self.session_duration.value() * 60,  # Convert to seconds
             'shuffle': self.shuffle_checkbox.isChecked(),
-            'halfway_sound': self.halfway_sound_checkbox.isChecked()
+            'halfway_sound': self.halfway_sound_checkbox.isChecked(),
+            'orientation': self.orientation_combo.currentData(),
+            'min_size': self.min_size.value(),
+            'hide_duplicates': self.hide_duplicates_checkbox.isChecked(),
+            'decode_processes': self.decode_processes_checkbox.isChecked(),
+            'rapid_fire': self.rapid_fire_checkbox.isChecked(),
+            'rapid_fire_ms': self.rapid_fire_ms.value(),
+            'web_sources': {
+                item.text(): item.checkState() == Qt.CheckState.Checked
+                for item in map(self.web_source_list.item, range(self.web_source_list.count()))
+            }
         }
 
 
-def format_duration(seconds):
-    """Format a duration in seconds as a compact human-readable string."""
-    hours, remainder = divmod(seconds, 3600)
-    minutes = remainder // 60
-    if hours:
-        return f"{hours}h {minutes}m"
-    if minutes:
-        return f"{minutes}m"
-    return f"{seconds}s"
+class FilterSessionDialog(QDialog):
+    """Dialog for starting a session on the images matching a filter expression."""
+    
+    def __init__(self, parent, roots, search, probe, query_text=""):
+        super().__init__(parent)
+        self.setWindowTitle("Start Filtered Session")
+        self.setModal(True)
+        self.search = search
+        self.probe = probe
+        self.matches = {}
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(150)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.setup_ui(roots, query_text)
+        self.update_preview()
+        
+    def setup_ui(self, roots, query_text):
+        """Setup the filter dialog UI."""
+        layout = QVBoxLayout()
+        
+        roots_group = QGroupBox("Search In")
+        roots_layout = QVBoxLayout()
+        self.roots_list = QListWidget()
+        for folder, checked in roots.items():
+            item = QListWidgetItem(folder)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+            self.roots_list.addItem(item)
+        self.roots_list.itemChanged.connect(lambda item: self.preview_timer.start())
+        roots_layout.addWidget(self.roots_list)
+        roots_group.setLayout(roots_layout)
+        layout.addWidget(roots_group)
+        
+        filter_group = QGroupBox("Filter")
+        filter_layout = QVBoxLayout()
+        self.query_edit = QLineEdit(query_text)
+        self.query_edit.setPlaceholderText('e.g.  hands -nsfw')
+        self.query_edit.textChanged.connect(lambda text: self.preview_timer.start())
+        filter_layout.addWidget(self.query_edit)
+        help_label = QLabel(
+            "Words match anywhere in folder and file names; all of them must match.\n"
+            "pose_*  a name starting with pose_     -word  leave out matches     "
+            '"two words"  match with a space'
+        )
+        help_label.setStyleSheet("color: gray;")
+        filter_layout.addWidget(help_label)
+        self.count_label = QLabel()
+        filter_layout.addWidget(self.count_label)
+        filter_group.setLayout(filter_layout)
+        layout.addWidget(filter_group)
+        
+        button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel
+        )
+        self.start_button = button_box.button(QDialogButtonBox.StandardButton.Ok)
+        self.start_button.setText("Start Session")
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        self.setLayout(layout)
+        self.resize(560, 420)
+        
+    def roots(self):
+        """Return the checked folders to search."""
+        return [
+            self.roots_list.item(i).text() for i in range(self.roots_list.count())
+            if self.roots_list.item(i).checkState() == Qt.CheckState.Checked
+        ]
+    
+    def query_text(self):
+        return self.query_edit.text().strip()
+    
+    def update_preview(self):
+        """Count the matching images for the current folders and filter."""
+        started = time.perf_counter()
+        # A newly checked folder may have to be indexed first
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self.matches = self.search(self.roots(), self.query_text())
+        except ValueError as e:
+            self.matches = {}
+            self.count_label.setText(str(e))
+            self.start_button.setEnabled(False)
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        count = sum(len(paths) for paths in self.matches.values())
+        # Size terms are checked against headers read in the background
+        unknown = self.probe(self.matches, self.query_text())
+        elapsed = (time.perf_counter() - started) * 1000
+        if unknown:
+            self.count_label.setText(
+                f"Up to {count} matching images; reading the sizes of {unknown}...")
+        else:
+            self.count_label.setText(f"{count} matching image{'s' if count != 1 else ''} ({elapsed:.0f} ms)")
+        self.start_button.setEnabled(count > 0 and not unknown)
+
+
+class ImageCache:
+    """Least-recently-used cache of decoded images, bounded by their total size in bytes.
+
+    Transforms, resizes and stepping back to a recent image reuse the decoded
+    QImage instead of reading and decoding the file again. The loader
+    thread fills it too, so every access takes a lock.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the cached image for path (marking it recently used), or None."""
+        with self._lock:
+            image = self._images.get(path)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(path)
+            self.hits += 1
+            return image
+
+    def peek(self, path):
+        """Return the cached image for path without counting a hit or marking it used."""
+        with self._lock:
+            return self._images.get(path)
+
+    def put(self, path, image):
+        with self._lock:
+            old = self._images.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old.sizeInBytes()
+            self._images[path] = image
+            self.total_bytes += image.sizeInBytes()
+            self._evict(self.max_bytes)
+
+    def trim(self, max_bytes, keep=None):
+        """Evict least recently used images down to max_bytes, keeping the newest one.
+
+        The image for path keep, if cached, counts as the newest.
+        """
+        with self._lock:
+            if keep in self._images:
+                self._images.move_to_end(keep)
+            self._evict(max_bytes)
+
+    def _evict(self, max_bytes):
+        # Always keep the newest image, even if it alone is over budget
+        while self.total_bytes > max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self.total_bytes -= evicted.sizeInBytes()
 
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.total_bytes = 0
 
-def compute_streak(daily_time):
-    """Count consecutive days of practice ending today (or yesterday)."""
-    day = date.today()
-    # The streak is still alive if the last practice was yesterday
-    if day.isoformat() not in daily_time:
-        day -= timedelta(days=1)
-    streak = 0
-    while day.isoformat() in daily_time:
-        streak += 1
-        day -= timedelta(days=1)
-    return streak
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._images
+
+    def __len__(self):
+        return len(self._images)
 
 
 class HomeScreenWidget(QWidget):
-    """Home screen showing usage statistics, a weekly trend chart and a daily activity heatmap."""
+    """Home screen showing usage statistics, a practice trend chart and a daily activity heatmap.
+
+    The trend chart shows either the last few weeks or all-time monthly
+    totals, and the heatmap either the recent weeks or any calendar year.
+    """
 
     SURFACE = QColor("#2b2b2b")
     INK = QColor("#ffffff")
@@ -656,30 +1052,107 @@ class HomeScreenWidget(QWidget):
     CELL_RAMP = [QColor("#1c5cab"), QColor("#2a78d6"), QColor("#5598e7"), QColor("#86b6ef")]
 
     TREND_WEEKS = 12
+    # Past this many months the all-time chart switches to yearly bars
+    TREND_MAX_MONTHS = 36
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.stats = {}
+        self.stats = None  # set once statistics have been loaded after startup
+        self.all_time_trend = False
+        self.heatmap_year = None  # None shows the most recent weeks
         self.setMouseTracking(True)
-        self._hover_zones = []  # (QRect, tooltip text)
+        # Everything is rendered once into a backing pixmap; paintEvent just blits it
+        self._cache = None
+        self._cache_key = None
+        self._fonts = {}
+        # Hover geometry recorded while rendering, so lookups are arithmetic
+        self._chart_hover = None    # (plot QRect, slot width, [tooltip per bar])
+        self._heatmap_hover = None  # (grid x, grid y, step, cell, columns, first monday, first day, last day)
+        self._click_zones = []      # (QRect, action) for the few view toggles
+        self._hover_tip = None
 
     def set_stats(self, stats):
         self.stats = stats
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached rendering so the next paint redraws it."""
+        self._cache = None
         self.update()
 
-    def mouseMoveEvent(self, event):
+    def release(self):
+        """Free the cached rendering while the screen can't be seen, without repainting."""
+        self._cache = None
+
+    def resizeEvent(self, event):
+        self._cache = None
+        super().resizeEvent(event)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._fonts = {}
+            self.invalidate()
+        super().changeEvent(event)
+
+    def mousePressEvent(self, event):
         pos = event.position().toPoint()
-        for rect, tip in self._hover_zones:
+        for rect, action in self._click_zones:
             if rect.contains(pos):
-                QToolTip.showText(event.globalPosition().toPoint(), tip, self)
+                action()
+                self.invalidate()
                 return
-        QToolTip.hideText()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        over_toggle = any(rect.contains(pos) for rect, _ in self._click_zones)
+        self.setCursor(Qt.CursorShape.PointingHandCursor if over_toggle else Qt.CursorShape.ArrowCursor)
+        tip = self._tooltip_at(pos)
+        if tip != self._hover_tip:
+            self._hover_tip = tip
+            if tip:
+                QToolTip.showText(event.globalPosition().toPoint(), tip, self)
+            else:
+                QToolTip.hideText()
         super().mouseMoveEvent(event)
 
+    def leaveEvent(self, event):
+        self._hover_tip = None
+        super().leaveEvent(event)
+
+    def _tooltip_at(self, pos):
+        """Return the tooltip for the chart bar or heatmap cell under `pos`, if any."""
+        x, y = pos.x(), pos.y()
+        if self._chart_hover:
+            plot, slot_w, tips = self._chart_hover
+            if plot.top() <= y < plot.top() + plot.height() and x >= plot.left():
+                i = int((x - plot.left()) / slot_w)
+                if i < len(tips):
+                    return tips[i]
+        if self._heatmap_hover:
+            grid_x, grid_y, step, cell, columns, first_monday, first_day, last_day = self._heatmap_hover
+            # Cells accept hover one pixel beyond their edges
+            dx, dy = x - grid_x + 1, y - grid_y + 1
+            if dx < 0 or dy < 0 or dx % step >= cell + 2 or dy % step >= cell + 2:
+                return None
+            c, r = dx // step, dy // step
+            if c >= columns or r >= 7:
+                return None
+            day = first_monday + timedelta(weeks=c, days=r)
+            if not first_day <= day <= last_day:
+                return None
+            seconds = self.stats.day_seconds(day)
+            return f"{day.strftime('%a')} {day.day} {day.strftime('%b %Y')}\n" + (
+                format_duration(seconds) if seconds else "No practice")
+        return None
+
     def _font(self, point_size, bold=False):
-        font = QFont(self.font())
-        font.setPointSize(point_size)
-        font.setBold(bold)
+        font = self._fonts.get((point_size, bold))
+        if font is None:
+            font = QFont(self.font())
+            font.setPointSize(point_size)
+            font.setBold(bold)
+            self._fonts[(point_size, bold)] = font
         return font
 
     def _draw_centered_text(self, painter, y, text, font, color):
@@ -691,13 +1164,37 @@ class HomeScreenWidget(QWidget):
                          Qt.AlignmentFlag.AlignHCenter, text)
         return y + metrics.height()
 
+    @traced('HomeScreenWidget.paintEvent', 'paint')
     def paintEvent(self, event):
+        if self.width() <= 0 or self.height() <= 0:
+            return
+        ratio = self.devicePixelRatioF()
+        # Today's date is part of the key so the heatmap rolls over at midnight
+        key = (self.size(), ratio, date.today())
+        if self._cache is None or key != self._cache_key:
+            self._cache = QPixmap(self.size() * ratio)
+            self._cache.setDevicePixelRatio(ratio)
+            self._cache_key = key
+            cache_painter = QPainter(self._cache)
+            try:
+                self._render(cache_painter)
+            finally:
+                cache_painter.end()
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._cache)
+
+    def _render(self, painter):
+        """Draw the whole home screen; called only when the cache is invalid."""
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.fillRect(self.rect(), self.SURFACE)
-        self._hover_zones = []
+        self._chart_hover = None
+        self._heatmap_hover = None
+        self._click_zones = []
+        if self.stats is None:
+            # Statistics are still loading; the first frame is just the surface
+            return
 
-        sessions = self.stats.get('sessions_completed', 0)
+        sessions = self.stats.sessions_completed
         if not sessions:
             y = max(20, self.height() // 2 - 60)
             y = self._draw_centered_text(painter, y, "Welcome to GestureMate", self._font(24, bold=True), self.INK)
@@ -710,7 +1207,6 @@ class HomeScreenWidget(QWidget):
                 self._font(11), self.INK_MUTED)
             return
 
-        daily = self.stats.get('daily_time', {})
         content_w = min(760, self.width() - 60)
         left = (self.width() - content_w) // 2
 
@@ -719,7 +1215,7 @@ class HomeScreenWidget(QWidget):
 
         # --- Header ---
         y = self._draw_centered_text(painter, y, "GestureMate", self._font(24, bold=True), self.INK)
-        streak = compute_streak(daily)
+        streak = self.stats.streak()
         if streak:
             plural = "day" if streak == 1 else "days"
             y = self._draw_centered_text(
@@ -728,9 +1224,9 @@ class HomeScreenWidget(QWidget):
 
         # --- Stat row ---
         stat_items = (
-            (format_duration(self.stats.get('total_time', 0)), "total practice"),
+            (format_duration(self.stats.total_time), "total practice"),
             (str(sessions), "sessions"),
-            (str(self.stats.get('images_viewed', 0)), "images drawn"),
+            (str(self.stats.images_viewed), "images drawn"),
         )
         col_w = content_w // 3
         value_font = self._font(17, bold=True)
@@ -746,45 +1242,88 @@ class HomeScreenWidget(QWidget):
             painter.drawText(cell.translated(0, value_h), Qt.AlignmentFlag.AlignHCenter, label)
         y += value_h + QFontMetrics(label_font).height() + 8
 
-        today_time = daily.get(date.today().isoformat(), 0)
+        today_time = self.stats.day_seconds(date.today())
         today_line = f"Today: {format_duration(today_time)}" if today_time else "No practice yet today"
         y = self._draw_centered_text(painter, y, today_line, self._font(11), self.INK_SECONDARY)
         y += 16
 
-        # --- Weekly trend chart ---
-        y = self._draw_trend_chart(painter, left, y, content_w, daily)
+        # --- Practice trend chart ---
+        y = self._draw_trend_chart(painter, left, y, content_w)
         y += 20
 
         # --- Daily activity heatmap ---
-        y = self._draw_heatmap(painter, left, y, content_w, daily)
+        y = self._draw_heatmap(painter, left, y, content_w)
         y += 14
 
         self._draw_centered_text(
             painter, y, "Press Space or click 'Start Session' to begin", self._font(10), self.INK_MUTED)
 
-    def _draw_trend_chart(self, painter, left, y, content_w, daily):
-        """Draw a bar chart of practice time per week; return the y below it."""
+    def _draw_toggles(self, painter, right, y, options):
+        """Draw right-aligned text toggles ending at `right`; options are (label, active, action)."""
+        font = self._font(9)
+        metrics = QFontMetrics(font)
+        painter.setFont(font)
+        x = right
+        for label, active, action in reversed(options):
+            width = metrics.horizontalAdvance(label)
+            x -= width
+            rect = QRect(x, y, width, metrics.height())
+            painter.setPen(self.INK if active else self.INK_MUTED)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignLeft, label)
+            if action is not None:
+                self._click_zones.append((rect.adjusted(-4, -2, 4, 2), action))
+            x -= 14
+
+    def _set_all_time_trend(self, all_time):
+        self.all_time_trend = all_time
+
+    def _trend_series(self):
+        """Return (title, [(axis label, tooltip heading, seconds)]) for the trend chart."""
+        today = date.today()
+        if not self.all_time_trend or not self.stats.years():
+            this_monday = today - timedelta(days=today.weekday())
+            series = []
+            for i in range(self.TREND_WEEKS - 1, -1, -1):
+                week_start = this_monday - timedelta(weeks=i)
+                label = f"{week_start.day} {week_start.strftime('%b')}"
+                series.append((label, f"Week of {label}", self.stats.week_total(week_start)))
+            return f"Practice time — last {self.TREND_WEEKS} weeks", series
+
+        first_year = self.stats.years()[0]
+        first_month = min(month for year, month in self.stats.monthly if year == first_year)
+        months = (today.year - first_year) * 12 + today.month - first_month + 1
+        if months > self.TREND_MAX_MONTHS:
+            series = [(str(year), str(year), self.stats.year_total(year))
+                      for year in range(first_year, today.year + 1)]
+            return "Practice time — all time, by year", series
+        series = []
+        for i in range(months):
+            year, month = divmod(first_month - 1 + i, 12)
+            year += first_year
+            month_start = date(year, month + 1, 1)
+            series.append((month_start.strftime("%b %y"), month_start.strftime("%B %Y"),
+                           self.stats.month_total(year, month + 1)))
+        return "Practice time — all time, by month", series
+
+    def _draw_trend_chart(self, painter, left, y, content_w):
+        """Draw a bar chart of practice time per week (or month/year); return the y below it."""
+        title, bars = self._trend_series()
         title_font = self._font(10)
         painter.setFont(title_font)
         painter.setPen(self.INK_SECONDARY)
-        painter.drawText(left, y + QFontMetrics(title_font).ascent(),
-                         f"Practice time — last {self.TREND_WEEKS} weeks")
+        painter.drawText(left, y + QFontMetrics(title_font).ascent(), title)
+        self._draw_toggles(painter, left + content_w, y, (
+            (f"{self.TREND_WEEKS} weeks", not self.all_time_trend, lambda: self._set_all_time_trend(False)),
+            ("All time", self.all_time_trend, lambda: self._set_all_time_trend(True)),
+        ))
         y += QFontMetrics(title_font).height() + 6
 
-        # Weekly totals, oldest first, ending with the current week
-        this_monday = date.today() - timedelta(days=date.today().weekday())
-        weeks = []
-        for i in range(self.TREND_WEEKS - 1, -1, -1):
-            week_start = this_monday - timedelta(weeks=i)
-            total = sum(daily.get((week_start + timedelta(days=d)).isoformat(), 0) for d in range(7))
-            weeks.append((week_start, total))
-
         plot_h = 130
         gutter = 52
         plot = QRect(left + gutter, y, content_w - gutter, plot_h)
 
         # Scale to a "nice" top: whole half-hours
-        max_val = max(total for _, total in weeks)
+        max_val = max(total for _, _, total in bars)
         top = max(1800, -(-max_val // 1800) * 1800)
 
         # Gridlines and y labels at 0 / half / top
@@ -799,10 +1338,13 @@ class HomeScreenWidget(QWidget):
                              Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
                              format_duration(int(top * fraction)))
 
-        slot_w = plot.width() / len(weeks)
+        slot_w = plot.width() / len(bars)
         bar_w = max(4, round(slot_w * 0.6))
-        max_index = max(range(len(weeks)), key=lambda i: weeks[i][1])
-        for i, (week_start, total) in enumerate(weeks):
+        # Label every bar that has room (every other week at the default width)
+        label_every = max(1, -(-80 // max(1, int(slot_w))))
+        max_index = max(range(len(bars)), key=lambda i: bars[i][2])
+        tips = []
+        for i, (label, heading, total) in enumerate(bars):
             bar_x = round(plot.left() + i * slot_w + (slot_w - bar_w) / 2)
             bar_h = round(plot_h * total / top)
             bar = QRect(bar_x, plot.bottom() - bar_h, bar_w, bar_h)
@@ -821,51 +1363,71 @@ class HomeScreenWidget(QWidget):
                     painter.setPen(self.INK_SECONDARY)
                     painter.drawText(QRect(bar_x - 30, bar.top() - 16, bar_w + 60, 14),
                                      Qt.AlignmentFlag.AlignHCenter, format_duration(total))
-            # x label every other week
-            if i % 2 == 0:
+            if i % label_every == 0:
                 painter.setFont(label_font)
                 painter.setPen(self.INK_MUTED)
-                painter.drawText(QRect(round(plot.left() + i * slot_w), plot.bottom() + 4,
-                                       round(slot_w), 14),
-                                 Qt.AlignmentFlag.AlignHCenter,
-                                 f"{week_start.day} {week_start.strftime('%b')}")
-            tip = f"Week of {week_start.day} {week_start.strftime('%b')}\n" + (
-                format_duration(total) if total else "No practice")
-            self._hover_zones.append(
-                (QRect(round(plot.left() + i * slot_w), plot.top(), round(slot_w), plot_h), tip))
+                label_x = round(plot.left() + i * slot_w + slot_w / 2)
+                painter.drawText(QRect(label_x - 40, plot.bottom() + 4, 80, 14),
+                                 Qt.AlignmentFlag.AlignHCenter, label)
+            tips.append(f"{heading}\n" + (format_duration(total) if total else "No practice"))
+        self._chart_hover = (plot, slot_w, tips)
 
         return plot.bottom() + 20
 
-    def _draw_heatmap(self, painter, left, y, content_w, daily):
+    def _step_heatmap_year(self, year):
+        # Stepping past the current year returns to the recent-weeks view
+        self.heatmap_year = None if year > date.today().year else year
+
+    def _draw_heatmap(self, painter, left, y, content_w):
         """Draw a calendar heatmap of daily practice time; return the y below it."""
-        cell = 15
         gap = 3
-        step = cell + gap
         gutter = 30
-        columns = max(8, min(52, (content_w - gutter + gap) // step))
         rows = 7
+        today = date.today()
+        year = self.heatmap_year
+
+        if year is None:
+            cell = 15
+            step = cell + gap
+            columns = max(8, min(52, (content_w - gutter + gap) // step))
+            this_monday = today - timedelta(days=today.weekday())
+            first_monday = this_monday - timedelta(weeks=columns - 1)
+            first_day, last_day = first_monday, today
+            max_day = self.stats.peak_between(first_day, last_day)
+            title = f"Daily activity — last {columns} weeks"
+        else:
+            first_day = date(year, 1, 1)
+            last_day = min(today, date(year, 12, 31))
+            first_monday = first_day - timedelta(days=first_day.weekday())
+            columns = (date(year, 12, 31) - first_monday).days // 7 + 1
+            # Shrink the cells so a whole year fits the content width
+            step = min(15 + gap, (content_w - gutter + gap) // columns)
+            cell = step - gap
+            max_day = self.stats.yearly_peak.get(year, 0)
+            title = f"Daily activity — {year}"
 
         title_font = self._font(10)
         painter.setFont(title_font)
         painter.setPen(self.INK_SECONDARY)
-        painter.drawText(left, y + QFontMetrics(title_font).ascent(),
-                         f"Daily activity — last {columns} weeks")
+        painter.drawText(left, y + QFontMetrics(title_font).ascent(), title)
+        shown_year = year or today.year
+        oldest = min(self.stats.years() or [today.year])
+        self._draw_toggles(painter, left + content_w, y, (
+            ("‹", False, (lambda: self._step_heatmap_year(shown_year - 1)) if shown_year > oldest else None),
+            ("Recent" if year is None else str(year), True, None),
+            ("›", False, (lambda: self._step_heatmap_year(shown_year + 1)) if year is not None else None),
+        ))
         y += QFontMetrics(title_font).height() + 4
 
         month_row_h = 14
         grid_x = left + gutter
         grid_y = y + month_row_h
 
-        today = date.today()
-        this_monday = today - timedelta(days=today.weekday())
-        first_monday = this_monday - timedelta(weeks=columns - 1)
-
         window_days = [
             (first_monday + timedelta(weeks=c, days=r), c, r)
             for c in range(columns) for r in range(rows)
-            if first_monday + timedelta(weeks=c, days=r) <= today
+            if first_day <= first_monday + timedelta(weeks=c, days=r) <= last_day
         ]
-        max_day = max((daily.get(d.isoformat(), 0) for d, _, _ in window_days), default=0)
 
         label_font = self._font(8)
 
@@ -875,12 +1437,13 @@ class HomeScreenWidget(QWidget):
         previous_month = None
         last_label_x = -1000
         for c in range(columns):
-            month = (first_monday + timedelta(weeks=c)).month
+            column_day = max(first_day, first_monday + timedelta(weeks=c))
+            month = column_day.month
             if month != previous_month:
                 label_x = grid_x + c * step
                 if label_x - last_label_x >= 28:
                     painter.drawText(label_x, y + QFontMetrics(label_font).ascent(),
-                                     (first_monday + timedelta(weeks=c)).strftime("%b"))
+                                     column_day.strftime("%b"))
                     last_label_x = label_x
                 previous_month = month
 
@@ -892,7 +1455,7 @@ class HomeScreenWidget(QWidget):
         # Cells
         painter.setPen(Qt.PenStyle.NoPen)
         for day, c, r in window_days:
-            seconds = daily.get(day.isoformat(), 0)
+            seconds = self.stats.day_seconds(day)
             if seconds <= 0:
                 color = self.CELL_EMPTY
             else:
@@ -900,11 +1463,8 @@ class HomeScreenWidget(QWidget):
                 level = min(3, int(4 * seconds / max_day) if max_day else 0)
                 color = self.CELL_RAMP[level]
             painter.setBrush(color)
-            rect = QRect(grid_x + c * step, grid_y + r * step, cell, cell)
-            painter.drawRoundedRect(rect, 3, 3)
-            tip = f"{day.strftime('%a')} {day.day} {day.strftime('%b %Y')}\n" + (
-                format_duration(seconds) if seconds else "No practice")
-            self._hover_zones.append((rect.adjusted(-1, -1, 1, 1), tip))
+            painter.drawRoundedRect(QRect(grid_x + c * step, grid_y + r * step, cell, cell), 3, 3)
+        self._heatmap_hover = (grid_x, grid_y, step, cell, columns, first_monday, first_day, last_day)
 
         grid_bottom = grid_y + rows * step - gap
 
@@ -928,49 +1488,286 @@ class HomeScreenWidget(QWidget):
         return legend_y + cell
 
 
+class TimingOverlay(QLabel):
+    """Debug overlay on the image area showing where the last image change spent its time."""
+
+    STAGES = ('read', 'decode', 'transform', 'scale', 'paint')
+    HISTORY = 120  # image changes kept for the rolling percentiles
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.totals = deque(maxlen=self.HISTORY)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #9fe870; padding: 6px; border-radius: 4px;")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.move(10, 10)
+        self.hide()
+
+    @staticmethod
+    def percentile(values, fraction):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def report(self, timings, cache_hit, cache):
+        """Show one image change; timings maps stage name -> seconds."""
+        total = sum(timings.values())
+        self.totals.append(total)
+        lines = [f"{stage:<9} {timings[stage] * 1000:7.1f} ms" if stage in timings
+                 else f"{stage:<9}       -"
+                 for stage in self.STAGES]
+        lines.append(f"{'total':<9} {total * 1000:7.1f} ms")
+        lines.append(f"p50/p95   {self.percentile(self.totals, 0.5) * 1000:.1f} / "
+                     f"{self.percentile(self.totals, 0.95) * 1000:.1f} ms")
+        lines.append(f"cache     {'hit' if cache_hit else 'miss'} "
+                     f"({cache.hits}/{cache.hits + cache.misses})")
+        lines.append(f"decoded   {len(cache)} img, {cache.total_bytes / 1048576:.1f} MB")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.raise_()
+
+
+def _session_attribute(name):
+    """Expose a SessionEngine attribute on the window under the name the UI code uses."""
+    return property(lambda self: getattr(self.session, name),
+                    lambda self, value: setattr(self.session, name, value))
+
+
+def recorded(method):
+    """Log calls of a window method as session input while Debug > Record Sessions is on.
+
+    The event is named after the method, so a replay can call it again by
+    name. Calls made from inside another recorded handler (a tick that ends
+    the session, say) are part of that input and aren't logged separately.
+    start_session opens a recording and a handler that ends the session
+    closes it.
+    """
+    @functools.wraps(method)
+    def wrapper(self):
+        recorder = self.recorder
+        if not recorder.enabled or recorder.depth:
+            return method(self)
+        image = self.current_image_index
+        recorder.depth += 1
+        started = time.monotonic()
+        try:
+            return method(self)
+        finally:
+            seconds = time.monotonic() - started
+            recorder.depth -= 1
+            if recorder.active:
+                recorder.record(method.__name__, started, seconds, image=image)
+            elif method.__name__ == 'start_session' and self.is_session_active:
+                recorder.begin(self.recording_start(), started, seconds)
+            if recorder.active and not self.is_session_active:
+                recorder.end()
+    return wrapper
+
+
 class GestureMate(QMainWindow):
     """Main application window."""
     
+    # Decoded images kept while paused or in the background (see update_idle_state())
+    IDLE_CACHE_BYTES = 32 * 1024 * 1024
+    # Long edge of the stand-in shown while a large image decodes (see show_current_image())
+    PREVIEW_EDGE = 320
+    # Web source images downloaded ahead of the one on screen
+    WEB_LOOKAHEAD = 8
+    # Rapid-fire frames prepared ahead of the one on screen, and the long edge they're decoded at
+    RAPID_FIRE_DEPTH = 8
+    RAPID_FIRE_EDGE = 1280
+    
+    # (display number, full image?) from the loader thread
+    image_ready = pyqtSignal(int, bool)
+    # A rapid-fire frame was prepared, or found unreadable (see prepare_frames())
+    frame_ready = pyqtSignal(int, str)
+    # A batch of image headers was read into the library index (see probe_sizes())
+    sizes_probed = pyqtSignal()
+    
+    # Session state lives in the GUI-free SessionEngine
+    images = _session_attribute('images')
+    images_per_folder = _session_attribute('images_per_folder')
+    folder_images = _session_attribute('folder_images')
+    shuffle_seed = _session_attribute('shuffle_seed')
+    shuffle_enabled = _session_attribute('shuffle_enabled')
+    current_image_index = _session_attribute('current_image_index')
+    session_time_remaining = _session_attribute('session_time_remaining')
+    image_time_remaining = _session_attribute('image_time_remaining')
+    image_duration = _session_attribute('image_duration')
+    session_duration = _session_attribute('session_duration')
+    image_duration_half = _session_attribute('image_duration_half')
+    halfway_sound_played = _session_attribute('halfway_passed')
+    session_images_viewed = _session_attribute('images_viewed')
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("GestureMate - Gesture Drawing Practice")
-        self.images = []
-        self.images_per_folder = {}  # Track image counts per folder
-        self.current_image_index = 0
+        self.session = SessionEngine()
+        self.playset_lock = threading.Lock()
+        self.revalidated_playset = None  # fresher image set found in the background
+        self.folder_scans = FolderScans()  # what load_images() scanned, per folder
+        self.filtered_images = {}  # folder -> its scanned images that pass the size filter
+        self.filtered_by = None  # the size filter's conditions filtered_images was made with
+        self.hash_request = None  # image set waiting for duplicate hashing
+        self.hashing = False
+        self.probe_request = None  # images waiting for their headers to be read
+        self.probing = False
+        self.matches_probed = None  # what probe_matches() last sent to probe_sizes()
+        self.display_request = None  # image waiting to be decoded for display
+        self.display_number = 0  # bumped on every image change, so stale loads are dropped
+        self.shown_number = 0  # display_number of the image last shown in full
+        self.prefetch_request = None  # images waiting to be decoded ahead of time
+        self.frame_request = None  # rapid-fire frames waiting to be prepared
+        self.frame_generation = 0  # bumped when prepared frames go stale (resize, stop)
+        self.frames = {}  # image path -> QImage scaled to the image area, ready to show
+        self.awaiting_frame = False  # a pose is up but the next frame isn't ready yet
+        self.loading = False
+        self.loader_decoders = None  # the loader thread's own backends
+        self.idle = True  # see update_idle_state()
         self.is_session_active = False
-        self.session_time_remaining = 0
-        self.image_time_remaining = 0
-        self.shuffle_enabled = True
         self.current_pixmap = None
+        self.image_cache = ImageCache()
+        self.thumbnails = ImageCache(16 * 1024 * 1024)  # PREVIEW_EDGE stand-ins
+        self.failed_images = set()  # this session's images that couldn't be decoded
+        self.display_cache = None  # opened by finish_startup()
+        self.decode_pool = None  # started by finish_startup() when decode_processes is on
+        self.web_pool = ConnectionPool()  # shared by every WebSource
+        self.opened_web_sources = {}  # manifest URL -> WebSource
+        self.fetch_request = None  # web source images waiting to be downloaded
+        self.fetching = False
+        self.library_index = None  # opened by the first filtered session
+        self.indexed_roots = set()
+        self.last_query = ""
+        # Qt until finish_startup() loads the per-format choice of decoder
+        self.decoders = DecoderRegistry([QtDecoder()])
         self.flip_horizontal = False
         self.flip_vertical = False
         self.greyscale = False
         self.rotation_angle = 0  # 0, 90, 180, or 270 degrees
-        self.halfway_sound_played = False
-        self.image_duration_half = 0  # Cache for halfway point
         
-        # Default settings
-        self.image_duration = 60  # 60 seconds default
-        self.session_duration = 1800  # 30 minutes default
+        # Default settings (durations default in SessionEngine)
         self.halfway_sound_enabled = True
         
         # Load saved settings
+        self.config_writer = ConfigWriter()
         self.config_file = self.get_config_file_path()
+        self.stats_file = self.config_file.with_name(STATS_FILE_NAME)
+        self.playset_file = self.config_file.with_name(PLAYSET_FILE_NAME)
         config = self.load_config()
         self.saved_folders = config.get('folders', {})
         self.image_duration = config.get('image_duration', 60)
         self.session_duration = config.get('session_duration', 1800)
         self.halfway_sound_enabled = config.get('halfway_sound', True)
+        self.orientation_filter = config.get('orientation', 'any')
+        self.min_size_filter = config.get('min_size', 0)
+        self.hide_duplicates = config.get('hide_duplicates', False)
+        self.decode_processes = config.get('decode_processes', False)
+        self.rapid_fire = config.get('rapid_fire', False)
+        self.pacer = PosePacer(config.get('rapid_fire_ms', 3000))
+        self.web_sources = config.get('web_sources', {})  # manifest URL -> enabled
         self.presets = config.get('presets', {})
-        self.stats = config.get('stats', {})
-        self.session_images_viewed = 0
+        self.stats = None  # loaded by finish_startup() after the first frame
 
-        # Setup sound effect
-        self.setup_sound()
+        # Per-image practice history
+        self.practice_log = PracticeLog(self.config_file.with_name(PRACTICE_LOG_FILE_NAME))
+        self.practice_session_id = 0
+        self.image_shown_at = 0.0
+        self.image_paused_at = None
+        self.image_transforms_used = 0
+
+        # Debug > Memory Diagnostics
+        self.memory_monitor = MemoryMonitor(self.config_file.with_name(MEMORY_REPORT_FILE_NAME))
+        self.memory_monitor.set_enabled(bool(os.environ.get('GESTUREMATE_MEMORY_DIAGNOSTICS')))
+        # Debug > Record Sessions
+        self.recorder = SessionRecorder(self.config_file.with_name(RECORDINGS_DIR_NAME))
+
+        STARTUP_TIMER.mark("load settings")
+
+        # Sound setup and statistics are deferred until the window has painted
+        self.startup_finished = False
+        self.beep_sound_path = None
+        self.legacy_config_stats = config.get('stats')
 
         self.setup_ui()
         self.setup_timers()
+        self.image_ready.connect(self.show_loaded_image)
+        self.frame_ready.connect(self.show_prepared_frame)
         self.show_home_screen()
+        self.home_widget.installEventFilter(self)
+        STARTUP_TIMER.mark("build window")
+
+    def eventFilter(self, obj, event):
+        """Start deferred initialisation once the home screen has painted."""
+        if obj is self.home_widget and event.type() == QEvent.Type.Paint:
+            self.home_widget.removeEventFilter(self)
+            STARTUP_TIMER.mark("first paint")
+            QTimer.singleShot(0, self.finish_startup)
+        return super().eventFilter(obj, event)
+
+    def finish_startup(self):
+        """Run the initialisation that isn't needed for the first frame.
+
+        Safe to call more than once; anything that depends on this work calls
+        it first in case the window hasn't painted yet.
+        """
+        if self.startup_finished:
+            return
+        self.startup_finished = True
+        # Switching to another application; see update_idle_state()
+        QApplication.instance().applicationStateChanged.connect(
+            lambda state: self.update_idle_state())
+        self.stats = self.load_stats(self.legacy_config_stats)
+        self.legacy_config_stats = None
+        if not self.is_session_active:
+            self.home_widget.set_stats(self.stats)
+        STARTUP_TIMER.mark("load statistics")
+        if not self.images:
+            self.restore_playset()
+            STARTUP_TIMER.mark("restore image set")
+        try:
+            self.display_cache = DisplayCache(self.get_cache_dir())
+        except (OSError, sqlite3.Error) as e:
+            print(f"Display cache unavailable: {e}")
+        self.setup_decoders()
+        self.set_decode_processes(self.decode_processes)
+        STARTUP_TIMER.mark("decoder setup")
+        self.setup_sound()
+        STARTUP_TIMER.mark("sound setup")
+        STARTUP_TIMER.report()
+        
+    def setup_decoders(self):
+        """Pick the fastest installed decoder for each image format.
+
+        The choice is saved; when the installed backends change (or on first
+        run) they're benchmarked again on a background thread, with Qt doing
+        all the decoding until that finishes.
+        """
+        decoders = DecoderRegistry()
+        decoders_file = self.config_file.with_name(DECODERS_FILE_NAME)
+        if decoders.load(read_json_file(decoders_file)) or len(decoders.backends) == 1:
+            self.decoders = decoders
+            return
+        
+        def benchmark():
+            decoders.benchmark()
+            self.config_writer.write(decoders_file, decoders.to_dict())
+            self.decoders = decoders
+            pool = self.decode_pool
+            if pool is not None:
+                pool.selection = dict(decoders.selection)
+        
+        threading.Thread(target=benchmark, name="DecoderBenchmark", daemon=True).start()
+        
+    def set_decode_processes(self, enabled):
+        """Start or stop the worker processes images are decoded in (see DecodePool)."""
+        self.decode_processes = enabled
+        if enabled and self.decode_pool is None:
+            self.decode_pool = DecodePool()
+            self.decode_pool.selection = dict(self.decoders.selection)
+        elif not enabled and self.decode_pool is not None:
+            # Decodes still running in it come back null and are retried in-process
+            pool, self.decode_pool = self.decode_pool, None
+            pool.close()
         
     def setup_ui(self):
         """Setup the main window UI."""
@@ -992,6 +1789,7 @@ class GestureMate(QMainWindow):
         self.image_label.setMinimumSize(800, 600)
         self.image_label.setScaledContents(False)
         main_layout.addWidget(self.image_label, stretch=1)
+        self.timing_overlay = TimingOverlay(self.image_label)
 
         # Home screen with usage statistics (shown when no session is running)
         self.home_widget = HomeScreenWidget()
@@ -1037,6 +1835,11 @@ class GestureMate(QMainWindow):
         start_action.triggered.connect(self.start_session)
         session_menu.addAction(start_action)
         
+        filtered_action = QAction("Start &Filtered Session...", self)
+        filtered_action.setShortcut("Ctrl+F")
+        filtered_action.triggered.connect(self.start_filtered_session)
+        session_menu.addAction(filtered_action)
+        
         pause_action = QAction("&Pause/Resume", self)
         pause_action.setShortcut("P")
         pause_action.triggered.connect(self.pause_session)
@@ -1094,6 +1897,45 @@ class GestureMate(QMainWindow):
         reset_transform_action.triggered.connect(self.reset_transformations)
         transform_menu.addAction(reset_transform_action)
         
+        # Debug menu
+        debug_menu = menubar.addMenu("&Debug")
+        
+        self.timing_overlay_action = QAction("Show &Timing Overlay", self)
+        self.timing_overlay_action.setShortcut("D")
+        self.timing_overlay_action.setCheckable(True)
+        self.timing_overlay_action.toggled.connect(self.toggle_timing_overlay)
+        debug_menu.addAction(self.timing_overlay_action)
+        
+        debug_menu.addSeparator()
+        
+        self.trace_action = QAction("&Record Trace", self)
+        self.trace_action.setCheckable(True)
+        self.trace_action.setChecked(TRACER.enabled)
+        self.trace_action.toggled.connect(self.toggle_tracing)
+        debug_menu.addAction(self.trace_action)
+        
+        export_trace_action = QAction("&Export Trace...", self)
+        export_trace_action.triggered.connect(self.export_trace)
+        debug_menu.addAction(export_trace_action)
+        
+        debug_menu.addSeparator()
+        
+        self.memory_action = QAction("&Memory Diagnostics", self)
+        self.memory_action.setCheckable(True)
+        self.memory_action.setChecked(self.memory_monitor.enabled)
+        self.memory_action.toggled.connect(self.toggle_memory_diagnostics)
+        debug_menu.addAction(self.memory_action)
+        
+        self.record_sessions_action = QAction("Record &Sessions", self)
+        self.record_sessions_action.setCheckable(True)
+        self.record_sessions_action.setChecked(self.recorder.enabled)
+        self.record_sessions_action.toggled.connect(self.toggle_session_recording)
+        debug_menu.addAction(self.record_sessions_action)
+        
+        show_recordings_action = QAction("Show Recor&dings Folder", self)
+        show_recordings_action.triggered.connect(self.show_recordings)
+        debug_menu.addAction(show_recordings_action)
+        
         # Help menu
         help_menu = menubar.addMenu("&Help")
         
@@ -1214,6 +2056,15 @@ class GestureMate(QMainWindow):
         
         self.image_timer = QTimer()
         self.image_timer.timeout.connect(self.update_image_timer)
+        
+        # Rapid-fire poses end on a single-shot timer set to the millisecond
+        self.pose_timer = QTimer()
+        self.pose_timer.setSingleShot(True)
+        self.pose_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.pose_timer.timeout.connect(self.end_pose)
+        
+        self.memory_timer = QTimer()
+        self.memory_timer.timeout.connect(self.sample_memory)
     
     def setup_sound(self):
         """Setup the sound effect for halfway notification."""
@@ -1256,8 +2107,11 @@ class GestureMate(QMainWindow):
     
     def play_beep_sound(self):
         """Play the beep sound using available system tools."""
+        if self.beep_sound_path is None:
+            self.setup_sound()
         try:
             import shutil
+            import subprocess
             # Try different methods to play the sound
             if sys.platform == 'linux':
                 # Try common Linux audio players
@@ -1340,13 +2194,20 @@ class GestureMate(QMainWindow):
             self.image_duration,
             self.session_duration // 60,  # Convert back to minutes
             self.halfway_sound_enabled,
-            self.presets
+            self.presets,
+            self.orientation_filter,
+            self.min_size_filter,
+            self.hide_duplicates,
+            self.decode_processes,
+            self.web_sources,
+            self.rapid_fire,
+            self.pacer.pose_ms
         )
         accepted = dialog.exec() == QDialog.DialogCode.Accepted
         self.presets = dialog.presets
         if accepted:
             settings = dialog.get_settings()
-            if not settings['folders']:
+            if not settings['folders'] and not any(settings['web_sources'].values()):
                 QMessageBox.warning(
                     self, "No Folders Selected",
                     "Please select at least one folder containing images."
@@ -1360,9 +2221,17 @@ class GestureMate(QMainWindow):
             self.image_duration = settings['image_duration']
             self.session_duration = settings['session_duration']
             self.halfway_sound_enabled = settings['halfway_sound']
+            self.orientation_filter = settings['orientation']
+            self.min_size_filter = settings['min_size']
+            self.hide_duplicates = settings['hide_duplicates']
+            self.set_decode_processes(settings['decode_processes'])
+            self.rapid_fire = settings['rapid_fire']
+            self.pacer.pose_ms = settings['rapid_fire_ms']
+            self.web_sources = settings['web_sources']
             self.save_config()
             
             self.shuffle_enabled = settings['shuffle']
+            web_errors = self.sync_web_sources(self.enabled_web_sources())
             self.load_images(settings['folders'])
             
             if self.images:
@@ -1375,10 +2244,14 @@ class GestureMate(QMainWindow):
                     self, "Settings Applied",
                     f"Loaded {len(self.images)} total images from {len(self.images_per_folder)} folder(s):\n\n"
                     f"{folder_info}\n\n"
-                    f"Image duration: {self.image_duration}s\n"
-                    f"Session duration: {self.session_duration // 60}m\n"
+                    + (f"Rapid-fire poses: {self.pacer.pose_ms} ms\n" if self.rapid_fire
+                       else f"Image duration: {self.image_duration}s\n")
+                    + f"Session duration: {self.session_duration // 60}m\n"
                     f"Shuffle: {'Yes' if self.shuffle_enabled else 'No'}\n"
                     f"Halfway sound: {'Yes' if self.halfway_sound_enabled else 'No'}"
+                    + (f"\nOnly: {self.size_filter_text()}" if self.size_filter_text() else "")
+                    + ("\nNear-duplicates: hidden" if self.hide_duplicates else "")
+                    + "".join(f"\n\n{error}" for error in web_errors)
                 )
             else:
                 QMessageBox.warning(
@@ -1390,38 +2263,411 @@ class GestureMate(QMainWindow):
             # Persist preset changes even if the dialog was cancelled
             self.save_config()
 
+    @traced('load_images', 'scan')
     def load_images(self, folders: List[str]):
-        """Load images from the specified folders."""
-        self.images = []
-        self.images_per_folder = {}
-        
+        """Load images from the specified folders.
+
+        Only folders that weren't loaded before are scanned (and size
+        filtered); the rest keep their images, and any changes to them on
+        disk are picked up by a background revalidation.
+        """
+        self.image_cache.clear()
+        added, removed = self.folder_scans.update(folders)
+        for folder in added + removed:
+            self.filtered_images.pop(folder, None)
+        folder_images = self.folder_scans.folder_images()
+        dir_mtimes = self.folder_scans.dir_mtimes()
+        size_filter = self.size_filter()
+        scanned = folder_images
+        hashing = None
+        unprobed = []
+        if size_filter.conditions or self.hide_duplicates:
+            index = self.get_library_index()
+            if self.filtered_by != size_filter.conditions:
+                self.filtered_images = {}
+                self.filtered_by = size_filter.conditions
+            unfiltered = {folder: images for folder, images in folder_images.items()
+                          if folder not in self.filtered_images}
+            # Only sizes already in the index are used here; the headers of new
+            # and changed images are read in the background (see probe_sizes())
+            filtered = index.filter_images(unfiltered, size_filter, probe=False)
+            if size_filter.conditions:
+                unprobed = index.unprobed([path for images in unfiltered.values() for path in images])
+            waiting = set(unprobed)
+            for folder, images in unfiltered.items():
+                if waiting.isdisjoint(images):
+                    self.filtered_images[folder] = filtered.get(folder, [])
+            folder_images = {folder: self.filtered_images.get(folder, filtered.get(folder))
+                             for folder in folder_images}
+            folder_images = {folder: images for folder, images in folder_images.items() if images}
+            if self.hide_duplicates:
+                hashing = folder_images
+                folder_images = index.representatives(folder_images)
+        # Web sources aren't part of the snapshot; their saved manifests are quick to read
+        self.session.set_folder_images({**folder_images, **self.web_images()})
+        self.config_writer.write(self.playset_file, encode_playset(
+            folders, folder_images, dir_mtimes, self.shuffle_seed))
+        if unprobed:
+            # Duplicate hashing waits for the size filter's final word
+            self.probe_sizes(unprobed, functools.partial(
+                self._refilter_playset, sorted(folders), scanned, dir_mtimes, size_filter,
+                self.hide_duplicates, self.folder_images))
+        elif hashing is not None:
+            self.hash_duplicates(folders, hashing, dir_mtimes)
+        if len(added) < len(self.folder_scans.images):
+            threading.Thread(target=self._revalidate_playset, args=(sorted(folders), dir_mtimes),
+                             name="PlaysetRevalidate", daemon=True).start()
+
+    def hash_duplicates(self, folders, folder_images, dir_mtimes):
+        """Hash any images in folder_images not hashed yet, on a background thread.
+
+        Until they are, unhashed images count as unique. When new hashes turn
+        up more duplicates, the trimmed image set is handed over like a
+        revalidated playset and picked up by the next start_session().
+        """
+        with self.playset_lock:
+            self.hash_request = (folders, folder_images, dir_mtimes, self.folder_images)
+            if self.hashing:
+                return  # the running thread takes the newest request next
+            self.hashing = True
+        threading.Thread(target=self._hash_duplicates, name="DuplicateHashing", daemon=True).start()
+
+    @traced('_hash_duplicates', 'scan')
+    def _hash_duplicates(self):
+        try:
+            # SQLite connections stay on their own thread
+            with LibraryIndex(self.config_file.with_name(LIBRARY_INDEX_FILE_NAME)) as index:
+                while True:
+                    with self.playset_lock:
+                        request, self.hash_request = self.hash_request, None
+                        if request is None:
+                            self.hashing = False
+                            return
+                    folders, folder_images, dir_mtimes, shown = request
+                    paths = [path for images in folder_images.values() for path in images]
+                    if not index.hash_images(paths):
+                        continue
+                    trimmed = index.representatives(folder_images)
+                    with self.playset_lock:
+                        # Unless the image set was replaced (a filtered session, say) meanwhile
+                        if self.folder_images is shown:
+                            self.revalidated_playset = (sorted(folders), None, trimmed, dir_mtimes)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Duplicate detection failed: {e}")
+            with self.playset_lock:
+                self.hashing = False
+
+    def probe_sizes(self, paths, finish=None):
+        """Read the headers of any of paths not probed yet, on a background thread.
+
+        Until they are, images of unknown size pass size filters.
+        sizes_probed is emitted as batches of headers are stored, and once
+        more when the thread is done. finish(index), if given, is called on
+        the thread after the probe, to build the image set again from the
+        sizes now known.
+        """
+        with self.playset_lock:
+            self.probe_request = (paths, finish)
+            if self.probing:
+                return  # the running thread takes the newest request next
+            self.probing = True
+        threading.Thread(target=self._probe_sizes, name="SizeProbe", daemon=True).start()
+
+    @traced('_probe_sizes', 'scan')
+    def _probe_sizes(self):
+        try:
+            # SQLite connections stay on their own thread
+            with LibraryIndex(self.config_file.with_name(LIBRARY_INDEX_FILE_NAME)) as index:
+                while True:
+                    with self.playset_lock:
+                        request, self.probe_request = self.probe_request, None
+                        if request is None:
+                            self.probing = False
+                            break
+                    paths, finish = request
+                    index.probe(paths, progress=lambda done, total: self.sizes_probed.emit())
+                    if finish is not None:
+                        finish(index)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Size probing failed: {e}")
+            with self.playset_lock:
+                self.probing = False
+        self.sizes_probed.emit()
+
+    def _refilter_playset(self, folders, scanned, dir_mtimes, size_filter, hide_duplicates, shown, index):
+        """Filter a loaded image set again once probe_sizes() has read its sizes.
+
+        Runs on the probe thread; the result is handed over like a
+        revalidated playset and picked up by the next start_session().
+        """
+        folder_images = index.filter_images(scanned, size_filter)
+        hashing = folder_images
+        if hide_duplicates:
+            folder_images = index.representatives(folder_images)
+        with self.playset_lock:
+            # Unless the image set was replaced (a filtered session, say) meanwhile
+            if self.folder_images is not shown:
+                return
+            self.revalidated_playset = (folders, None, folder_images, dir_mtimes)
+        if hide_duplicates:
+            self.hash_duplicates(folders, hashing, dir_mtimes)
+
+    def probe_matches(self, matches, query_text):
+        """Start reading the sizes a filter needs for matches; return how many are still unknown.
+
+        matches is a search_library() result, in which images of unknown
+        size pass the filter's size terms; 0 once the probe thread is done.
+        """
+        if not ImageQuery.parse(query_text).conditions:
+            return 0
+        unprobed = self.get_library_index().unprobed(
+            [path for paths in matches.values() for path in paths])
+        # The same ones again after a probe are files that have gone since indexing
+        if unprobed and not self.probing and unprobed != self.matches_probed:
+            self.matches_probed = unprobed
+            self.probe_sizes(unprobed)
+        with self.playset_lock:
+            return len(unprobed) if self.probing else 0
+
+    @traced('load_query', 'scan')
+    def load_query(self, roots: List[str], query_text: str):
+        """Load the images under roots matching a filter expression, via the library index."""
+        self.image_cache.clear()
+        with self.playset_lock:
+            # A refreshed folder scan mustn't replace the filtered set
+            self.revalidated_playset = None
+        self.folder_images = self.search_library(roots, query_text)
+        self.session.apply_play_order()
+        self.last_query = query_text
+    
+    def size_filter(self):
+        """Return the settings' orientation and minimum size as an ImageQuery."""
+        terms = []
+        if self.orientation_filter != 'any':
+            terms.append(f"is:{self.orientation_filter}")
+        if self.min_size_filter:
+            terms.append(f"min:{self.min_size_filter}")
+        return ImageQuery.parse(' '.join(terms))
+    
+    def size_filter_text(self):
+        """Describe the size filter for messages, or return '' if there is none."""
+        parts = []
+        if self.orientation_filter != 'any':
+            parts.append(self.orientation_filter)
+        if self.min_size_filter:
+            parts.append(f"at least {self.min_size_filter} px")
+        return ", ".join(parts)
+    
+    def get_library_index(self):
+        """Open the library index on first use."""
+        if self.library_index is None:
+            self.library_index = LibraryIndex(self.config_file.with_name(LIBRARY_INDEX_FILE_NAME))
+        return self.library_index
+    
+    def search_library(self, roots, query_text, refresh=False):
+        """Return {root: image paths} matching query_text, indexing roots not seen yet.
+
+        Only sizes already probed are used; see probe_matches().
+        """
+        self.get_library_index()
+        if refresh:
+            self.indexed_roots.clear()
+        for root in roots:
+            if root not in self.indexed_roots:
+                # Cheap when nothing changed: one stat() per folder
+                self.library_index.update(root)
+                self.indexed_roots.add(root)
+        return self.library_index.search(roots, query_text, probe=False)
+    
+    def library_roots(self):
+        """Return {top-level saved folder: whether any of it is enabled}."""
+        folders = sorted(self.saved_folders)
+        roots = {}
         for folder in folders:
-            folder_path = Path(folder)
-            if folder_path.exists():
-                folder_images = []
-                for file_path in folder_path.rglob('*'):
-                    if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-                        folder_images.append(str(file_path))
-                
-                # Track count per folder
-                if folder_images:
-                    self.images_per_folder[folder] = len(folder_images)
-                    self.images.extend(folder_images)
-        
-        # Shuffle images if enabled
-        if self.shuffle_enabled:
-            random.shuffle(self.images)
-        else:
-            self.images.sort()
-        
-        self.current_image_index = 0
-        
+            if not any(folder.startswith(os.path.join(root, '')) for root in roots):
+                roots[folder] = False
+        for folder in self.enabled_folders():
+            for root in roots:
+                if folder == root or folder.startswith(os.path.join(root, '')):
+                    roots[root] = True
+        return roots
+    
+    def start_filtered_session(self):
+        """Ask for a filter expression and start a session on the matching images."""
+        self.finish_startup()
+        roots = self.library_roots()
+        if not roots:
+            QMessageBox.information(
+                self, "No Folders",
+                "Add your reference folders in Settings first; the filter searches within them."
+            )
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self.search_library([root for root, enabled in roots.items() if enabled], "", refresh=True)
+        finally:
+            QApplication.restoreOverrideCursor()
+        dialog = FilterSessionDialog(self, roots, self.search_library, self.probe_matches, self.last_query)
+        self.sizes_probed.connect(dialog.preview_timer.start)
+        try:
+            if dialog.exec() != QDialog.DialogCode.Accepted:
+                return
+        finally:
+            self.sizes_probed.disconnect(dialog.preview_timer.start)
+        if self.is_session_active:
+            self.stop_session()
+        self.load_query(dialog.roots(), dialog.query_text())
+        if not self.images:
+            QMessageBox.warning(self, "No Images Found", "No images match that filter.")
+            return
+        self.start_session()
+    
+    def enabled_folders(self):
+        """Return the saved folders a session draws from."""
+        return enabled_folders(self.saved_folders)
+
+    def enabled_web_sources(self):
+        return [url for url, enabled in self.web_sources.items() if enabled]
+
+    def web_source(self, url):
+        source = self.opened_web_sources.get(url)
+        if source is None:
+            source = self.opened_web_sources[url] = WebSource(
+                url, self.get_cache_dir() / WEB_CACHE_DIR_NAME, self.web_pool)
+        return source
+
+    def web_images(self):
+        """Return {manifest URL: local image paths} for the enabled web sources, without going online."""
+        return {url: self.web_source(url).images() for url in self.enabled_web_sources()}
+
+    def web_source_for(self, path):
+        for source in self.opened_web_sources.values():
+            if source.owns(path):
+                return source
+        return None
+
+    def sync_web_sources(self, urls):
+        """Download the manifests of web sources; return a message for each that failed."""
+        errors = []
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            for url in urls:
+                source = self.web_source(url)
+                try:
+                    source.sync()
+                except (OSError, ValueError) as e:
+                    errors.append(f"Couldn't load {url}: {e}")
+                    continue
+                if source.offline:
+                    errors.append(f"{url} is offline; using the images downloaded before.")
+        finally:
+            QApplication.restoreOverrideCursor()
+        return errors
+
+    def ensure_downloaded(self, path):
+        """Download a web source image now if it isn't cached; other paths are left alone."""
+        if not os.path.exists(path):
+            source = self.web_source_for(path)
+            if source is not None:
+                source.fetch([path])
+
+    def fetch_ahead(self, paths):
+        """Download the web source images among paths on a background thread."""
+        requests = {}
+        for path in paths:
+            source = self.web_source_for(path)
+            if source is not None:
+                requests.setdefault(source, []).append(path)
+        if not requests:
+            return
+        with self.playset_lock:
+            self.fetch_request = requests
+            if self.fetching:
+                return  # the running thread takes the newest request next
+            self.fetching = True
+        threading.Thread(target=self._fetch_ahead, name="WebFetch", daemon=True).start()
+
+    @traced('_fetch_ahead', 'io')
+    def _fetch_ahead(self):
+        while True:
+            with self.playset_lock:
+                requests, self.fetch_request = self.fetch_request, None
+                if requests is None:
+                    self.fetching = False
+                    return
+            for source, paths in requests.items():
+                source.fetch(paths)
+
+    @traced('restore_playset', 'scan')
+    def restore_playset(self):
+        """Resume the image set snapshotted by the last load_images(), if still valid.
+
+        Only the enabled folders themselves are checked here; the rest of the
+        tree is revalidated on a background thread, and a fresher image set is
+        picked up by the next start_session().
+        """
+        folders = sorted(self.enabled_folders())
+        snapshot = read_playset(self.playset_file, folders)
+        if snapshot is None:
+            return False
+        self.folder_images = {**snapshot['folder_images'], **self.web_images()}
+        self.session.apply_play_order()
+        if not self.size_filter().conditions and not self.hide_duplicates:
+            # Unfiltered, the snapshot is the scan itself; settings changes can build on it
+            self.folder_scans.replace(folders, snapshot['folder_images'], snapshot['dir_mtimes'])
+        if self.hide_duplicates:
+            # Finish hashing if the app closed before the last run got through
+            self.hash_duplicates(folders, snapshot['folder_images'], snapshot['dir_mtimes'])
+        threading.Thread(target=self._revalidate_playset, args=(folders, snapshot['dir_mtimes']),
+                         name="PlaysetRevalidate", daemon=True).start()
+        return True
+
+    @traced('_revalidate_playset', 'scan')
+    def _revalidate_playset(self, folders, dir_mtimes):
+        """Background check that the restored image set still matches the disk."""
+        if tree_mtimes(folders) == dir_mtimes:
+            return
+        scanned, current = scan_folders(folders)
+        folder_images = scanned
+        size_filter = self.size_filter()
+        if size_filter.conditions or self.hide_duplicates:
+            # SQLite connections stay on their own thread
+            with LibraryIndex(self.config_file.with_name(LIBRARY_INDEX_FILE_NAME)) as index:
+                folder_images = index.filter_images(folder_images, size_filter)
+                if self.hide_duplicates:
+                    folder_images = index.representatives(folder_images)
+        with self.playset_lock:
+            self.revalidated_playset = (folders, scanned, folder_images, current)
+
+    def apply_revalidated_playset(self):
+        """Swap in an image set refreshed by the background revalidation."""
+        with self.playset_lock:
+            refreshed, self.revalidated_playset = self.revalidated_playset, None
+        if refreshed is None:
+            return
+        folders, scanned, folder_images, dir_mtimes = refreshed
+        if folders != sorted(self.enabled_folders()):
+            return
+        if scanned is not None:  # None when only duplicate hashing trimmed the set
+            self.folder_scans.replace(folders, scanned, dir_mtimes)
+            self.filtered_images = {}
+        # Web sources aren't part of the snapshot, as in load_images()
+        self.folder_images = {**folder_images, **self.web_images()}
+        self.session.apply_play_order()
+        self.config_writer.write(self.playset_file, encode_playset(
+            folders, folder_images, dir_mtimes, self.shuffle_seed))
+
+    @recorded
+    @traced('start_session', 'session')
     def start_session(self):
         """Start a drawing session."""
+        self.finish_startup()
+        if not self.is_session_active:
+            self.apply_revalidated_playset()
         if not self.images:
             # Try to load images from saved folders if available
-            enabled_folders = [folder for folder, enabled in self.saved_folders.items() if enabled]
-            if enabled_folders:
+            enabled_folders = self.enabled_folders()
+            if enabled_folders or self.enabled_web_sources():
                 self.load_images(enabled_folders)
             
             if not self.images:
@@ -1435,12 +2681,11 @@ class GestureMate(QMainWindow):
                 return
         
         self.is_session_active = True
-        self.session_time_remaining = self.session_duration
-        self.image_time_remaining = self.image_duration
-        self.image_duration_half = self.image_duration // 2  # Integer division for exact comparison
-        self.current_image_index = 0
-        self.halfway_sound_played = False
-        self.session_images_viewed = 1
+        self.session.start()
+        self.practice_session_id = int(time.time() * 1000)
+        self.image_shown_at = time.monotonic()
+        self.image_paused_at = None
+        self.image_transforms_used = 0
 
         # Reset transformations
         self.flip_horizontal = False
@@ -1467,33 +2712,68 @@ class GestureMate(QMainWindow):
         
         # Start timers
         self.session_timer.start(1000)  # 1 second interval
-        self.image_timer.start(1000)
+        if not self.rapid_fire:
+            self.image_timer.start(1000)
+        if self.memory_monitor.enabled:
+            self.memory_monitor.start_session()
+            self.memory_timer.start(MemoryMonitor.SAMPLE_INTERVAL_MS)
 
         # Display first image
         self.home_widget.hide()
         self.image_label.show()
-        self.display_current_image()
+        if self.rapid_fire:
+            self.pacer.start()
+            self.show_rapid_frame()
+        else:
+            self.display_current_image()
+            self.prefetch_upcoming()
+        self.update_idle_state()
         
+    @recorded
     def pause_session(self):
         """Pause or resume the session."""
         if self.session_timer.isActive():
             self.session_timer.stop()
             self.image_timer.stop()
+            self.pose_timer.stop()
             self.pause_btn.setText("Resume")
+            self.image_paused_at = time.monotonic()
+            self.pacer.pause(self.image_paused_at)
         else:
             self.session_timer.start(1000)
-            self.image_timer.start(1000)
+            if self.rapid_fire:
+                self.pacer.resume(time.monotonic())
+                if not self.awaiting_frame:
+                    self.pose_timer.start(self.pacer.remaining_ms(time.monotonic()))
+            else:
+                self.image_timer.start(1000)
             self.pause_btn.setText("Pause")
+            if self.image_paused_at is not None:
+                # Time spent paused doesn't count as time on screen
+                self.image_shown_at += time.monotonic() - self.image_paused_at
+                self.image_paused_at = None
+        self.update_idle_state()
             
+    @recorded
+    @traced('stop_session', 'session')
     def stop_session(self):
         """Stop the current session."""
         was_active = self.is_session_active
         self.session_timer.stop()
         self.image_timer.stop()
+        self.pose_timer.stop()
         self.is_session_active = False
+        self.display_number += 1  # drop any image still loading
+        with self.playset_lock:
+            self.frame_generation += 1
+            self.frames.clear()
+        self.awaiting_frame = False
 
         if was_active:
+            self.log_image_view('stopped')
             self.record_session_stats()
+            if self.rapid_fire:
+                self.report_late_poses()
         
         # Reset UI
         self.start_btn.setEnabled(True)
@@ -1512,59 +2792,85 @@ class GestureMate(QMainWindow):
         self.session_timer_label.setText("Session: --:--")
         self.progress_bar.setValue(0)
         self.current_pixmap = None
+        self.image_cache.clear()
+        self.thumbnails.clear()
+        self.failed_images.clear()
         self.show_home_screen()
         
+        self.memory_timer.stop()
+        if was_active and self.memory_monitor.enabled:
+            self.report_memory()
+        self.update_idle_state()
+        
+    @recorded
     def next_image(self):
         """Skip to the next image."""
+        self.advance_image('skipped')
+
+    def advance_image(self, outcome=None):
+        """Move on to the next image, logging how the current one ended (if given)."""
         if not self.is_session_active:
             return
         
-        self.current_image_index = (self.current_image_index + 1) % len(self.images)
-        self.image_time_remaining = self.image_duration
-        self.halfway_sound_played = False
-        self.session_images_viewed += 1
-        self.display_current_image()
+        if outcome:
+            self.log_image_view(outcome)
+        self.session.advance()
+        if self.rapid_fire:
+            self.pacer.skip()
+            self.show_rapid_frame()
+        else:
+            self.show_current_image()
     
+    @recorded
     def previous_image(self):
         """Go back to the previous image."""
         if not self.is_session_active:
             return
         
-        self.current_image_index = (self.current_image_index - 1) % len(self.images)
-        self.image_time_remaining = self.image_duration
-        self.halfway_sound_played = False
-        self.display_current_image()
+        self.log_image_view('back')
+        self.session.back()
+        if self.rapid_fire:
+            self.pacer.skip()
+            self.show_rapid_frame()
+        else:
+            self.show_current_image()
     
+    @recorded
     def toggle_flip_horizontal(self):
         """Toggle horizontal flip."""
         self.flip_horizontal = not self.flip_horizontal
         if self.is_session_active and self.images:
             self.display_current_image()
     
+    @recorded
     def toggle_flip_vertical(self):
         """Toggle vertical flip."""
         self.flip_vertical = not self.flip_vertical
         if self.is_session_active and self.images:
             self.display_current_image()
     
+    @recorded
     def toggle_greyscale(self):
         """Toggle greyscale filter."""
         self.greyscale = not self.greyscale
         if self.is_session_active and self.images:
             self.display_current_image()
     
+    @recorded
     def rotate_clockwise(self):
         """Rotate image 90 degrees clockwise."""
         if self.is_session_active and self.images:
             self.rotation_angle = (self.rotation_angle - 90) % 360
             self.display_current_image()
     
+    @recorded
     def rotate_counter_clockwise(self):
         """Rotate image 90 degrees counter-clockwise."""
         if self.is_session_active and self.images:
             self.rotation_angle = (self.rotation_angle + 90) % 360
             self.display_current_image()
     
+    @recorded
     def reset_transformations(self):
         """Reset all image transformations."""
         if self.is_session_active and self.images:
@@ -1577,100 +2883,698 @@ class GestureMate(QMainWindow):
             self.greyscale_btn.setChecked(False)
             self.display_current_image()
         
+    @recorded
+    @traced('session timer tick', 'timer')
     def update_session_timer(self):
         """Update the session timer."""
-        self.session_time_remaining -= 1
+        finished = self.session.tick_session()
         
         minutes = self.session_time_remaining // 60
         seconds = self.session_time_remaining % 60
         self.session_timer_label.setText(f"Session: {minutes:02d}:{seconds:02d}")
         
         # Update progress bar
-        elapsed = self.session_duration - self.session_time_remaining
-        progress = int((elapsed / self.session_duration) * 100)
-        self.progress_bar.setValue(progress)
+        self.progress_bar.setValue(self.session.progress())
         
-        if self.session_time_remaining <= 0:
+        if finished:
             self.stop_session()
             QMessageBox.information(
                 self, "Session Complete",
                 "Your drawing session has ended!"
+                + (f"\n\n{self.pacer.report()}" if self.rapid_fire else "")
             )
             
+    @recorded
+    @traced('image timer tick', 'timer')
     def update_image_timer(self):
         """Update the image timer."""
-        self.image_time_remaining -= 1
+        halfway, finished = self.session.tick_image()
         
         minutes = self.image_time_remaining // 60
         seconds = self.image_time_remaining % 60
         self.image_timer_label.setText(f"Image: {minutes:02d}:{seconds:02d}")
         
         # Play sound at halfway point
-        if (self.halfway_sound_enabled and 
-            not self.halfway_sound_played and 
-            self.image_time_remaining <= self.image_duration_half):
-            self.halfway_sound_played = True
+        if halfway and self.halfway_sound_enabled:
             try:
                 self.play_beep_sound()
             except Exception as e:
                 print(f"Error playing sound: {e}")
         
-        if self.image_time_remaining <= 0:
-            self.next_image()
+        if finished:
+            self.advance_image('completed')
+    
+    @recorded
+    @traced('pose timer', 'timer')
+    def end_pose(self):
+        """Move on to the next rapid-fire pose once the current one is up."""
+        if not self.is_session_active:
+            return
+        self.log_image_view('completed')
+        self.session.advance()
+        self.show_rapid_frame()
+    
+    def show_rapid_frame(self):
+        """Start a rapid-fire pose with the current image's prepared frame.
+
+        If the frame isn't ready the image on screen stays up and the pose
+        starts when it arrives (see show_prepared_frame()); the pacer counts
+        it as late then. Images found unreadable are skipped.
+        """
+        self.display_number += 1
+        self.pose_timer.stop()
+        for _ in range(len(self.images)):
+            path = self.images[self.current_image_index]
+            with self.playset_lock:
+                frame = self.frames.get(path)
+            if frame is not None or path not in self.failed_images:
+                break
+            self.restart_view_clock()
+            self.session.advance()
+        else:
+            self.stop_session()
+            QMessageBox.warning(
+                self, "No Readable Images",
+                "None of the remaining images could be opened, so the session has stopped."
+            )
+            return
+        if frame is None:
+            self.awaiting_frame = True
+            self.prepare_frames()
+            return
+        self.awaiting_frame = False
+        self.show_frame(frame)
+        now = time.monotonic()
+        self.pacer.shown(path, now)
+        if self.session_timer.isActive():
+            self.pose_timer.start(self.pacer.remaining_ms(now))
+        else:
+            self.pacer.pause(now)
+        self.image_timer_label.setText(f"Pose: {self.pacer.pose_ms / 1000:.1f}s")
+        self.prepare_frames()
+    
+    def show_frame(self, frame):
+        """Show a prepared frame, with the transform settings applied."""
+        if self.transform_flags():
+            # Rotating can change how the frame fits, so it's scaled again
+            frame = self.transformed(frame).scaled(
+                self.image_label.size(),
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        self.image_transforms_used |= self.transform_flags()
+        self.put_on_screen(QPixmap.fromImage(frame))
+    
+    def show_prepared_frame(self, generation, path):
+        """Start the pose that was waiting on this frame, if any."""
+        if (generation == self.frame_generation and self.awaiting_frame and self.is_session_active
+                and path == self.images[self.current_image_index]):
+            self.show_rapid_frame()
+    
+    def prepare_frames(self):
+        """Prepare frames for the current image and the next RAPID_FIRE_DEPTH on the loader thread.
+
+        Frames are decoded at no more than RAPID_FIRE_EDGE, from the display
+        cache when it has a copy, and scaled to the image area, so starting a
+        pose only has to put one on screen. Frames behind the previous image
+        are dropped.
+        """
+        if not self.images:
+            return
+        wanted = [self.images[self.current_image_index]] + self.session.upcoming(self.RAPID_FIRE_DEPTH)
+        keep = set(wanted)
+        keep.add(self.images[self.current_image_index - 1])  # in case of Previous
+        with self.playset_lock:
+            for path in [path for path in self.frames if path not in keep]:
+                del self.frames[path]
+            missing = [path for path in wanted if path not in self.frames and path not in self.failed_images]
+        if not missing:
+            return
+        min_edge = min(self.display_edge(), self.RAPID_FIRE_EDGE)
+        jobs = []
+        for path in missing:
+            # The display cache's SQLite connection stays on this thread
+            source = self.display_cache.lookup(path, min_edge) if self.display_cache is not None else None
+            jobs.append((path, str(source or path), min_edge))
+        if self.opened_web_sources:
+            self.fetch_ahead(missing)
+        with self.playset_lock:
+            self.frame_request = (self.frame_generation, jobs, self.image_label.size())
+        self.start_loader()
             
     def display_current_image(self):
-        """Display the current image, scaled to fit the screen."""
+        """Display the current image, scaled to fit the screen.
+
+        Runs as separate read, decode, transform, scale and paint stages so the
+        timing overlay and tracer can attribute a slow image change; they're
+        only timed while one of those is on.
+        """
         if not self.images:
             return
+        if self.isMinimized():
+            # Shown once the window is restored; see update_idle_state()
+            return
+        if self.rapid_fire and self.is_session_active:
+            with self.playset_lock:
+                frame = self.frames.get(self.images[self.current_image_index])
+            if frame is not None:
+                self.show_frame(frame)
+                return
         
-        image_path = self.images[self.current_image_index]
-        pixmap = QPixmap(image_path)
+        timed = TRACER.enabled or self.timing_overlay.isVisible()
+        if timed:
+            timings = {}
+            started = stage_start = time.perf_counter()
         
-        if pixmap.isNull():
-            # If image can't be loaded, skip to next
-            self.next_image()
+        image_path = self.images[self.current_image_index]
+        label_size = self.image_label.size()
+        min_edge = self.display_edge()
+        image = self.image_cache.get(image_path)
+        if not self.fits_display(image, min_edge):
+            image = None
+        cache_hit = image is not None
+        if image is None and image_path in self.failed_images:
+            self.skip_unreadable_image()
             return
+        if image is None:
+            self.ensure_downloaded(image_path)
+            source = image_path
+            if self.display_cache is not None:
+                # A pre-rendered display-size copy decodes much faster than a large original
+                source = self.display_cache.lookup(image_path, min_edge) or image_path
+            try:
+                data = Path(source).read_bytes()
+            except OSError:
+                data = b''
+            if timed:
+                now = time.perf_counter()
+                timings['read'] = now - stage_start
+                stage_start = now
+            decoders = self.decoders if self.decode_pool is None else self.decode_pool
+            image = decoders.decode(data, min_edge)
+            if image.isNull() and source != image_path:
+                # Unreadable cached copy; fall back to the original
+                try:
+                    image = decoders.decode(Path(image_path).read_bytes(), min_edge)
+                except OSError:
+                    pass
+            if image.isNull():
+                # If image can't be loaded, skip to next without logging a view
+                self.failed_images.add(image_path)
+                self.skip_unreadable_image()
+                return
+            self.image_cache.put(image_path, image)
+            if timed:
+                now = time.perf_counter()
+                timings['decode'] = now - stage_start
+                stage_start = now
         
         # Apply transformations
         if self.greyscale or self.flip_horizontal or self.flip_vertical or self.rotation_angle != 0:
-            image = pixmap.toImage()
-            
-            # Apply greyscale
-            if self.greyscale:
-                image = image.convertToFormat(QImage.Format.Format_Grayscale8)
-            
-            # Apply rotation first
-            if self.rotation_angle != 0:
-                transform = QTransform()
-                transform.rotate(self.rotation_angle)
-                image = image.transformed(transform, Qt.TransformationMode.SmoothTransformation)
-            
-            # Apply flips
-            if self.flip_horizontal:
-                image = image.mirrored(True, False)
-            if self.flip_vertical:
-                image = image.mirrored(False, True)
-            
-            pixmap = QPixmap.fromImage(image)
+            image = self.transformed(image)
+            if timed:
+                now = time.perf_counter()
+                timings['transform'] = now - stage_start
+                stage_start = now
         
-        # Store the current pixmap for transformations
-        self.current_pixmap = pixmap
+        self.image_transforms_used |= self.transform_flags()
         
         # Scale image to fit the label while maintaining aspect ratio
-        label_size = self.image_label.size()
-        scaled_pixmap = pixmap.scaled(
+        scaled_pixmap = QPixmap.fromImage(image.scaled(
             label_size,
             Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation
+        ))
+        if timed:
+            now = time.perf_counter()
+            timings['scale'] = now - stage_start
+            stage_start = now
+        
+        self.put_on_screen(scaled_pixmap)
+        
+        if timed:
+            # Paint now rather than on the next event loop pass so it can be measured
+            self.image_label.repaint()
+            timings['paint'] = time.perf_counter() - stage_start
+            if TRACER.enabled:
+                TRACER.add_stages('display_current_image', 'image', started, timings,
+                                  {'path': image_path, 'cache_hit': cache_hit})
+            if self.timing_overlay.isVisible():
+                self.timing_overlay.report(timings, cache_hit, self.image_cache)
+        
+    def put_on_screen(self, pixmap):
+        """Show pixmap as the current image, starting its view the first time."""
+        # Keep the pixmap on screen for reference
+        self.current_pixmap = pixmap
+        self.image_label.setPixmap(pixmap)
+        self.shown_number = self.display_number
+        if self.session.displayed():
+            # The view starts once the image is on screen, not when it was asked for
+            self.restart_view_clock()
+            self.image_transforms_used = self.transform_flags()
+
+    def restart_view_clock(self):
+        """Time the current image's view from now (see log_image_view())."""
+        self.image_shown_at = time.monotonic()
+        if self.image_paused_at is not None:
+            self.image_paused_at = self.image_shown_at
+
+    def skip_unreadable_image(self):
+        """Move past an image that couldn't be decoded, without logging a view of it.
+
+        The time spent trying it is left out of the next image's view.
+        """
+        self.restart_view_clock()
+        self.advance_image()
+    
+    def transformed(self, image):
+        """Apply the greyscale, rotation and flip settings to image."""
+        if self.greyscale:
+            image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+        
+        # Apply rotation first
+        if self.rotation_angle != 0:
+            transform = QTransform()
+            transform.rotate(self.rotation_angle)
+            image = image.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+        
+        # Apply flips
+        if self.flip_horizontal:
+            image = image.mirrored(True, False)
+        if self.flip_vertical:
+            image = image.mirrored(False, True)
+        return image
+    
+    def display_edge(self):
+        """Long edge, in device pixels, an image needs to fill the image area."""
+        label_size = self.image_label.size()
+        return math.ceil(max(label_size.width(), label_size.height()) * self.image_label.devicePixelRatioF())
+    
+    @staticmethod
+    def fits_display(image, min_edge):
+        """Whether a cached image can be shown at min_edge without decoding it again."""
+        # Images decoded at reduced size for a smaller window can't
+        return image is not None and not (image.text(REDUCED_TEXT_KEY)
+                                          and max(image.width(), image.height()) < min_edge)
+    
+    @property
+    def display_pending(self):
+        """Whether the loader thread is still decoding the image the session is on."""
+        return self.is_session_active and self.shown_number != self.display_number
+    
+    def show_current_image(self):
+        """Show the image the session moved to, decoding it in the background if it isn't cached.
+
+        Until the decode finishes, a PREVIEW_EDGE stand-in is shown: a
+        thumbnail kept from an earlier visit, or a quick reduced decode of
+        the file. Each call replaces the pending request, so holding an arrow
+        key decodes only the image it stops on; loads for images skipped in
+        the meantime are dropped between the read, preview and full decode.
+        """
+        self.display_number += 1
+        path = self.images[self.current_image_index]
+        min_edge = self.display_edge()
+        if self.isMinimized() or self.fits_display(self.image_cache.peek(path), min_edge):
+            with self.playset_lock:
+                self.display_request = None
+            self.display_current_image()
+            self.prefetch_upcoming()
+            return
+        thumbnail = self.thumbnails.peek(path)
+        if thumbnail is not None:
+            self.show_preview(thumbnail)
+        # The display cache's SQLite connection stays on this thread
+        source = self.display_cache.lookup(path, min_edge) if self.display_cache is not None else None
+        with self.playset_lock:
+            self.display_request = (self.display_number, path, str(source or path), min_edge, thumbnail is None)
+        self.start_loader()
+    
+    def show_preview(self, image):
+        """Show a stand-in for the current image, scaled up to the image area."""
+        self.current_pixmap = QPixmap.fromImage(self.transformed(image).scaled(
+            self.image_label.size(),
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        ))
+        self.image_label.setPixmap(self.current_pixmap)
+    
+    def show_loaded_image(self, number, full):
+        """Show what the loader thread decoded, unless the session has moved on since."""
+        if number != self.display_number or not self.is_session_active:
+            return
+        if full:
+            self.display_current_image()
+            self.prefetch_upcoming()
+            return
+        thumbnail = self.thumbnails.peek(self.images[self.current_image_index])
+        if thumbnail is not None:
+            self.show_preview(thumbnail)
+    
+    def prefetch_upcoming(self):
+        """Prefetch the next image, or the next one per worker when decoding in processes.
+
+        Web source images further ahead are downloaded too, so a session
+        keeps going through a short network outage.
+        """
+        if self.rapid_fire and self.is_session_active:
+            self.prepare_frames()
+            return
+        if self.opened_web_sources:
+            self.fetch_ahead(self.images[self.current_image_index:self.current_image_index + 1]
+                             + self.session.upcoming(self.WEB_LOOKAHEAD))
+        self.prefetch(self.session.upcoming(1 if self.decode_pool is None else self.decode_pool.workers))
+    
+    def prefetch(self, paths):
+        """Decode images into the image cache on a background thread, ahead of showing them."""
+        min_edge = self.display_edge()
+        jobs = []
+        for path in paths:
+            if self.fits_display(self.image_cache.peek(path), min_edge):
+                continue
+            # The display cache's SQLite connection stays on this thread
+            source = self.display_cache.lookup(path, min_edge) if self.display_cache is not None else None
+            jobs.append((path, str(source or path), min_edge))
+        if not jobs:
+            return
+        with self.playset_lock:
+            self.prefetch_request = jobs
+        self.start_loader()
+    
+    def start_loader(self):
+        with self.playset_lock:
+            if self.loading:
+                return  # the running thread takes the newest requests next
+            self.loading = True
+        threading.Thread(target=self._load_images, name="Loader", daemon=True).start()
+    
+    def _load_images(self):
+        if self.loader_decoders is None:
+            # Decoder backends aren't shared with the GUI thread
+            self.loader_decoders = DecoderRegistry()
+        self.loader_decoders.selection = dict(self.decoders.selection)
+        while True:
+            with self.playset_lock:
+                # The image waiting to be shown goes ahead of any prefetching
+                display, self.display_request = self.display_request, None
+                frames = jobs = None
+                if display is None:
+                    frames, self.frame_request = self.frame_request, None
+                    if frames is None:
+                        jobs, self.prefetch_request = self.prefetch_request, None
+                        if jobs is None:
+                            self.loading = False
+                            return
+            if display is not None:
+                self._load_for_display(*display)
+            elif frames is not None:
+                self._prepare_frames(*frames)
+            else:
+                self._prefetch(jobs)
+    
+    @traced('_load_for_display', 'image')
+    def _load_for_display(self, number, path, source, min_edge, want_preview):
+        if path in self.failed_images or self.fits_display(self.image_cache.peek(path), min_edge):
+            # Prefetched (or found unreadable) while the request waited
+            self.image_ready.emit(number, True)
+            return
+        self.ensure_downloaded(source)
+        try:
+            data = Path(source).read_bytes()
+        except OSError:
+            data = b''
+        if number != self.display_number:
+            return  # skipped past while reading
+        if (want_preview and source == path and min_edge > 2 * self.PREVIEW_EDGE
+                and sniff_format(data) == 'jpeg'):
+            # JPEGs decode at a fraction of the size for a fraction of the time;
+            # a pre-rendered display cache copy is quick enough as it is
+            preview = self.loader_decode(data, self.PREVIEW_EDGE)
+            if not preview.isNull():
+                self.thumbnails.put(path, preview)
+                self.image_ready.emit(number, False)
+            if number != self.display_number:
+                return
+        image = self.loader_decode(data, min_edge)
+        if image.isNull() and source != path:
+            # Unreadable cached copy; fall back to the original
+            image = self._decode_file(path, min_edge)
+        if image.isNull():
+            # Skipped by display_current_image() rather than decoded again
+            self.failed_images.add(path)
+        else:
+            self.image_cache.put(path, image)
+            # Small images are their own thumbnail (scaled() would share their pixels)
+            if max(image.width(), image.height()) > self.PREVIEW_EDGE:
+                image = image.scaled(
+                    QSize(self.PREVIEW_EDGE, self.PREVIEW_EDGE),
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation
+                )
+            self.thumbnails.put(path, image)
+        self.image_ready.emit(number, True)
+    
+    @traced('_prefetch', 'image')
+    def _prefetch(self, jobs):
+        pool = self.decode_pool
+        
+        def decode(job):
+            path, source, min_edge = job
+            if self.display_request is not None:
+                return None  # prefetching is asked for again once that image is shown
+            for candidate in dict.fromkeys((source, path)):
+                image = self._decode_file(candidate, min_edge, pool)
+                if not image.isNull():
+                    return image
+            self.failed_images.add(path)
+            return None
+        
+        if pool is None or len(jobs) == 1:
+            images = map(decode, jobs)
+        else:
+            # Keep every decode worker busy
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=pool.workers, thread_name_prefix="Prefetch")
+            images = list(executor.map(decode, jobs))
+            executor.shutdown()
+        for (path, _, _), image in zip(jobs, images):
+            if image is not None:
+                self.image_cache.put(path, image)
+    
+    @traced('_prepare_frames', 'image')
+    def _prepare_frames(self, generation, jobs, size):
+        for path, source, min_edge in jobs:
+            with self.playset_lock:
+                if generation != self.frame_generation or self.frame_request is not None:
+                    return  # stale, or a newer request lists what's still missing
+                if path in self.frames:
+                    continue
+            image = self.image_cache.peek(path)
+            if not self.fits_display(image, min_edge):
+                for candidate in dict.fromkeys((source, path)):
+                    image = self._decode_file(candidate, min_edge)
+                    if not image.isNull():
+                        break
+            if image.isNull():
+                self.failed_images.add(path)
+                self.frame_ready.emit(generation, path)
+                continue
+            frame = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+            # In the format QPixmap keeps, so showing it doesn't convert the pixels again
+            frame = frame.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied if frame.hasAlphaChannel()
+                                          else QImage.Format.Format_RGB32)
+            with self.playset_lock:
+                if generation != self.frame_generation:
+                    return
+                self.frames[path] = frame
+            self.frame_ready.emit(generation, path)
+    
+    def loader_decode(self, data, max_edge):
+        """Decode on the loader thread, in the decode worker processes when they're on."""
+        pool = self.decode_pool
+        if pool is not None:
+            return pool.decode(data, max_edge)
+        return self.loader_decoders.decode(data, max_edge)
+    
+    def _decode_file(self, path, min_edge, pool=None):
+        self.ensure_downloaded(path)
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            return QImage()
+        return self.loader_decode(data, min_edge) if pool is None else pool.decode(data, min_edge)
+    
+    def update_idle_state(self):
+        """Release memory and stop periodic work while nobody is drawing.
+
+        The app is idle on the home screen, while paused, and while another
+        application is in front or it's minimised; its own dialogs don't
+        count. Then the image cache is trimmed to IDLE_CACHE_BYTES, keeping
+        the image on screen (emptied, along with the image on screen, when
+        minimised), the home screen's rendering and Qt's pixmap cache are
+        freed and memory sampling stops. Coming back shows the image again
+        if it was dropped and decodes the next one in the background.
+        """
+        minimized = self.isMinimized()
+        away = minimized or QApplication.applicationState() != Qt.ApplicationState.ApplicationActive
+        idle = away or not self.is_session_active or not self.session_timer.isActive()
+        if idle:
+            if minimized:
+                self.image_cache.clear()
+                self.thumbnails.clear()
+                self.current_pixmap = None
+                self.image_label.clear()
+            else:
+                self.image_cache.trim(self.IDLE_CACHE_BYTES, keep=self.session.current_image)
+            if away:
+                self.home_widget.release()
+            QPixmapCache.clear()
+            self.memory_timer.stop()
+        elif self.idle:
+            if self.memory_monitor.enabled:
+                self.memory_timer.start(MemoryMonitor.SAMPLE_INTERVAL_MS)
+            self.prefetch_upcoming()
+        self.idle = idle
+        if self.is_session_active and not minimized and self.current_pixmap is None:
+            self.display_current_image()
+    
+    def changeEvent(self, event):
+        # setup_ui() already shows the window, before there's anything to release
+        if (event.type() in (QEvent.Type.ActivationChange, QEvent.Type.WindowStateChange)
+                and self.startup_finished):
+            self.update_idle_state()
+        super().changeEvent(event)
+    
+    def toggle_tracing(self, checked):
+        """Start a fresh trace recording, or stop recording and keep what was captured."""
+        if checked:
+            TRACER.clear()
+        TRACER.enabled = checked
+        
+    def export_trace(self):
+        """Save the recorded trace as Chrome trace JSON."""
+        if not TRACER.events:
+            QMessageBox.information(
+                self, "Export Trace",
+                "Nothing has been recorded yet. Turn on Debug > Record Trace, "
+                "reproduce the problem, then export again."
+            )
+            return
+        default_name = time.strftime("gesturemate-trace-%Y%m%d-%H%M%S.json")
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Trace", str(Path.home() / default_name), "Chrome trace (*.json)"
+        )
+        if not path:
+            return
+        try:
+            count = TRACER.export(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Trace", f"Could not save the trace:\n{e}")
+            return
+        QMessageBox.information(
+            self, "Export Trace",
+            f"Saved {count} events to {path}.\nOpen it at ui.perfetto.dev or chrome://tracing."
         )
         
-        self.image_label.setPixmap(scaled_pixmap)
+    def toggle_session_recording(self, checked):
+        """Turn session recording on or off; a running session is recorded from its next start."""
+        self.recorder.enabled = checked
+        if not checked:
+            self.recorder.end()
+    
+    def show_recordings(self):
+        """Open the folder the session recordings are kept in."""
+        self.recorder.directory.mkdir(parents=True, exist_ok=True)
+        QDesktopServices.openUrl(QUrl.fromLocalFile(str(self.recorder.directory)))
+    
+    def recording_start(self):
+        """Describe the session just started, for the first line of a recording."""
+        return {
+            'folders': sorted(self.enabled_folders()),
+            'image_duration': self.image_duration,
+            'session_duration': self.session_duration,
+            'shuffle': self.shuffle_enabled,
+            'seed': self.shuffle_seed,
+            'halfway_sound': self.halfway_sound_enabled,
+            'orientation': self.orientation_filter,
+            'min_size': self.min_size_filter,
+            'hide_duplicates': self.hide_duplicates,
+            'rapid_fire': self.rapid_fire,
+            'rapid_fire_ms': self.pacer.pose_ms,
+            'window': [self.width(), self.height()],
+            'maximized': self.isMaximized(),
+            'display_cache': self.display_cache is not None,
+            'decoders': self.decoders.selection,
+            'images': list(self.images),
+        }
+    
+    def toggle_memory_diagnostics(self, checked):
+        """Turn memory diagnostics on or off; a running session is sampled from now on."""
+        self.memory_monitor.set_enabled(checked)
+        if checked and self.is_session_active:
+            self.memory_monitor.start_session()
+            self.memory_timer.start(MemoryMonitor.SAMPLE_INTERVAL_MS)
+        elif not checked:
+            self.memory_timer.stop()
+        
+    def memory_owners(self):
+        """Return the bytes held by the window's images and image lists, by owner."""
+        def pixmap_bytes(pixmap):
+            if pixmap is None or pixmap.isNull():
+                return 0
+            return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        
+        label_pixmap = self.image_label.pixmap()
+        shared = (label_pixmap is not None and self.current_pixmap is not None
+                  and label_pixmap.cacheKey() == self.current_pixmap.cacheKey())
+        return {
+            'current_pixmap': pixmap_bytes(self.current_pixmap),
+            # Counted once when it's the same pixmap as current_pixmap
+            'image_label': 0 if shared else pixmap_bytes(label_pixmap),
+            'image_cache': self.image_cache.total_bytes,
+            'thumbnails': self.thumbnails.total_bytes,
+            'home_screen_cache': pixmap_bytes(self.home_widget._cache),
+            'images': sys.getsizeof(self.images) + sum(sys.getsizeof(path) for path in self.images),
+            # The paths themselves are shared with self.images
+            'folder_images': sys.getsizeof(self.folder_images)
+                             + sum(sys.getsizeof(paths) for paths in self.folder_images.values()),
+        }
+        
+    def sample_memory(self):
+        self.memory_monitor.sample(self.memory_owners())
+        
+    def report_memory(self):
+        """Write the memory report for the session that just stopped."""
+        report = self.memory_monitor.end_session(self.memory_owners())
+        print(f"Memory report for session {report['session']} written to {self.memory_monitor.report_path}")
+        for warning in report['warnings']:
+            print(f"  Warning: {warning}")
+        
+    def toggle_timing_overlay(self, checked):
+        """Show or hide the pipeline timing overlay."""
+        self.timing_overlay.setVisible(checked)
+        if checked and self.is_session_active and self.images:
+            self.display_current_image()
         
     def resizeEvent(self, event):
         """Handle window resize events."""
+        started = time.monotonic()
         super().resizeEvent(event)
         if self.is_session_active and self.images:
-            self.display_current_image()
+            if self.rapid_fire:
+                # Frames prepared for the old size would be shown at the wrong scale
+                with self.playset_lock:
+                    self.frame_generation += 1
+                    self.frames.clear()
+                if not self.awaiting_frame:
+                    self.display_current_image()
+                self.prepare_frames()
+            else:
+                self.display_current_image()
+        if self.recorder.active and not self.recorder.depth:
+            self.recorder.record('resize', started, time.monotonic() - started,
+                                 image=self.current_image_index,
+                                 width=event.size().width(), height=event.size().height())
             
     def show_about(self):
         """Show the about dialog."""
@@ -1694,33 +3598,61 @@ class GestureMate(QMainWindow):
             "<li>R: Rotate Clockwise</li>"
             "<li>Shift+R: Rotate Counter-Clockwise</li>"
             "<li>T: Reset Transformations</li>"
+            "<li>D: Show Timing Overlay</li>"
             "</ul>"
         )
     
+    def transform_flags(self):
+        """Return the active transformations as PracticeLog bit flags."""
+        flags = 0
+        if self.flip_horizontal:
+            flags |= PracticeLog.FLIP_HORIZONTAL
+        if self.flip_vertical:
+            flags |= PracticeLog.FLIP_VERTICAL
+        if self.greyscale:
+            flags |= PracticeLog.GREYSCALE
+        if self.rotation_angle:
+            flags |= PracticeLog.ROTATED
+        return flags
+
+    def log_image_view(self, outcome):
+        """Record the image that is leaving the screen in the practice log."""
+        if not self.images or not self.session.shown:
+            return  # skipped past before it was shown
+        now = time.monotonic()
+        if self.image_paused_at is not None:
+            self.image_shown_at += now - self.image_paused_at
+            self.image_paused_at = now
+        self.practice_log.log(
+            self.images[self.current_image_index], outcome, now - self.image_shown_at,
+            self.image_transforms_used, self.practice_session_id)
+        self.image_shown_at = now
+        self.image_transforms_used = self.transform_flags()
+
     def record_session_stats(self):
         """Record the finished session into the usage statistics."""
+        self.finish_startup()
         elapsed = max(0, self.session_duration - self.session_time_remaining)
         if elapsed <= 0:
             return
 
-        today = date.today().isoformat()
-        daily = self.stats.setdefault('daily_time', {})
-        daily[today] = daily.get(today, 0) + elapsed
-        # Keep the daily history bounded
-        if len(daily) > 400:
-            for key in sorted(daily)[:-400]:
-                del daily[key]
+        self.stats.add_session(elapsed, self.session_images_viewed)
+        self.save_stats()
 
-        self.stats['total_time'] = self.stats.get('total_time', 0) + elapsed
-        self.stats['sessions_completed'] = self.stats.get('sessions_completed', 0) + 1
-        self.stats['images_viewed'] = self.stats.get('images_viewed', 0) + self.session_images_viewed
-        self.save_config()
+    def report_late_poses(self):
+        """Print which rapid-fire poses of the session just stopped appeared late."""
+        if not self.pacer.poses:
+            return
+        print(f"Rapid-fire: {self.pacer.report()}")
+        for pose, path, late_ms in self.pacer.late:
+            print(f"  pose {pose}: {late_ms:.0f} ms late  {path}")
 
     def show_home_screen(self):
         """Show the welcome screen with usage statistics in the image area."""
         self.image_label.clear()
         self.image_label.hide()
-        self.home_widget.set_stats(self.stats)
+        if self.stats is not None:
+            self.home_widget.set_stats(self.stats)
         self.home_widget.show()
 
     def get_config_file_path(self):
@@ -1728,43 +3660,92 @@ class GestureMate(QMainWindow):
         config_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppConfigLocation)
         config_path = Path(config_dir)
         config_path.mkdir(parents=True, exist_ok=True)
-        return config_path / "gesturemate_config.json"
+        return config_path / CONFIG_FILE_NAME
+    
+    def get_cache_dir(self):
+        """Get the folder for the display-size image cache."""
+        return Path(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation))
     
     def load_config(self):
         """Load configuration from file."""
+        return read_json_file(self.config_file)
+
+    def load_stats(self, legacy_stats=None):
+        """Load usage statistics, migrating `legacy_stats` from the old config format if needed."""
+        data = read_json_file(self.stats_file)
+        migrate = not data and bool(legacy_stats)
+        if migrate:
+            # Older versions kept stats inside the main config file
+            data = legacy_stats
         try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-        return {}
+            stats = StatsStore.from_dict(data)
+        except (TypeError, ValueError) as e:
+            print(f"Error loading stats: {e}")
+            return StatsStore()
+        if migrate:
+            self.config_writer.write(self.stats_file, stats.to_dict())
+        return stats
     
+    @traced('save_config', 'io')
     def save_config(self):
-        """Save configuration to file."""
-        try:
-            config = {
-                'folders': self.saved_folders,
-                'image_duration': self.image_duration,
-                'session_duration': self.session_duration,
-                'halfway_sound': self.halfway_sound_enabled,
-                'presets': self.presets,
-                'stats': self.stats
-            }
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+        """Save settings to file (written atomically in the background)."""
+        config = {
+            'folders': dict(self.saved_folders),
+            'image_duration': self.image_duration,
+            'session_duration': self.session_duration,
+            'halfway_sound': self.halfway_sound_enabled,
+            'orientation': self.orientation_filter,
+            'min_size': self.min_size_filter,
+            'hide_duplicates': self.hide_duplicates,
+            'decode_processes': self.decode_processes,
+            'rapid_fire': self.rapid_fire,
+            'rapid_fire_ms': self.pacer.pose_ms,
+            'web_sources': dict(self.web_sources),
+            'presets': copy.deepcopy(self.presets)
+        }
+        self.config_writer.write(self.config_file, config, indent=2)
+
+    @traced('save_stats', 'io')
+    def save_stats(self):
+        """Save usage statistics to their own file (written atomically in the background)."""
+        self.config_writer.write(self.stats_file, self.stats.to_dict())
+
+    def closeEvent(self, event):
+        """Write any pending settings and statistics before exiting."""
+        self.config_writer.close()
+        self.practice_log.close()
+        if self.display_cache is not None:
+            self.display_cache.close()
+            self.display_cache = None
+        if self.library_index is not None:
+            self.library_index.close()
+            self.library_index = None
+        if self.decode_pool is not None:
+            self.decode_pool.close()
+            self.decode_pool = None
+        self.web_pool.close()
+        self.recorder.end()
+        super().closeEvent(event)
 
 
 def main():
     """Main entry point for the application."""
+    if getattr(sys, 'frozen', False):
+        # The cache warmer's worker processes re-enter here in frozen builds
+        import multiprocessing
+        multiprocessing.freeze_support()
+    if '--startup-timing' in sys.argv:
+        sys.argv.remove('--startup-timing')
+        STARTUP_TIMER.enabled = True
+    STARTUP_TIMER.mark("imports")
+
     app = QApplication(sys.argv)
     app.setApplicationName("GestureMate")
 
     icon_path = Path(__file__).parent / 'gesturemate.png'
     if icon_path.exists():
         app.setWindowIcon(QIcon(str(icon_path)))
+    STARTUP_TIMER.mark("QApplication")
 
     window = GestureMate()
     window.show()
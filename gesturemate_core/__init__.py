@@ -0,0 +1,30 @@
+"""
+GestureMate core - everything that doesn't need a display.
+
+Library scanning and indexing, the session engine, usage statistics,
+practice history, settings persistence, image decoding, near-duplicate
+detection and diagnostics. The GestureMate window builds on these, and so
+does the command-line front end (`python -m gesturemate_core`).
+"""
+
+from .decoders import REDUCED_TEXT_KEY, DecoderRegistry, QtDecoder, sniff_format
+from .decodepool import DecodePool
+from .diagnostics import TRACER, MemoryMonitor, SessionRecorder, Tracer, read_recording, traced
+from .displaycache import DisplayCache
+from .index import LibraryIndex
+from .library import (
+    PLAYSET_MAGIC, SUPPORTED_IMAGE_EXTENSIONS, FolderScans, decode_playset, enabled_folders,
+    encode_playset, read_playset, scan_folders, scan_image_folder, tree_mtimes,
+)
+from .persistence import (
+    CONFIG_FILE_NAME, DECODERS_FILE_NAME, LIBRARY_INDEX_FILE_NAME, MEMORY_REPORT_FILE_NAME,
+    PLAYSET_FILE_NAME, PRACTICE_LOG_FILE_NAME, RECORDINGS_DIR_NAME, STATS_FILE_NAME, ConfigWriter,
+    default_cache_dir, default_config_dir,
+    read_json_file, write_bytes_atomic, write_json_atomic,
+)
+from .practice import PracticeLog
+from .query import ImageQuery
+from .remote import WEB_CACHE_DIR_NAME, ConnectionPool, WebSource
+from .session import LATE_TOLERANCE_MS, PosePacer, SessionEngine
+from .similar import DUPLICATE_DISTANCE, HashIndex, cluster, dhash
+from .stats import StatsStore, format_duration
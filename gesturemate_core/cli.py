@@ -0,0 +1,335 @@
+"""Command-line front end: index libraries, print statistics and plan sessions without a display.
+
+    python -m gesturemate_core scan /srv/refs/figures /srv/refs/hands
+    python -m gesturemate_core scan --probe /srv/refs/figures
+    python -m gesturemate_core stats
+    python -m gesturemate_core plan --session-minutes 10 --image-duration 30
+    python -m gesturemate_core plan --filter "hands -nsfw" /srv/refs/figures
+    python -m gesturemate_core duplicates /srv/refs/scraped
+    python -m gesturemate_core warm-cache
+    python -m gesturemate_core decoders
+
+`python gesturemate.py scan|stats|plan|duplicates|warm-cache|decoders ...` runs the same commands.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from .decoders import DecoderRegistry
+from .displaycache import DisplayCache
+from .index import LibraryIndex
+from .library import enabled_folders, scan_folders
+from .persistence import (
+    CONFIG_FILE_NAME, DECODERS_FILE_NAME, LIBRARY_INDEX_FILE_NAME, PRACTICE_LOG_FILE_NAME,
+    STATS_FILE_NAME, default_cache_dir, default_config_dir, read_json_file, write_json_atomic,
+)
+from .practice import PracticeLog
+from .session import SessionEngine
+from .similar import DUPLICATE_DISTANCE, HashIndex
+from .stats import StatsStore, format_duration
+
+COMMANDS = ('scan', 'stats', 'plan', 'duplicates', 'warm-cache', 'decoders')
+
+
+def print_json(data):
+    json.dump(data, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def cmd_scan(args):
+    """Update the library index for each folder."""
+    folders = args.folders or enabled_folders(read_json_file(args.config_dir / CONFIG_FILE_NAME).get('folders', {}))
+    if not folders:
+        print("No folders given and none are enabled in the GestureMate settings.", file=sys.stderr)
+        return 2
+    results = {}
+    with LibraryIndex(args.index) as index:
+        for folder in folders:
+            started = time.perf_counter()
+            result = index.update(folder)
+            if args.probe:
+                result['probed'] = index.probe(index.images(folder))
+            if args.hash:
+                result['hashed'] = index.hash_images(index.images(folder))
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            results[folder] = result
+    if args.json:
+        print_json(results)
+    else:
+        for folder, result in results.items():
+            print(f"{folder}: {result['images']} images in {result['directories']} folders "
+                  f"({result['listed']} listed, {result['removed']} removed"
+                  + (f", {result['probed']} probed" if 'probed' in result else "")
+                  + (f", {result['hashed']} hashed" if 'hashed' in result else "")
+                  + f", {result['seconds']:.2f}s)")
+    return 0
+
+
+def load_stats(config_dir):
+    data = read_json_file(config_dir / STATS_FILE_NAME)
+    if not data:
+        # Older versions kept stats inside the main config file
+        data = read_json_file(config_dir / CONFIG_FILE_NAME).get('stats', {})
+    return StatsStore.from_dict(data)
+
+
+def cmd_stats(args):
+    """Print practice totals, streaks and the most drawn and skipped images."""
+    stats = load_stats(args.config_dir)
+    today = date.today()
+    monday = today - timedelta(days=today.weekday())
+    summary = {
+        'total_time': stats.total_time,
+        'sessions_completed': stats.sessions_completed,
+        'images_viewed': stats.images_viewed,
+        'streak': stats.streak(today),
+        'today': stats.day_seconds(today),
+        'this_week': stats.week_total(monday),
+        'this_month': stats.month_total(today.year, today.month),
+        'this_year': stats.year_total(today.year),
+        'most_drawn': [],
+        'most_skipped': [],
+    }
+    log_path = args.config_dir / PRACTICE_LOG_FILE_NAME
+    if log_path.exists():
+        log = PracticeLog(log_path)
+        try:
+            summary['most_drawn'] = log.most_drawn(args.top)
+            summary['most_skipped'] = log.most_skipped(args.top)
+        finally:
+            log.close()
+
+    if args.json:
+        print_json(summary)
+        return 0
+    print(f"Total practice:     {format_duration(summary['total_time'])}")
+    print(f"Sessions completed: {summary['sessions_completed']}")
+    print(f"Images viewed:      {summary['images_viewed']}")
+    print(f"Current streak:     {summary['streak']} day{'s' if summary['streak'] != 1 else ''}")
+    print(f"Today:              {format_duration(summary['today'])}")
+    print(f"This week:          {format_duration(summary['this_week'])}")
+    print(f"This month:         {format_duration(summary['this_month'])}")
+    print(f"This year:          {format_duration(summary['this_year'])}")
+    for title, rows in (("Most drawn", summary['most_drawn']), ("Most skipped", summary['most_skipped'])):
+        if rows:
+            print(f"\n{title}:")
+            for path, count in rows:
+                print(f"  {count:5d}  {path}")
+    return 0
+
+
+def cmd_plan(args):
+    """List the images a session would show, in order."""
+    config = read_json_file(args.config_dir / CONFIG_FILE_NAME)
+    folders = args.folders or enabled_folders(config.get('folders', {}))
+    if not folders:
+        print("No folders given and none are enabled in the GestureMate settings.", file=sys.stderr)
+        return 2
+    engine = SessionEngine(
+        image_duration=args.image_duration or config.get('image_duration', 60),
+        session_duration=(args.session_minutes * 60 if args.session_minutes
+                          else config.get('session_duration', 1800)),
+        shuffle=not args.no_shuffle,
+    )
+    if args.filter is not None:
+        with LibraryIndex(args.index) as index:
+            if not args.use_index:
+                for folder in folders:
+                    index.update(folder)
+            engine.folder_images = index.search(folders, args.filter)
+    elif args.use_index:
+        with LibraryIndex(args.index) as index:
+            engine.folder_images = index.folder_images(folders)
+    else:
+        engine.folder_images = scan_folders(folders)[0]
+    engine.apply_play_order(args.seed)
+    plan = engine.plan()
+
+    if args.json:
+        print_json({'seed': engine.shuffle_seed, 'image_duration': engine.image_duration,
+                    'session_duration': engine.session_duration,
+                    'images': [{'start': start, 'path': path} for start, path in plan]})
+        return 0
+    print(f"{len(plan)} images from {len(engine.images)} available"
+          + (f" (seed {engine.shuffle_seed})" if engine.shuffle_seed is not None else ""))
+    for start, path in plan:
+        print(f"  {start // 60:3d}:{start % 60:02d}  {path}")
+    return 0
+
+
+def cmd_duplicates(args):
+    """List the groups of near-duplicate images a session with duplicates hidden would trim."""
+    folders = args.folders or enabled_folders(read_json_file(args.config_dir / CONFIG_FILE_NAME).get('folders', {}))
+    if not folders:
+        print("No folders given and none are enabled in the GestureMate settings.", file=sys.stderr)
+        return 2
+    with LibraryIndex(args.index) as index:
+        if not args.use_index:
+            for folder in folders:
+                index.update(folder)
+        paths = [path for images in index.folder_images(folders).values() for path in images]
+        started = time.perf_counter()
+
+        def progress(done, total):
+            if not args.json and total:
+                print(f"\rHashing {done}/{total} images", end='', file=sys.stderr, flush=True)
+
+        hashed = index.hash_images(paths, progress=progress)
+        if hashed and not args.json:
+            print(file=sys.stderr)
+        try:
+            groups = index.duplicate_groups(paths, args.distance)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        seconds = time.perf_counter() - started
+
+    if args.json:
+        print_json({'images': len(paths), 'hashed': hashed, 'groups': groups})
+        return 0
+    for group in groups:
+        print(f"  {group[0]}")
+        for path in group[1:]:
+            print(f"    = {path}")
+    hidden = sum(len(group) - 1 for group in groups)
+    print(f"{len(groups)} groups of near-duplicates among {len(paths)} images; "
+          f"{hidden} would be hidden ({hashed} newly hashed, {seconds:.1f}s)")
+    return 0
+
+
+def cmd_warm_cache(args):
+    """Pre-render display-size copies of every image in the folders."""
+    folders = args.folders or enabled_folders(read_json_file(args.config_dir / CONFIG_FILE_NAME).get('folders', {}))
+    if not folders:
+        print("No folders given and none are enabled in the GestureMate settings.", file=sys.stderr)
+        return 2
+    if args.use_index:
+        with LibraryIndex(args.index) as index:
+            folder_images = index.folder_images(folders)
+    else:
+        folder_images = scan_folders(folders)[0]
+    paths = [path for images in folder_images.values() for path in images]
+
+    last_report = [0.0]
+
+    def progress(done, total, rate):
+        now = time.monotonic()
+        if args.json or not total or (now - last_report[0] < 0.5 and done < total):
+            return
+        last_report[0] = now
+        print(f"\r{done}/{total} images ({done * 100 // total}%, {rate:.1f} images/s)",
+              end='', file=sys.stderr, flush=True)
+
+    with DisplayCache(args.cache_dir) as cache:
+        try:
+            result = cache.warm(paths, args.size, workers=args.workers, progress=progress)
+        except KeyboardInterrupt:
+            print("\nInterrupted; run the command again to continue where it stopped.", file=sys.stderr)
+            return 130
+    if args.json:
+        print_json(result)
+    else:
+        print(f"\n{result['rendered']} rendered, {result['skipped']} already cached, "
+              f"{result['failed']} failed in {result['seconds']:.1f}s", file=sys.stderr)
+    return 1 if result['failed'] else 0
+
+
+def cmd_decoders(args):
+    """Benchmark the installed decoder backends and save the fastest per format for the app."""
+    decoders = DecoderRegistry()
+    results = decoders.benchmark(max_edge=args.size, repeat=args.repeat)
+    if args.save:
+        args.config_dir.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(args.config_dir / DECODERS_FILE_NAME, decoders.to_dict())
+    if args.json:
+        print_json({'results': results, 'selection': decoders.selection})
+        return 0
+    print(f"Installed backends: {', '.join(sorted(decoders.backends))}")
+    for fmt, timings in results.items():
+        print(f"\n{fmt} (decoded for a {args.size}px long edge):")
+        for name, seconds in sorted(timings.items(), key=lambda item: item[1]):
+            chosen = "  <- used" if decoders.selection.get(fmt) == name else ""
+            print(f"  {name:10s} {seconds * 1000:8.1f} ms{chosen}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gesturemate", description=__doc__.splitlines()[0])
+    parser.add_argument("--config-dir", type=Path, default=default_config_dir(),
+                        help="GestureMate settings folder (default %(default)s)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = subparsers.add_parser("scan", help="update the library index")
+    scan.add_argument("folders", nargs="*", help="folders to index (default: the folders enabled in settings)")
+    scan.add_argument("--index", type=Path, help="index database (default: in the settings folder)")
+    scan.add_argument("--probe", action="store_true",
+                      help="also read image sizes for is:/min:/aspect: filters (only new or changed files)")
+    scan.add_argument("--hash", action="store_true",
+                      help="also compute perceptual hashes for near-duplicate detection (only new or changed files)")
+    scan.add_argument("--json", action="store_true", help="print results as JSON")
+    scan.set_defaults(func=cmd_scan)
+
+    stats = subparsers.add_parser("stats", help="print usage statistics")
+    stats.add_argument("--top", type=int, default=10, help="how many most drawn/skipped images to list")
+    stats.add_argument("--json", action="store_true", help="print results as JSON")
+    stats.set_defaults(func=cmd_stats)
+
+    plan = subparsers.add_parser("plan", help="list the images a session would show")
+    plan.add_argument("folders", nargs="*", help="folders to draw from (default: the folders enabled in settings)")
+    plan.add_argument("--image-duration", type=int, help="seconds per image (default: from settings)")
+    plan.add_argument("--session-minutes", type=int, help="session length (default: from settings)")
+    plan.add_argument("--seed", type=int, help="shuffle seed, for a reproducible order")
+    plan.add_argument("--no-shuffle", action="store_true", help="keep images in path order")
+    plan.add_argument("--filter", metavar="EXPRESSION",
+                      help='only images matching a filter such as "hands -nsfw" (uses the library index)')
+    plan.add_argument("--use-index", action="store_true",
+                      help="read images from the library index instead of scanning the folders")
+    plan.add_argument("--index", type=Path, help="index database (default: in the settings folder)")
+    plan.add_argument("--json", action="store_true", help="print the plan as JSON")
+    plan.set_defaults(func=cmd_plan)
+
+    duplicates = subparsers.add_parser("duplicates", help="list groups of near-duplicate images")
+    duplicates.add_argument("folders", nargs="*",
+                            help="folders to check (default: the folders enabled in settings)")
+    duplicates.add_argument("--distance", type=int, default=DUPLICATE_DISTANCE,
+                            help="most differing hash bits that still count as a duplicate "
+                                 f"(0-{HashIndex.MAX_RADIUS}, default %(default)s)")
+    duplicates.add_argument("--use-index", action="store_true",
+                            help="read images from the library index instead of refreshing it first")
+    duplicates.add_argument("--index", type=Path, help="index database (default: in the settings folder)")
+    duplicates.add_argument("--json", action="store_true", help="print the groups as JSON; the image kept comes first")
+    duplicates.set_defaults(func=cmd_duplicates)
+
+    warm = subparsers.add_parser("warm-cache", help="pre-render display-size copies of the images")
+    warm.add_argument("folders", nargs="*", help="folders to warm (default: the folders enabled in settings)")
+    warm.add_argument("--size", type=int, default=DisplayCache.DEFAULT_MAX_EDGE,
+                      help="long edge of the cached copies in pixels (default %(default)s)")
+    warm.add_argument("--workers", type=int, help="worker processes (default: one per CPU core)")
+    warm.add_argument("--cache-dir", type=Path, default=default_cache_dir(),
+                      help="display cache folder (default %(default)s)")
+    warm.add_argument("--use-index", action="store_true",
+                      help="read images from the library index instead of scanning the folders")
+    warm.add_argument("--index", type=Path, help="index database (default: in the settings folder)")
+    warm.add_argument("--json", action="store_true", help="print the result as JSON")
+    warm.set_defaults(func=cmd_warm_cache)
+
+    decoders = subparsers.add_parser("decoders", help="benchmark the image decoders and pick the fastest")
+    decoders.add_argument("--size", type=int, default=1600,
+                          help="long edge to decode at in pixels (default %(default)s)")
+    decoders.add_argument("--repeat", type=int, default=3, help="runs per backend and format (default 3)")
+    decoders.add_argument("--no-save", dest="save", action="store_false",
+                          help="only print the results; don't change what the app uses")
+    decoders.add_argument("--json", action="store_true", help="print the results as JSON")
+    decoders.set_defaults(func=cmd_decoders)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'index', None) is None:
+        args.index = args.config_dir / LIBRARY_INDEX_FILE_NAME
+    return args.func(args)
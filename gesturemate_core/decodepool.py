@@ -0,0 +1,234 @@
+"""Image decoding in separate worker processes, handed back through shared memory.
+
+A damaged or hostile file (a truncated JPEG that sends a decoder into a
+loop, a decompression bomb) can hang or crash whatever process decodes it.
+DecodePool runs DecoderRegistry in worker processes instead: a worker
+that takes longer than the timeout, or dies, is replaced and the job comes
+back as a null QImage, like any other unreadable image. Decodes also run
+on other cores than the GUI's.
+
+Workers write the decoded pixels into a multiprocessing.shared_memory
+block and the QImage returned to the caller points straight into it, so
+nothing is copied on the way back. The block is unlinked as soon as it's
+mapped, and stays mapped until Qt frees the last image sharing its pixels.
+Qt and multiprocessing are imported lazily, as in displaycache, so the app
+doesn't load them unless the pool is switched on.
+"""
+
+import os
+import threading
+
+# Seconds a worker gets per image before it's taken to be stuck
+DEFAULT_TIMEOUT = 5.0
+# Seconds a new worker gets to import Qt and set up its decoders
+STARTUP_TIMEOUT = 30.0
+
+_SHM_DIR = '/dev/shm'
+
+
+def default_workers():
+    """Worker processes to start: the spare cores, at least one and at most four."""
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def _room_for(size):
+    """Whether a shared memory block of size bytes can be filled.
+
+    On Linux the blocks live in a tmpfs (often only 64 MB in containers)
+    and writing past its end is a SIGBUS rather than an error.
+    """
+    try:
+        st = os.statvfs(_SHM_DIR)
+    except OSError:
+        return True  # not Linux; blocks are backed some other way
+    return st.f_bavail * st.f_frsize > 2 * size
+
+
+def decode_worker(conn):
+    """Worker process loop: decode (data, max_edge, selection) jobs until the pipe closes.
+
+    Replies with None for an unreadable image, otherwise with
+    (block name or pixel bytes, width, height, bytes per line, format, reduced).
+    """
+    from multiprocessing import shared_memory
+
+    from .decoders import REDUCED_TEXT_KEY, DecoderRegistry
+
+    decoders = DecoderRegistry()
+    conn.send('ready')
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        data, max_edge, selection = job
+        decoders.selection = selection
+        image = decoders.decode(data, max_edge)
+        if image.isNull():
+            conn.send(None)
+            continue
+        size = image.sizeInBytes()
+        pixels = image.constBits()
+        pixels.setsize(size)
+        if _room_for(size):
+            block = shared_memory.SharedMemory(create=True, size=size)
+            block.buf[:size] = pixels
+            payload = block.name
+        else:
+            payload = pixels.asstring()  # copied through the pipe instead
+        conn.send((payload, image.width(), image.height(), image.bytesPerLine(),
+                   image.format().value, bool(image.text(REDUCED_TEXT_KEY))))
+        if not isinstance(payload, bytes):
+            # The block outlives this mapping until the GUI unlinks it
+            block.close()
+
+
+def _release_block(block):
+    """Cleanup function for a QImage wrapping a shared memory block."""
+    block.close()
+
+
+class _Worker:
+    """One worker process and the pipe to it."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=decode_worker, args=(child_conn,),
+                                       name="DecodeWorker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def stop(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.join(1)
+
+
+class DecodePool:
+    """Decode image bytes in worker processes; a drop-in for DecoderRegistry.decode().
+
+    decode() is thread-safe, and runs as many decodes at once as there are
+    workers. selection is the per-format backend choice passed on to the
+    workers' own DecoderRegistry.
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT):
+        import multiprocessing
+        import queue
+
+        self.workers = workers or default_workers()
+        self.timeout = timeout
+        self.selection = {}
+        self.timeouts = 0
+        self.crashes = 0
+        # spawn, not fork: the GUI process has Qt threads running
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._closed = False
+        self._all = []
+        self._idle = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(self._start())
+
+    def _start(self):
+        worker = _Worker(self._context)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        worker.stop()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            if self._closed:
+                return None
+        return self._start()
+
+    def decode(self, data, max_edge=None):
+        """Decode data in a worker, keeping at least max_edge pixels on the long side.
+
+        Returns a null QImage if the image is unreadable, the worker took
+        longer than the timeout or it crashed; the worker is restarted then.
+        """
+        from PyQt6.QtGui import QImage
+
+        worker = self._idle.get()
+        if worker is not None and not worker.process.is_alive():
+            # Died between jobs (killed, out of memory); the job itself is fine
+            self.crashes += 1
+            worker = self._replace(worker)
+        if worker is None:
+            self._idle.put(None)  # closed; let the other waiting threads through
+            return QImage()
+        try:
+            reply = self._run(worker, (data, max_edge, dict(self.selection)))
+        except TimeoutError:
+            self.timeouts += 1
+            print(f"Decode worker took over {self.timeout:g}s on an image; restarting it")
+            worker = self._replace(worker)
+            return QImage()
+        except (EOFError, OSError):
+            self.crashes += 1
+            if not self._closed:
+                print("Decode worker crashed on an image; restarting it")
+            worker = self._replace(worker)
+            return QImage()
+        finally:
+            self._idle.put(worker)
+        return self._wrap(reply)
+
+    def _run(self, worker, job):
+        if not worker.ready:
+            if not worker.conn.poll(STARTUP_TIMEOUT) or worker.conn.recv() != 'ready':
+                raise EOFError("decode worker didn't start")
+            worker.ready = True
+        worker.conn.send(job)
+        if not worker.conn.poll(self.timeout):
+            raise TimeoutError
+        return worker.conn.recv()
+
+    @staticmethod
+    def _wrap(reply):
+        from multiprocessing import shared_memory
+
+        from PyQt6 import sip
+        from PyQt6.QtGui import QImage
+
+        from .decoders import REDUCED_TEXT_KEY
+
+        if reply is None:
+            return QImage()
+        payload, width, height, bytes_per_line, image_format, reduced = reply
+        if isinstance(payload, bytes):
+            image = QImage(payload, width, height, bytes_per_line, QImage.Format(image_format)).copy()
+        else:
+            block = shared_memory.SharedMemory(payload)
+            block.unlink()  # the memory goes once the mapping below is closed
+            # Qt closes the mapping when the last image sharing these pixels
+            # goes: scaled() to the same size, convertToFormat() to the same
+            # format and QPixmap.fromImage() can all outlive this QImage
+            image = QImage(sip.voidptr(block.buf), width, height, bytes_per_line,
+                           QImage.Format(image_format), _release_block, block)
+        if reduced:
+            image.setText(REDUCED_TEXT_KEY, "1")
+        return image
+
+    def close(self):
+        """Stop the workers; decode() returns null images from then on."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.stop()
+        self._idle.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,301 @@
+"""Image decoder backends, and the registry that picks the fastest one per format.
+
+Qt's own decoder is always there. Pillow (draft mode) and libjpeg-turbo (via
+PyTurboJPEG) are used when they're installed; a short benchmark on synthetic
+images decides which backend handles each format on this machine. Qt is
+imported lazily, as in displaycache, so the command-line tools only load it
+when they actually decode something.
+"""
+
+import io
+import math
+import sys
+import time
+
+from .diagnostics import traced
+
+# QImage text key set on images decoded below their full size
+REDUCED_TEXT_KEY = "GestureMate-Reduced"
+
+BENCHMARK_FORMATS = ('jpeg', 'png', 'webp')
+
+
+def sniff_format(data):
+    """Return the image format of data from its magic bytes, or 'other'."""
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:2] == b'BM':
+        return 'bmp'
+    return 'other'
+
+
+def reduced_size(width, height, max_edge):
+    """Scale (width, height) so the long edge is max_edge; None if it already fits."""
+    if not max_edge or max(width, height) <= max_edge:
+        return None
+    scale = max_edge / max(width, height)
+    return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+
+def finish_image(image, reduced=False):
+    """Bring a decoded QImage to the contract every backend returns.
+
+    The display pipeline gets a QImage that owns its pixels, in RGB32,
+    ARGB32, ARGB32_Premultiplied or Grayscale8 (formats the transforms and
+    smooth scaling take without another conversion), marked with
+    REDUCED_TEXT_KEY when it's smaller than the source. A failed decode is a
+    null QImage, never an exception.
+    """
+    from PyQt6.QtGui import QImage
+
+    if image.isNull():
+        return QImage()
+    if image.format() not in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32,
+                              QImage.Format.Format_ARGB32_Premultiplied,
+                              QImage.Format.Format_Grayscale8):
+        image = image.convertToFormat(QImage.Format.Format_ARGB32 if image.hasAlphaChannel()
+                                      else QImage.Format.Format_RGB32)
+    if reduced:
+        image.setText(REDUCED_TEXT_KEY, "1")
+    return image
+
+
+class QtDecoder:
+    """Qt's image plugins; handles every format and backs up the other decoders."""
+
+    name = 'qt'
+    formats = None  # all of them
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def decode(self, data, max_edge=None):
+        """Decode data, keeping at least max_edge pixels on the long side when given."""
+        from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize
+        from PyQt6.QtGui import QImageReader
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+        size = reader.size()
+        target = reduced_size(size.width(), size.height(), max_edge) if size.isValid() else None
+        if target is not None:
+            # The JPEG plugin turns this into libjpeg's DCT-domain scaling
+            reader.setScaledSize(QSize(*target))
+        return finish_image(reader.read(), reduced=target is not None)
+
+
+class PillowDecoder:
+    """Pillow, using draft mode so JPEGs are decoded straight at a reduced scale."""
+
+    name = 'pillow'
+    formats = frozenset(('jpeg', 'png', 'webp', 'gif', 'bmp'))
+
+    def __init__(self, image_module):
+        self._image = image_module
+
+    @classmethod
+    def create(cls):
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        return cls(Image)
+
+    def decode(self, data, max_edge=None):
+        from PyQt6.QtGui import QImage
+
+        try:
+            image = self._image.open(io.BytesIO(data))
+            full_size = image.size
+            target = reduced_size(*full_size, max_edge)
+            if target is not None and image.format == 'JPEG':
+                image.draft('RGB' if image.mode == 'RGB' else None, target)
+            image.load()
+            if target is not None:
+                # Integer reduction keeps the long edge at or above max_edge
+                factor = min(image.size[0] // target[0], image.size[1] // target[1])
+                if factor > 1:
+                    image = image.reduce(factor)
+
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            if image.mode == 'L':
+                raw, fmt, depth = image.tobytes(), QImage.Format.Format_Grayscale8, 1
+            else:
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if has_alpha else 'RGB')
+                # Qt's 32-bit formats are native-endian 0xAARRGGBB words
+                if image.mode == 'RGBA':
+                    raw = image.tobytes('raw', 'BGRA' if sys.byteorder == 'little' else 'ARGB')
+                    fmt = QImage.Format.Format_ARGB32
+                else:
+                    raw = image.tobytes('raw', 'BGRX' if sys.byteorder == 'little' else 'XRGB')
+                    fmt = QImage.Format.Format_RGB32
+                depth = 4
+        except Exception:
+            # Pillow raises a range of errors on damaged files
+            return QImage()
+        width, height = image.size
+        # copy() so the QImage owns its pixels rather than pointing into raw
+        qimage = QImage(raw, width, height, width * depth, fmt).copy()
+        return finish_image(qimage, reduced=image.size != full_size)
+
+
+class TurboJpegDecoder:
+    """libjpeg-turbo through PyTurboJPEG, using its scaled decode for large JPEGs."""
+
+    name = 'turbojpeg'
+    formats = frozenset(('jpeg',))
+
+    def __init__(self, module):
+        self._module = module
+        self._jpeg = module.TurboJPEG()
+
+    @classmethod
+    def create(cls):
+        try:
+            import turbojpeg
+            return cls(turbojpeg)
+        except (ImportError, OSError, RuntimeError):
+            # Python bindings missing, or present without the libturbojpeg library
+            return None
+
+    def decode(self, data, max_edge=None):
+        from PyQt6.QtGui import QImage
+
+        try:
+            width, height, _, _ = self._jpeg.decode_header(data)
+            scaling = None
+            target = reduced_size(width, height, max_edge)
+            if target is not None:
+                # Smallest supported factor that still covers the target size
+                factors = [(num, denom) for num, denom in self._jpeg.scaling_factors
+                           if math.ceil(width * num / denom) >= target[0]
+                           and math.ceil(height * num / denom) >= target[1]]
+                if factors:
+                    scaling = min(factors, key=lambda f: f[0] / f[1])
+            pixel_format = (self._module.TJPF_BGRX if sys.byteorder == 'little'
+                            else self._module.TJPF_XRGB)
+            pixels = self._jpeg.decode(data, pixel_format=pixel_format, scaling_factor=scaling)
+        except Exception:
+            return QImage()
+        height, width = pixels.shape[:2]
+        qimage = QImage(pixels.tobytes(), width, height, pixels.strides[0],
+                        QImage.Format.Format_RGB32).copy()
+        return finish_image(qimage, reduced=scaling is not None and scaling[0] != scaling[1])
+
+
+BACKENDS = (QtDecoder, TurboJpegDecoder, PillowDecoder)
+
+
+def benchmark_samples(formats=BENCHMARK_FORMATS, size=(3000, 2000)):
+    """Encode a synthetic photo-like image in each format Qt can write; return {format: bytes}."""
+    from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QPointF, Qt
+    from PyQt6.QtGui import QColor, QImage, QImageWriter, QLinearGradient, QPainter
+
+    image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(QPointF(0, 0), QPointF(size[0], size[1]))
+    gradient.setColorAt(0, QColor(200, 170, 140))
+    gradient.setColorAt(1, QColor(40, 50, 70))
+    painter.fillRect(image.rect(), gradient)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    for i in range(60):
+        # Soft shapes and edges, so the encoders produce realistic file sizes
+        painter.setBrush(QColor((i * 37) % 256, (i * 91) % 256, (i * 53) % 256, 140))
+        painter.drawEllipse(QPointF((i * 397) % size[0], (i * 211) % size[1]), 40 + i * 7, 30 + i * 5)
+    painter.end()
+
+    supported = {bytes(name).decode() for name in QImageWriter.supportedImageFormats()}
+    samples = {}
+    for fmt in formats:
+        if fmt not in supported:
+            continue
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        writer = QImageWriter(buffer, fmt.encode())
+        if fmt == 'jpeg':
+            writer.setQuality(90)
+            writer.setProgressiveScanWrite(True)
+        if writer.write(image):
+            samples[fmt] = bytes(data)
+    return samples
+
+
+class DecoderRegistry:
+    """The available decoder backends and which one handles each format.
+
+    Formats without a benchmark result go to Qt. decode() falls back to Qt
+    when the chosen backend fails, so a quirk in an optional library costs
+    a second decode rather than a missing image.
+    """
+
+    def __init__(self, backends=None):
+        if backends is None:
+            backends = [backend for backend in (cls.create() for cls in BACKENDS) if backend is not None]
+        self.backends = {backend.name: backend for backend in backends}
+        self.fallback = self.backends.get('qt') or QtDecoder()
+        self.selection = {}  # format -> backend name
+
+    def backend_for(self, fmt):
+        return self.backends.get(self.selection.get(fmt), self.fallback)
+
+    def decode(self, data, max_edge=None):
+        """Decode image bytes into a QImage (null if unreadable); see finish_image()."""
+        backend = self.backend_for(sniff_format(data))
+        image = backend.decode(data, max_edge)
+        if image.isNull() and backend is not self.fallback:
+            image = self.fallback.decode(data, max_edge)
+        return image
+
+    @traced('DecoderRegistry.benchmark', 'decode')
+    def benchmark(self, max_edge=1600, repeat=3, samples=None):
+        """Time each backend on each format and select the fastest.
+
+        Returns {format: {backend name: best time in seconds}}. Backends that
+        fail to decode a sample are left out for that format.
+        """
+        if samples is None:
+            samples = benchmark_samples()
+        results = {}
+        for fmt, data in samples.items():
+            timings = {}
+            for name, backend in self.backends.items():
+                if backend.formats is not None and fmt not in backend.formats:
+                    continue
+                best = None
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    image = backend.decode(data, max_edge)
+                    elapsed = time.perf_counter() - started
+                    if image.isNull():
+                        best = None
+                        break
+                    best = elapsed if best is None else min(best, elapsed)
+                if best is not None:
+                    timings[name] = best
+            if timings:
+                results[fmt] = timings
+                self.selection[fmt] = min(timings, key=timings.get)
+        return results
+
+    def to_dict(self):
+        return {'backends': sorted(self.backends), 'selection': dict(self.selection)}
+
+    def load(self, data):
+        """Restore a saved selection; False if the installed backends changed since."""
+        if not data or data.get('backends') != sorted(self.backends):
+            return False
+        self.selection = {fmt: name for fmt, name in data.get('selection', {}).items()
+                          if name in self.backends}
+        return True
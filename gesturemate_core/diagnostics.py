@@ -0,0 +1,342 @@
+"""Tracing and memory diagnostics shared by the app and the command-line tools."""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+
+class Tracer:
+    """Ring buffer of timed spans, exported as Chrome trace JSON for Perfetto or chrome://tracing.
+
+    Off unless switched on from the Debug menu or with the GESTUREMATE_TRACE
+    environment variable. While it's off, span() and traced functions cost a
+    single branch; only the most recent CAPACITY spans are kept.
+    """
+
+    CAPACITY = 200_000
+
+    def __init__(self, capacity=CAPACITY):
+        self.enabled = bool(os.environ.get('GESTUREMATE_TRACE'))
+        self.events = deque(maxlen=capacity)  # (name, category, start, end, thread id, args)
+        self.thread_names = {}
+        self.origin = time.perf_counter()
+
+    def span(self, name, category='app', **args):
+        """Context manager recording a span around its body."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _TraceSpan(self, name, category, args)
+
+    def add(self, name, category, start, end, args=None):
+        """Record a span the caller timed with time.perf_counter()."""
+        ident = threading.get_ident()
+        if ident not in self.thread_names:
+            self.thread_names[ident] = threading.current_thread().name
+        self.events.append((name, category, start, end, ident, args))
+
+    def add_stages(self, name, category, start, timings, args=None):
+        """Record a span made of back-to-back stages; timings maps stage name -> seconds."""
+        end = start
+        for stage, seconds in timings.items():
+            self.add(stage, category, end, end + seconds)
+            end += seconds
+        self.add(name, category, start, end, args)
+
+    def instant(self, name, category='app', **args):
+        if self.enabled:
+            now = time.perf_counter()
+            self.add(name, category, now, None, args)
+
+    def clear(self):
+        self.events.clear()
+
+    def to_chrome_trace(self):
+        """Return the buffer as a Chrome trace event dictionary."""
+        pid = os.getpid()
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'GestureMate'}}]
+        trace.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident, 'args': {'name': name}}
+                     for ident, name in self.thread_names.items())
+        for name, category, start, end, ident, args in list(self.events):
+            event = {'name': name, 'cat': category, 'pid': pid, 'tid': ident,
+                     'ts': round((start - self.origin) * 1e6, 1)}
+            if end is None:
+                event.update(ph='i', s='t')
+            else:
+                event.update(ph='X', dur=round((end - start) * 1e6, 1))
+            if args:
+                event['args'] = args
+            trace.append(event)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        """Write the buffer to path as Chrome trace JSON; returns the number of spans written."""
+        from .persistence import write_json_atomic  # persistence itself is traced
+
+        count = len(self.events)
+        write_json_atomic(path, self.to_chrome_trace())
+        return count
+
+
+class _TraceSpan:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+
+_NULL_SPAN = contextlib.nullcontext()
+TRACER = Tracer()
+
+
+def traced(name, category='app'):
+    """Decorator recording each call of the function as a trace span."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with _TraceSpan(TRACER, name, category, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class MemoryMonitor:
+    """Memory diagnostics: RSS, tracemalloc top allocators and image bytes by owner.
+
+    Off unless switched on from the Debug menu or with the
+    GESTUREMATE_MEMORY_DIAGNOSTICS environment variable. Samples taken during a
+    session are summarised in a report appended to a JSON-lines file when the
+    session stops, with warnings when memory keeps growing from one session to
+    the next.
+    """
+
+    SAMPLE_INTERVAL_MS = 5000
+    TOP_ALLOCATORS = 10
+    GROWTH_SESSIONS = 3  # consecutive sessions of growth before RSS growth is flagged
+    RSS_GROWTH_LIMIT = 64 * 1024 * 1024
+    OWNER_GROWTH_LIMIT = 16 * 1024 * 1024
+
+    def __init__(self, report_path):
+        self.enabled = False
+        self.report_path = Path(report_path)
+        self.samples = []
+        self.session_started = None
+        self.retained_rss = []  # RSS after each stopped session
+        self.first_owners = None  # bytes by owner after the first stopped session
+
+    def set_enabled(self, enabled):
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(8)
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = enabled
+
+    @staticmethod
+    def rss():
+        """Resident set size in bytes, or None where it can't be read.
+
+        Falls back to the peak RSS on platforms without /proc.
+        """
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError, AttributeError):
+            pass
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def start_session(self):
+        self.samples = []
+        self.session_started = time.monotonic()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def sample(self, owners):
+        """Record one sample; owners maps owner name -> bytes."""
+        started = self.session_started or time.monotonic()
+        self.samples.append({
+            'at': round(time.monotonic() - started, 1),
+            'rss': self.rss(),
+            'traced': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            'owners': owners,
+        })
+
+    def top_allocators(self):
+        if not tracemalloc.is_tracing():
+            return []
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:self.TOP_ALLOCATORS]
+        return [{'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 'bytes': stat.size, 'count': stat.count} for stat in stats]
+
+    def end_session(self, owners):
+        """Summarise the session that just stopped, append the report and return it.
+
+        owners should be measured after the session has released its images,
+        so whatever is left is what the next session starts with.
+        """
+        self.sample(owners)
+        rss_values = [sample['rss'] for sample in self.samples if sample['rss'] is not None]
+        peak_owners = {}
+        for sample in self.samples:
+            for owner, size in sample['owners'].items():
+                peak_owners[owner] = max(peak_owners.get(owner, 0), size)
+
+        retained = self.samples[-1]['rss']
+        warnings = []
+        if retained is not None:
+            self.retained_rss.append(retained)
+            recent = self.retained_rss[-(self.GROWTH_SESSIONS + 1):]
+            if (len(recent) > self.GROWTH_SESSIONS
+                    and all(later > earlier for earlier, later in zip(recent, recent[1:]))
+                    and retained - self.retained_rss[0] > self.RSS_GROWTH_LIMIT):
+                warnings.append(
+                    f"RSS after a session has grown for {self.GROWTH_SESSIONS} sessions in a row, "
+                    f"{(retained - self.retained_rss[0]) / 1048576:.0f} MB above the first session")
+        if self.first_owners is None:
+            self.first_owners = dict(owners)
+        for owner, size in owners.items():
+            growth = size - self.first_owners.get(owner, 0)
+            if growth > self.OWNER_GROWTH_LIMIT:
+                warnings.append(f"{owner} holds {growth / 1048576:.0f} MB more than after the first session")
+
+        traced_current, traced_peak = (tracemalloc.get_traced_memory()
+                                       if tracemalloc.is_tracing() else (None, None))
+        report = {
+            'stopped': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'session': len(self.retained_rss),
+            'duration': self.samples[-1]['at'],
+            'rss_start': rss_values[0] if rss_values else None,
+            'rss_peak': max(rss_values) if rss_values else None,
+            'rss_retained': retained,
+            'traced_current': traced_current,
+            'traced_peak': traced_peak,
+            'owners_peak': peak_owners,
+            'owners_retained': owners,
+            'top_allocators': self.top_allocators(),
+            'samples': self.samples,
+            'warnings': warnings,
+        }
+        try:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.report_path, 'a') as f:
+                f.write(json.dumps(report) + '\n')
+        except OSError as e:
+            print(f"Error writing memory report: {e}")
+        self.samples = []
+        self.session_started = None
+        return report
+
+
+class SessionRecorder:
+    """Records a session's inputs with monotonic timestamps, so bench/replay_session.py can replay it.
+
+    Off unless switched on from the Debug menu or with the
+    GESTUREMATE_RECORD_SESSIONS environment variable. Each session gets its
+    own JSON-lines file in directory: a 'start' line with the settings,
+    window size and play order, then one line per input (key presses and
+    button clicks, resizes, timer ticks) with its time since the session
+    started, the image on screen and how long the app took to handle it.
+    Lines are flushed as they're written, so a recording survives the app
+    being killed while frozen. Only the newest KEEP recordings are kept.
+    """
+
+    KEEP = 20
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory):
+        self.enabled = bool(os.environ.get('GESTUREMATE_RECORD_SESSIONS'))
+        self.directory = Path(directory)
+        self.path = None
+        self.depth = 0  # nesting of recorded handlers; only the outermost call is an input
+        self._file = None
+        self._origin = None
+
+    @property
+    def active(self):
+        return self._file is not None
+
+    def begin(self, start, started, seconds):
+        """Open a new recording; start describes the session (settings, 'images' in play order)."""
+        self.end()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("session-%Y%m%d-%H%M%S")
+        self.path = self.directory / f"{stem}.jsonl"
+        suffix = 1
+        while self.path.exists():
+            suffix += 1
+            self.path = self.directory / f"{stem}-{suffix}.jsonl"
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._origin = started
+        self._write(dict(start, event='start', t=0.0, ms=round(seconds * 1000, 3),
+                         version=self.FORMAT_VERSION, created=time.strftime("%Y-%m-%dT%H:%M:%S%z")))
+        for old in sorted(self.directory.glob("session-*.jsonl"), key=self._age)[:-self.KEEP]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _age(path):
+        # session-20261019-101500.jsonl, then -2, -3... for more in the same second
+        stamp = len("session-YYYYmmdd-HHMMSS")
+        suffix = path.stem[stamp + 1:]
+        return path.stem[:stamp], int(suffix) if suffix.isdigit() else 1
+
+    def record(self, event, started, seconds, **data):
+        """Log an input handled from time.monotonic() value started, taking seconds."""
+        if self._file is None:
+            return
+        self._write(dict(event=event, t=round(started - self._origin, 4), ms=round(seconds * 1000, 3), **data))
+
+    def end(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+
+def read_recording(path):
+    """Return (start entry, [input entries]) from a SessionRecorder file.
+
+    A recording cut short by a crash can end in a partial line, which is
+    dropped. Raises ValueError if the file isn't a recording.
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    if not entries or entries[0].get('event') != 'start':
+        raise ValueError(f"{path} is not a session recording")
+    if entries[0].get('version') != SessionRecorder.FORMAT_VERSION:
+        raise ValueError(f"{path} was recorded by a different version of GestureMate")
+    return entries[0], entries[1:]
@@ -0,0 +1,236 @@
+"""Disk cache of display-size copies of reference images, and the process pool that fills it."""
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from .diagnostics import traced
+
+DISPLAY_CACHE_DB_NAME = "display_cache.sqlite3"
+
+
+def render_display_copy(source, cache_dir, max_edge):
+    """Decode source and write a copy no larger than max_edge on its long side.
+
+    Runs in worker processes, so Qt is imported here rather than at module
+    level. Returns (cache file name or None, width, height); None means the
+    original already fits and is used as is.
+    """
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImageReader
+
+    reader = QImageReader(source)
+    size = reader.size()
+    if not size.isValid():
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(reader.errorString())
+        size = image.size()
+        reader = None
+    if max(size.width(), size.height()) <= max_edge:
+        return None, size.width(), size.height()
+
+    target_size = size.scaled(max_edge, max_edge, Qt.AspectRatioMode.KeepAspectRatio)
+    if reader is not None:
+        # Lets decoders such as JPEG decode straight to the smaller size
+        reader.setScaledSize(target_size)
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(reader.errorString())
+    else:
+        image = image.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+
+    # JPEG unless transparency has to survive
+    extension, fmt = ('.png', 'PNG') if image.hasAlphaChannel() else ('.jpg', 'JPEG')
+    name = hashlib.sha1(os.fsencode(source)).hexdigest() + extension
+    target = Path(cache_dir) / name[:2] / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=extension)
+    os.close(fd)
+    try:
+        if not image.save(tmp_name, fmt, 90):
+            raise OSError(f"could not write {target}")
+        os.replace(tmp_name, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+    return f"{name[:2]}/{name}", image.width(), image.height()
+
+
+class DisplayCache:
+    """Display-size copies of large reference images, kept on disk between sessions.
+
+    Each entry records the source's mtime and size when it was rendered, so
+    edited or replaced files are never served stale, and the long-edge limit
+    it was rendered at, so a bigger screen doesn't get a copy that's too small.
+    Sources that already fit are recorded without a copy, which lets warm()
+    skip them next time.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            max_edge INTEGER NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            file TEXT  -- NULL when the original is small enough
+        );
+    """
+    DEFAULT_MAX_EDGE = 2560
+    BATCH_SIZE = 64  # entries per commit while warming
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.cache_dir / DISPLAY_CACHE_DB_NAME))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _entry(self, path):
+        return self._connection.execute(
+            "SELECT mtime_ns, size, max_edge, width, height, file FROM entries WHERE path = ?",
+            (path,)).fetchone()
+
+    def lookup(self, path, min_edge=0):
+        """Return the cached copy to show for path, or None to use the original.
+
+        The copy must still match the source file and have been rendered
+        with a long edge of at least min_edge pixels.
+        """
+        entry = self._entry(path)
+        if entry is None or entry[5] is None:
+            return None
+        mtime_ns, size, max_edge, _, _, file = entry
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_mtime_ns != mtime_ns or st.st_size != size or max_edge < min_edge:
+            return None
+        return self.cache_dir / file
+
+    def is_fresh(self, path, st, max_edge):
+        """Whether warm() at max_edge can skip path (st is its os.stat() result)."""
+        entry = self._entry(path)
+        if entry is None:
+            return False
+        mtime_ns, size, cached_edge, width, height, file = entry
+        if st.st_mtime_ns != mtime_ns or st.st_size != size:
+            return False
+        if file is None:
+            # The original fitted within cached_edge; still fine unless the limit shrank below it
+            return max(width, height) <= max_edge
+        # A copy rendered for a bigger screen serves smaller ones too
+        return cached_edge >= max_edge and (self.cache_dir / file).exists()
+
+    def _record(self, path, st, max_edge, result):
+        file, width, height = result
+        previous = self._entry(path)
+        if previous is not None and previous[5] and previous[5] != file:
+            with contextlib.suppress(OSError):
+                (self.cache_dir / previous[5]).unlink()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO entries (path, mtime_ns, size, max_edge, width, height, file) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, max_edge, width, height, file))
+
+    @traced('DisplayCache.warm', 'cache')
+    def warm(self, paths, max_edge=DEFAULT_MAX_EDGE, workers=None, progress=None, cancel=None):
+        """Render display copies of every path that isn't cached and up to date.
+
+        Work is spread over a process pool (all cores by default). Finished
+        entries are committed in small batches, so an interrupted run picks
+        up where it left off. progress(done, total, rate) is called as images
+        finish; cancel is an optional threading.Event-like object checked
+        between images. Returns counts of what happened.
+        """
+        started = time.perf_counter()
+        pending = []
+        skipped = 0
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if self.is_fresh(path, st, max_edge):
+                skipped += 1
+            else:
+                pending.append((path, st))
+
+        total = len(pending)
+        done = failed = 0
+        if progress:
+            progress(0, total, 0.0)
+        if total:
+            # Only warming needs the process pool; lookups shouldn't load it
+            import multiprocessing
+            from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+            workers = workers or os.cpu_count() or 1
+            # spawn, not fork: the GUI process has Qt threads running
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                remaining = iter(pending)
+                running = {}
+
+                def submit_next():
+                    for path, st in remaining:
+                        future = pool.submit(render_display_copy, path, str(self.cache_dir), max_edge)
+                        running[future] = (path, st)
+                        return True
+                    return False
+
+                # Keep only a couple of images per worker in flight so cancelling is quick
+                for _ in range(workers * 2):
+                    if not submit_next():
+                        break
+                uncommitted = 0
+                try:
+                    while running:
+                        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            path, st = running.pop(future)
+                            try:
+                                self._record(path, st, max_edge, future.result())
+                                uncommitted += 1
+                            except Exception as e:
+                                failed += 1
+                                print(f"Could not cache {path}: {e}")
+                            done += 1
+                            if cancel is None or not cancel.is_set():
+                                submit_next()
+                        if uncommitted >= self.BATCH_SIZE:
+                            self._connection.commit()
+                            uncommitted = 0
+                        if progress:
+                            elapsed = time.perf_counter() - started
+                            progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+                finally:
+                    # Keep what finished, even when interrupted
+                    self._connection.commit()
+                    for future in running:
+                        future.cancel()
+        return {
+            'total': total + skipped, 'skipped': skipped, 'rendered': done - failed,
+            'failed': failed, 'cancelled': done < total,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
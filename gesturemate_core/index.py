@@ -0,0 +1,467 @@
+"""Persistent library index for large or slow (network) reference folders."""
+
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from .diagnostics import traced
+from .library import SUPPORTED_IMAGE_EXTENSIONS
+from .query import ImageQuery
+
+
+class LibraryIndex:
+    """SQLite index of the images under one or more root folders.
+
+    Each directory is stored with its mtime, its subdirectories and the
+    image file names it holds. A directory's mtime changes whenever entries
+    are added, removed or renamed in it, so update() only lists directories
+    whose mtime has moved and takes everything else from the index. That
+    makes a refresh of an unchanged tree one stat() per directory, which is
+    what keeps nightly rebuilds of a large file-server library cheap.
+
+    Folder and file names are also kept in an FTS5 trigram index, so
+    search() resolves substring and wildcard filters without walking the
+    tree. SQLite builds without FTS5 fall back to a LIKE scan of the table.
+
+    probe() adds header metadata (size, EXIF orientation, format, bit
+    depth) per image, which size filters such as is:portrait or min:1000
+    use instead of decoding anything. A probe is kept until its file's
+    mtime or size changes.
+
+    hash_images() adds a perceptual hash per image the same way, and
+    representatives() uses them to keep one image from each group of
+    near-duplicates (see gesturemate_core.similar).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS roots (
+            path TEXT PRIMARY KEY,
+            updated REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dirs (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            subdirs TEXT NOT NULL  -- NUL-separated names
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (dir, name)
+        );
+        CREATE TABLE IF NOT EXISTS probes (
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            width INTEGER NOT NULL,  -- 0 when the header couldn't be read
+            height INTEGER NOT NULL,
+            orientation INTEGER NOT NULL,  -- EXIF orientation tag, 1 = as stored
+            format TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (dir, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS hashes (
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            hash INTEGER,  -- 64-bit dHash stored signed; NULL when the image couldn't be read
+            PRIMARY KEY (dir, name)
+        ) WITHOUT ROWID;
+    """
+    # Per-file tables kept until the file changes
+    FILE_TABLES = ('probes', 'hashes')
+    SEARCH_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS file_search USING fts5(
+            dir, name, content='files', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS files_search_insert AFTER INSERT ON files BEGIN
+            INSERT INTO file_search (rowid, dir, name) VALUES (new.id, new.dir, new.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS files_search_delete AFTER DELETE ON files BEGIN
+            INSERT INTO file_search (file_search, rowid, dir, name)
+                VALUES ('delete', old.id, old.dir, old.name);
+        END;
+    """
+    # Bumped when the tables change shape; older indexes are rebuilt from scratch
+    VERSION = 2
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.db_path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            self._connection.executescript("""
+                DROP TRIGGER IF EXISTS files_search_insert;
+                DROP TRIGGER IF EXISTS files_search_delete;
+                DROP TABLE IF EXISTS file_search;
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS dirs;
+                DROP TABLE IF EXISTS roots;
+            """)
+        self._connection.executescript(self.SCHEMA)
+        try:
+            self._connection.executescript(self.SEARCH_SCHEMA)
+            self.has_search_index = True
+        except sqlite3.OperationalError:
+            # No FTS5 or no trigram tokenizer (SQLite < 3.34)
+            self.has_search_index = False
+        self._connection.execute(f"PRAGMA user_version = {self.VERSION}")
+        self._folder_totals = {}  # root -> folder_totals(), until update() finds a change
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def roots(self):
+        """Return {root folder: time of its last update}."""
+        return dict(self._connection.execute("SELECT path, updated FROM roots ORDER BY path"))
+
+    def _stored_dirs(self, root):
+        prefix = os.path.join(root, '')
+        return {
+            path: (mtime_ns, subdirs)
+            for path, mtime_ns, subdirs in self._connection.execute(
+                "SELECT path, mtime_ns, subdirs FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                (root, len(prefix), prefix))
+        }
+
+    @traced('LibraryIndex.update', 'scan')
+    def update(self, root):
+        """Bring the index for root up to date; return counts of what was done.
+
+        Symlinked directories are not followed, matching scan_image_folder().
+        """
+        root = os.path.abspath(root)
+        stored = self._stored_dirs(root)
+        seen = set()
+        listed = 0
+        stack = [root]
+        with self._connection:
+            while stack:
+                directory = stack.pop()
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(directory)
+                previous = stored.get(directory)
+                if previous is not None and previous[0] == mtime_ns:
+                    subdirs = previous[1].split('\0') if previous[1] else []
+                else:
+                    subdirs, images = [], []
+                    try:
+                        with os.scandir(directory) as entries:
+                            for entry in entries:
+                                try:
+                                    if entry.is_dir(follow_symlinks=False):
+                                        subdirs.append(entry.name)
+                                    elif (os.path.splitext(entry.name)[1].lower() in SUPPORTED_IMAGE_EXTENSIONS
+                                          and entry.is_file()):
+                                        images.append(entry.name)
+                                except OSError:
+                                    continue
+                    except OSError:
+                        # Skip folders we can't access
+                        seen.discard(directory)
+                        continue
+                    listed += 1
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO dirs (path, mtime_ns, subdirs) VALUES (?, ?, ?)",
+                        (directory, mtime_ns, '\0'.join(sorted(subdirs))))
+                    self._connection.execute("DELETE FROM files WHERE dir = ?", (directory,))
+                    self._connection.executemany(
+                        "INSERT INTO files (dir, name) VALUES (?, ?)",
+                        ((directory, name) for name in images))
+                    self._forget_stale_files(directory, images)
+                stack.extend(os.path.join(directory, name) for name in subdirs)
+
+            removed = [path for path in stored if path not in seen]
+            self._connection.executemany("DELETE FROM dirs WHERE path = ?", ((path,) for path in removed))
+            self._connection.executemany("DELETE FROM files WHERE dir = ?", ((path,) for path in removed))
+            for table in self.FILE_TABLES:
+                self._connection.executemany(f"DELETE FROM {table} WHERE dir = ?", ((path,) for path in removed))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO roots (path, updated) VALUES (?, ?)", (root, time.time()))
+        if listed or removed:
+            self._folder_totals.clear()
+        return {'directories': len(seen), 'listed': listed, 'removed': len(removed),
+                'images': self.image_count(root)}
+
+    def _forget_stale_files(self, directory, images):
+        """Drop probes and hashes for files that are gone from, or were replaced in, a relisted directory."""
+        present = set(images)
+        stats = {}
+        for table in self.FILE_TABLES:
+            stale = []
+            for name, mtime_ns, size in self._connection.execute(
+                    f"SELECT name, mtime_ns, size FROM {table} WHERE dir = ?", (directory,)).fetchall():
+                if name in present:
+                    if name not in stats:
+                        try:
+                            st = os.stat(os.path.join(directory, name))
+                            stats[name] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            stats[name] = None
+                    if stats[name] == (mtime_ns, size):
+                        continue
+                stale.append((directory, name))
+            self._connection.executemany(f"DELETE FROM {table} WHERE dir = ? AND name = ?", stale)
+
+    def image_count(self, root):
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, '')
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?",
+            (root, len(prefix), prefix)).fetchone()[0]
+
+    def folder_totals(self, root):
+        """Return {directory: images in its whole tree} for the directories under root that hold any.
+
+        One grouped query plus a walk up from each directory, so a folder
+        tree can show counts for any depth without listing anything. The
+        result is kept until update() finds a change; don't modify it.
+        """
+        root = os.path.abspath(root)
+        totals = self._folder_totals.get(root)
+        if totals is not None:
+            return totals
+        prefix = os.path.join(root, '')
+        totals = {}
+        for directory, count in self._connection.execute(
+                "SELECT dir, COUNT(*) FROM files WHERE dir = ? OR substr(dir, 1, ?) = ? GROUP BY dir",
+                (root, len(prefix), prefix)):
+            while True:
+                totals[directory] = totals.get(directory, 0) + count
+                if len(directory) <= len(root):
+                    break
+                directory = os.path.dirname(directory)
+        self._folder_totals[root] = totals
+        return totals
+
+    def images(self, root):
+        """Return the sorted image paths indexed under root."""
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, '')
+        paths = [os.path.join(directory, name) for directory, name in self._connection.execute(
+            "SELECT dir, name FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?",
+            (root, len(prefix), prefix))]
+        paths.sort()
+        return paths
+
+    @traced('LibraryIndex.search', 'scan')
+    def search(self, roots, query, probe=True):
+        """Return {root: sorted image paths} for the indexed images under roots matching query.
+
+        query is an ImageQuery or filter text (see gesturemate_core.query).
+        Same shape as folder_images(), so a filtered image set drops into a
+        session the same way a folder scan does. Size terms probe any
+        matching images that haven't been probed yet, unless probe is false
+        (see filter_images()).
+        """
+        if isinstance(query, str):
+            query = ImageQuery.parse(query)
+        literals = query.index_literals()
+        results = {}
+        for folder in roots:
+            root = os.path.abspath(folder)
+            prefix = os.path.join(root, '')
+            sql = "SELECT f.dir, f.name FROM files f"
+            where = ["(f.dir = ? OR substr(f.dir, 1, ?) = ?)"]
+            params = [root, len(prefix), prefix]
+            if literals and self.has_search_index:
+                sql += " JOIN file_search ON file_search.rowid = f.id"
+                where.append("file_search MATCH ?")
+                params.append(' AND '.join('"' + literal.replace('"', '""') + '"' for literal in literals))
+            else:
+                for literal in literals:
+                    where.append("(f.dir LIKE ? ESCAPE '\\' OR f.name LIKE ? ESCAPE '\\')")
+                    pattern = '%' + re.sub(r'([\\%_])', r'\\\1', literal) + '%'
+                    params += [pattern, pattern]
+            rows = self._connection.execute(f"{sql} WHERE {' AND '.join(where)}", params)
+
+            # The index only narrows things down; the query has the final say on each path
+            paths = []
+            relative_dirs = {}
+            for directory, name in rows:
+                relative_dir = relative_dirs.get(directory)
+                if relative_dir is None:
+                    relative_dir = relative_dirs[directory] = (
+                        directory[len(prefix):].replace(os.sep, '/') + '/' if directory != root else '')
+                if query.matches(relative_dir + name):
+                    paths.append(directory + os.sep + name)
+            if paths:
+                paths.sort()
+                results[folder] = paths
+        return self.filter_images(results, query, probe)
+
+    def _file_rows(self, table, columns, paths):
+        """Return {path: (columns...)} for the paths that have a row in a per-file table."""
+        by_dir = {}
+        for path in paths:
+            directory, name = os.path.split(path)
+            by_dir.setdefault(directory, []).append(name)
+        found = {}
+        for directory, names in by_dir.items():
+            wanted = set(names)
+            for name, *info in self._connection.execute(
+                    f"SELECT name, {columns} FROM {table} WHERE dir = ?", (directory,)):
+                if name in wanted:
+                    found[os.path.join(directory, name)] = tuple(info)
+        return found
+
+    def metadata(self, paths):
+        """Return {path: (width, height, orientation, format, depth)} for the probed paths."""
+        return self._file_rows('probes', "width, height, orientation, format, depth", paths)
+
+    def perceptual_hashes(self, paths):
+        """Return {path: 64-bit dHash} for the hashed paths that could be read."""
+        return {path: hash & 0xFFFFFFFFFFFFFFFF
+                for path, (hash,) in self._file_rows('hashes', "hash", paths).items()
+                if hash is not None}
+
+    def unprobed(self, paths):
+        """Return the paths that haven't been probed, in order."""
+        known = self.metadata(paths)
+        return [path for path in paths if path not in known]
+
+    @traced('LibraryIndex.probe', 'scan')
+    def probe(self, paths, workers=8, progress=None, cancel=None):
+        """Read header metadata for the paths that haven't been probed; return how many were.
+
+        Headers are read on a thread pool (see gesturemate_core.probe) and
+        committed in batches, so an interrupted probe keeps its progress.
+        progress(done, total) is called as batches finish.
+        """
+        from .probe import probe_images
+
+        missing = self.unprobed(paths)
+        return self._store_results(
+            probe_images(missing, workers, cancel), len(missing), progress,
+            "INSERT OR REPLACE INTO probes (dir, name, mtime_ns, size, width, height, orientation, "
+            "format, depth) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+    @traced('LibraryIndex.hash_images', 'scan')
+    def hash_images(self, paths, workers=8, progress=None, cancel=None):
+        """Compute perceptual hashes for the paths that don't have one; return how many were.
+
+        Works like probe(), but decodes a tiny thumbnail of each image (see
+        gesturemate_core.similar), so it's best left to a background thread.
+        """
+        from .similar import fingerprint_images
+
+        known = self._file_rows('hashes', "hash", paths)
+        missing = [path for path in paths if path not in known]
+        results = ((path, result if result is None or result[2] is None
+                    # SQLite integers are signed 64-bit
+                    else result[:2] + (result[2] - (1 << 64) if result[2] >= 1 << 63 else result[2],))
+                   for path, result in fingerprint_images(missing, workers, cancel))
+        return self._store_results(
+            results, len(missing), progress,
+            "INSERT OR REPLACE INTO hashes (dir, name, mtime_ns, size, hash) VALUES (?, ?, ?, ?, ?)")
+
+    def _store_results(self, results, total, progress, sql):
+        """Insert (path, row values) results in batches of 500; return how many came in."""
+        done = 0
+        rows = []
+
+        def store():
+            with self._connection:
+                self._connection.executemany(sql, rows)
+            rows.clear()
+            if progress:
+                progress(done, total)
+
+        try:
+            for path, result in results:
+                done += 1
+                if result is not None:
+                    rows.append(os.path.split(path) + result)
+                if len(rows) >= 500:
+                    store()
+        finally:
+            store()
+        return done
+
+    def filter_images(self, folder_images, query, probe=True):
+        """Apply query's size terms to {folder: image paths}, probing images as needed.
+
+        With probe false nothing is read from disk, and images that haven't
+        been probed pass, their size being unknown; unprobed() finds them.
+        Folders left with no images are dropped. Without size terms the
+        image set comes back unchanged.
+        """
+        if not query.conditions:
+            return folder_images
+        paths = [path for images in folder_images.values() for path in images]
+        if probe:
+            self.probe(paths)
+        metadata = self.metadata(paths)
+        filtered = {}
+        for folder, images in folder_images.items():
+            kept = [path for path in images
+                    if path in metadata and query.matches_size(metadata[path][0], metadata[path][1])
+                    or not probe and path not in metadata]
+            if kept:
+                filtered[folder] = kept
+        return filtered
+
+    def duplicate_groups(self, paths, radius=None):
+        """Return the groups of near-duplicates among paths, each with the image to keep first.
+
+        Uses the hashes stored by hash_images(); paths without one are left
+        out. The image kept is the largest (by probed size, when known), or
+        else the first in path order.
+        """
+        from .similar import DUPLICATE_DISTANCE, cluster
+
+        groups = [group for group in cluster(self.perceptual_hashes(paths),
+                                             DUPLICATE_DISTANCE if radius is None else radius)
+                  if len(group) > 1]
+        sizes = self.metadata([path for group in groups for path in group])
+        ordered = []
+        for group in groups:
+            keep = max(group, key=lambda path: sizes[path][0] * sizes[path][1] if path in sizes else 0)
+            ordered.append([keep] + [path for path in group if path != keep])
+        return ordered
+
+    def representatives(self, folder_images, radius=None):
+        """Keep one image from each group of near-duplicates in {folder: image paths}.
+
+        See duplicate_groups(); images that haven't been hashed are kept.
+        Folders left with no images are dropped.
+        """
+        paths = [path for images in folder_images.values() for path in images]
+        hidden = {path for group in self.duplicate_groups(paths, radius) for path in group[1:]}
+        if not hidden:
+            return folder_images
+        filtered = {}
+        for folder, images in folder_images.items():
+            kept = [path for path in images if path not in hidden]
+            if kept:
+                filtered[folder] = kept
+        return filtered
+
+    def folder_images(self, folders):
+        """Return {folder: sorted image paths} for the indexed folders that have images.
+
+        Same shape as scan_folders(); folders never passed to update() come
+        back empty and are left out.
+        """
+        folder_images = {}
+        for folder in folders:
+            paths = self.images(folder)
+            if paths:
+                folder_images[folder] = paths
+        return folder_images
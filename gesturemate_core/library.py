@@ -0,0 +1,203 @@
+"""Finding reference images on disk and snapshotting resolved image sets."""
+
+import json
+import os
+import zlib
+from pathlib import Path
+
+from .diagnostics import TRACER
+
+
+# Supported image formats (module-level constant)
+SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp'}
+
+
+def scan_image_folder(folder, include_files=True):
+    """Walk a folder tree, returning (image paths, {directory: mtime in ns}).
+
+    Symlinked directories are not followed, matching Path.rglob(). With
+    include_files=False only the directory mtimes are collected, which is
+    a cheap way to tell whether anything in the tree has changed.
+    """
+    images = []
+    dir_mtimes = {}
+    stack = [str(folder)]
+    while stack:
+        directory = stack.pop()
+        try:
+            dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (include_files
+                              and os.path.splitext(entry.name)[1].lower() in SUPPORTED_IMAGE_EXTENSIONS
+                              and entry.is_file()):
+                            images.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            # Skip folders we can't access
+            continue
+    return images, dir_mtimes
+
+
+PLAYSET_MAGIC = b'GMPS1'
+
+
+def encode_playset(scanned_folders, folder_images, dir_mtimes, seed):
+    """Pack a resolved image set into the compact snapshot format.
+
+    The snapshot is a magic tag followed by zlib-compressed data: one JSON
+    header line (scanned folders, per-folder counts, shuffle seed, directory
+    mtimes) and then every image path, NUL-separated, grouped by folder.
+    """
+    folders = sorted(folder_images)
+    header = {
+        'scanned': sorted(scanned_folders),
+        'folders': folders,
+        'counts': [len(folder_images[folder]) for folder in folders],
+        'seed': seed,
+        'dir_mtimes': dir_mtimes,
+    }
+    body = '\0'.join(path for folder in folders for path in folder_images[folder])
+    payload = json.dumps(header).encode('utf-8') + b'\n' + body.encode('utf-8', 'surrogateescape')
+    return PLAYSET_MAGIC + zlib.compress(payload, 6)
+
+
+def decode_playset(data):
+    """Unpack a snapshot made by encode_playset(); return None if it isn't one."""
+    if not data.startswith(PLAYSET_MAGIC):
+        return None
+    try:
+        header, _, body = zlib.decompress(data[len(PLAYSET_MAGIC):]).partition(b'\n')
+        header = json.loads(header)
+        paths = body.decode('utf-8', 'surrogateescape').split('\0') if body else []
+    except (zlib.error, ValueError):
+        return None
+    if sum(header['counts']) != len(paths):
+        return None
+    folder_images = {}
+    start = 0
+    for folder, count in zip(header['folders'], header['counts']):
+        folder_images[folder] = paths[start:start + count]
+        start += count
+    return {'folder_images': folder_images, 'seed': header['seed'],
+            'dir_mtimes': header['dir_mtimes'], 'scanned': header['scanned']}
+
+
+def scan_folders(folders):
+    """Scan each folder; return ({folder: sorted image paths}, {directory: mtime in ns}).
+
+    Folders without any images are left out of the first dictionary.
+    """
+    folder_images = {}
+    dir_mtimes = {}
+    for folder in folders:
+        if not os.path.exists(folder):
+            continue
+        with TRACER.span('scan_image_folder', 'scan', folder=folder):
+            images, folder_mtimes = scan_image_folder(folder)
+        dir_mtimes.update(folder_mtimes)
+        if images:
+            folder_images[folder] = sorted(images)
+    return folder_images, dir_mtimes
+
+
+class FolderScans:
+    """scan_folders() results kept per folder, so a changed folder selection only scans what was added.
+
+    Folders that stay selected keep their images from the last scan;
+    changes on disk are left for tree_mtimes() to find, the way a restored
+    playset is revalidated.
+    """
+
+    def __init__(self):
+        self.images = {}  # folder -> sorted image paths, empty if it has none
+        self.mtimes = {}  # folder -> {directory: mtime in ns}
+
+    def update(self, folders):
+        """Scan the folders not scanned yet and forget those no longer listed; return (added, removed)."""
+        wanted = set(folders)
+        removed = [folder for folder in self.images if folder not in wanted]
+        for folder in removed:
+            del self.images[folder]
+            del self.mtimes[folder]
+        added = []
+        for folder in dict.fromkeys(folders):
+            if folder in self.images or not os.path.exists(folder):
+                continue  # a missing folder is looked for again next time
+            folder_images, dir_mtimes = scan_folders([folder])
+            self.images[folder] = folder_images.get(folder, [])
+            self.mtimes[folder] = dir_mtimes
+            added.append(folder)
+        return added, removed
+
+    def replace(self, folders, folder_images, dir_mtimes):
+        """Take over a scan_folders(folders) result made elsewhere, such as a playset snapshot.
+
+        dir_mtimes covers all the folders together; it's split up by the
+        folder each directory is under.
+        """
+        self.images = {folder: folder_images.get(folder, []) for folder in folders}
+        self.mtimes = {folder: {} for folder in folders}
+        for directory, mtime in dir_mtimes.items():
+            for parent in (directory, *map(str, Path(directory).parents)):
+                if parent in self.mtimes:
+                    self.mtimes[parent][directory] = mtime
+                    break
+
+    def folder_images(self):
+        """{folder: sorted image paths} for the scanned folders that have images, as from scan_folders()."""
+        return {folder: images for folder, images in self.images.items() if images}
+
+    def dir_mtimes(self):
+        merged = {}
+        for mtimes in self.mtimes.values():
+            merged.update(mtimes)
+        return merged
+
+
+def tree_mtimes(folders):
+    """Return {directory: mtime in ns} for every directory under the folders."""
+    dir_mtimes = {}
+    for folder in folders:
+        dir_mtimes.update(scan_image_folder(folder, include_files=False)[1])
+    return dir_mtimes
+
+
+def enabled_folders(saved_folders):
+    """Return the saved folders a session draws from.
+
+    A saved folder that has saved subfolders contributes through those
+    subfolders only, the same way SettingsDialog.get_settings() reports it.
+    """
+    # Every folder with a saved folder somewhere below it
+    ancestors = {parent for folder in saved_folders for parent in Path(folder).parents}
+    return [folder for folder, enabled in saved_folders.items()
+            if enabled and Path(folder) not in ancestors]
+
+
+def read_playset(path, folders):
+    """Return the snapshot saved at path if it is still valid for these folders, else None.
+
+    Valid means it was made from exactly this set of folders and none of
+    them has changed at the top level since; changes deeper in the tree are
+    left for tree_mtimes() to find.
+    """
+    folders = sorted(folders)
+    try:
+        snapshot = decode_playset(Path(path).read_bytes())
+    except OSError:
+        return None
+    if not snapshot or snapshot['scanned'] != folders:
+        return None
+    dir_mtimes = snapshot['dir_mtimes']
+    for folder in folders:
+        try:
+            if os.stat(folder).st_mtime_ns != dir_mtimes.get(folder):
+                return None
+        except OSError:
+            return None
+    return snapshot
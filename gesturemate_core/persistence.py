@@ -0,0 +1,193 @@
+"""Crash-safe settings files and the debounced background writer."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .diagnostics import traced
+
+APP_NAME = "GestureMate"
+
+# File names inside the settings folder
+CONFIG_FILE_NAME = "gesturemate_config.json"
+STATS_FILE_NAME = "gesturemate_stats.json"
+PLAYSET_FILE_NAME = "gesturemate_playset.bin"
+PRACTICE_LOG_FILE_NAME = "gesturemate_practice.sqlite3"
+MEMORY_REPORT_FILE_NAME = "gesturemate_memory.jsonl"
+LIBRARY_INDEX_FILE_NAME = "gesturemate_index.sqlite3"
+DECODERS_FILE_NAME = "gesturemate_decoders.json"
+RECORDINGS_DIR_NAME = "gesturemate_recordings"
+
+
+def default_config_dir():
+    """Return the settings folder the app uses, without needing Qt.
+
+    Mirrors QStandardPaths.AppConfigLocation for an application named
+    GestureMate, so the command-line tools read the same files as the window.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Preferences')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return Path(base) / APP_NAME
+
+
+def default_cache_dir():
+    """Return the cache folder the app uses, mirroring QStandardPaths.CacheLocation."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')
+        return Path(base) / APP_NAME / 'cache'
+    if sys.platform == 'darwin':
+        return Path(os.path.expanduser('~/Library/Caches')) / APP_NAME
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return Path(base) / APP_NAME
+
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON to a file atomically (temp file in the same folder, fsync, rename).
+
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    write_bytes_atomic(path, json.dumps(data, indent=indent).encode('utf-8'))
+
+
+def write_bytes_atomic(path, payload):
+    """Write bytes to a file atomically (temp file in the same folder, fsync, rename)."""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        # mkstemp creates the file owner-only; keep the permissions a plain open() would give
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_name, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    # Make the rename itself durable (directories can't be opened on Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+def read_json_file(path):
+    """Read a JSON file, returning {} if it is missing or unreadable.
+
+    A corrupt file is renamed aside (``*.corrupt``) so the next save doesn't
+    silently overwrite whatever could still be recovered from it.
+    """
+    path = Path(path)
+    try:
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except ValueError as e:
+        print(f"Error loading {path.name}: {e}")
+        try:
+            os.replace(path, path.with_name(path.name + '.corrupt'))
+        except OSError:
+            pass
+    except Exception as e:
+        print(f"Error loading {path.name}: {e}")
+    return {}
+
+
+class ConfigWriter:
+    """Coalesce JSON saves and write them atomically on a background thread.
+
+    write() replaces any pending payload for the same path, so a burst of
+    changes ends in a single write once it has been quiet for `delay` seconds.
+    Callers hand over a snapshot they won't mutate afterwards; bytes payloads
+    are written as-is instead of as JSON.
+    """
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._pending = {}  # Path -> (data, indent)
+        self._deadline = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, path, data, indent=None):
+        """Schedule `data` to be written to `path`."""
+        with self._cond:
+            self._pending[Path(path)] = (data, indent)
+            self._deadline = time.monotonic() + self.delay
+            self._cond.notify()
+            closed = self._closed
+        if closed:
+            # Late saves after close() are written straight away
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now, on the calling thread."""
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            # Taken under the condition so an in-flight background write finishes first
+            self._io_lock.acquire()
+        try:
+            self._write_batch(batch)
+        finally:
+            self._io_lock.release()
+
+    def close(self):
+        """Stop the background thread and write anything still pending."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                batch, self._pending = self._pending, {}
+                self._io_lock.acquire()
+            try:
+                self._write_batch(batch)
+            finally:
+                self._io_lock.release()
+
+    @staticmethod
+    @traced('config write', 'io')
+    def _write_batch(batch):
+        for path, (data, indent) in batch.items():
+            try:
+                if isinstance(data, bytes):
+                    write_bytes_atomic(path, data)
+                else:
+                    write_json_atomic(path, data, indent)
+            except Exception as e:
+                print(f"Error saving {path.name}: {e}")
@@ -0,0 +1,194 @@
+"""Per-image practice history kept in SQLite."""
+
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .diagnostics import traced
+
+
+class PracticeLog:
+    """Append-only per-image practice history stored in SQLite (WAL mode).
+
+    Events are queued from the GUI thread and inserted in batches by a
+    background thread. Per-image totals are kept up to date alongside the raw
+    events, so lookups never have to aggregate the whole history.
+    """
+
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL = 2.0  # seconds a partial batch may wait before it is written
+
+    # How a view of an image ended
+    OUTCOMES = ('completed', 'skipped', 'back', 'stopped')
+
+    # Transform bit flags recorded with each event
+    FLIP_HORIZONTAL = 1
+    FLIP_VERTICAL = 2
+    GREYSCALE = 4
+    ROTATED = 8
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS images (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            session INTEGER NOT NULL,
+            image_id INTEGER NOT NULL,
+            outcome INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            transforms INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_by_image ON events (image_id, ts);
+        CREATE INDEX IF NOT EXISTS events_by_session ON events (session);
+        CREATE TABLE IF NOT EXISTS image_totals (
+            image_id INTEGER PRIMARY KEY,
+            shown INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            back INTEGER NOT NULL DEFAULT 0,
+            seconds REAL NOT NULL DEFAULT 0,
+            last_shown REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS totals_by_shown ON image_totals (shown);
+        CREATE INDEX IF NOT EXISTS totals_by_skipped ON image_totals (skipped);
+        CREATE INDEX IF NOT EXISTS totals_by_last_shown ON image_totals (last_shown);
+    """
+
+    _FLUSH = 'flush'  # queue marker that ends the current batch early
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._queue = queue.Queue()
+        self._reader = None
+        self._thread = threading.Thread(target=self._run, name="PracticeLog", daemon=True)
+        self._thread.start()
+
+    def log(self, path, outcome, seconds, transforms=0, session=0):
+        """Record that `path` was on screen for `seconds` and how the view ended."""
+        self._queue.put((time.time(), session, str(path), self.OUTCOMES.index(outcome),
+                         float(seconds), int(transforms)))
+
+    def flush(self):
+        """Block until every queued event has been committed."""
+        if self._thread.is_alive():
+            self._queue.put(self._FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """Commit pending events and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _run(self):
+        try:
+            connection = self._connect()
+            connection.executescript(self.SCHEMA)
+        except sqlite3.Error as e:
+            print(f"Practice log unavailable: {e}")
+            connection = None
+        image_ids = {}
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            markers = 0
+            while True:
+                if item is None or item is self._FLUSH:
+                    markers += 1
+                    stopping = item is None
+                    break
+                batch.append(item)
+                if len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+                except queue.Empty:
+                    break
+            if batch and connection is not None:
+                try:
+                    self._write_batch(connection, batch, image_ids)
+                except sqlite3.Error as e:
+                    print(f"Error writing practice log: {e}")
+                    image_ids.clear()
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    @staticmethod
+    @traced('practice log write', 'io')
+    def _write_batch(connection, batch, image_ids):
+        with connection:
+            for path in {event[2] for event in batch} - image_ids.keys():
+                connection.execute("INSERT OR IGNORE INTO images (path) VALUES (?)", (path,))
+                image_ids[path] = connection.execute(
+                    "SELECT id FROM images WHERE path = ?", (path,)).fetchone()[0]
+            rows = [(ts, session, image_ids[path], outcome, seconds, transforms)
+                    for ts, session, path, outcome, seconds, transforms in batch]
+            connection.executemany(
+                "INSERT INTO events (ts, session, image_id, outcome, seconds, transforms) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            connection.executemany(
+                """INSERT INTO image_totals (image_id, shown, completed, skipped, back, seconds, last_shown)
+                   VALUES (?1, 1, ?2 = 0, ?2 = 1, ?2 = 2, ?3, ?4)
+                   ON CONFLICT (image_id) DO UPDATE SET
+                       shown = shown + 1,
+                       completed = completed + excluded.completed,
+                       skipped = skipped + excluded.skipped,
+                       back = back + excluded.back,
+                       seconds = seconds + excluded.seconds,
+                       last_shown = max(last_shown, excluded.last_shown)""",
+                [(image_id, outcome, seconds, ts)
+                 for ts, _, image_id, outcome, seconds, _ in rows])
+
+    def _query(self, sql, params=()):
+        """Run a read query on a connection owned by the calling (GUI) thread."""
+        if self._reader is None:
+            self._reader = self._connect()
+            self._reader.executescript(self.SCHEMA)
+        return self._reader.execute(sql, params).fetchall()
+
+    def image_totals(self, paths):
+        """Return {path: {shown, completed, skipped, back, seconds, last_shown}} for known paths."""
+        totals = {}
+        paths = [str(path) for path in paths]
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self._query(
+                "SELECT i.path, t.shown, t.completed, t.skipped, t.back, t.seconds, t.last_shown "
+                "FROM images i JOIN image_totals t ON t.image_id = i.id "
+                f"WHERE i.path IN ({','.join('?' * len(chunk))})", chunk)
+            for path, shown, completed, skipped, back, seconds, last_shown in rows:
+                totals[path] = {
+                    'shown': shown, 'completed': completed, 'skipped': skipped,
+                    'back': back, 'seconds': seconds, 'last_shown': last_shown,
+                }
+        return totals
+
+    def most_drawn(self, limit=10):
+        """Return [(path, times shown)] for the most frequently shown images."""
+        return self._query(
+            "SELECT i.path, t.shown FROM image_totals t JOIN images i ON i.id = t.image_id "
+            "ORDER BY t.shown DESC, t.seconds DESC LIMIT ?", (limit,))
+
+    def most_skipped(self, limit=10):
+        """Return [(path, times skipped)] for the most frequently skipped images."""
+        return self._query(
+            "SELECT i.path, t.skipped FROM image_totals t JOIN images i ON i.id = t.image_id "
+            "WHERE t.skipped > 0 ORDER BY t.skipped DESC LIMIT ?", (limit,))
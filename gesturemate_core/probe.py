@@ -0,0 +1,74 @@
+"""Header-only image metadata: size, EXIF orientation, format and bit depth.
+
+QImageReader answers all of these from the file header without decoding
+any pixels, so probing a whole library costs little more than reading the
+first few kilobytes of each file. Qt is imported lazily, as in displaycache.
+"""
+
+import os
+
+# QImageIOHandler.Transformation values -> EXIF orientation tags
+_EXIF_ORIENTATIONS = {0: 1, 1: 2, 3: 3, 2: 4, 6: 5, 4: 6, 5: 7, 7: 8}
+
+_depths = {}
+
+
+def _format_depth(image_format):
+    from PyQt6.QtGui import QImage
+
+    if image_format == QImage.Format.Format_Invalid:
+        return 0
+    depth = _depths.get(image_format)
+    if depth is None:
+        depth = _depths[image_format] = QImage(1, 1, image_format).depth()
+    return depth
+
+
+def probe_image(path):
+    """Return (mtime_ns, size, width, height, orientation, format, depth) for path.
+
+    Width and height are as stored, before any EXIF rotation (the way the
+    app shows images). Unreadable images come back with a 0x0 size so
+    they're not probed again; None means the file itself is gone.
+    """
+    from PyQt6.QtGui import QImageReader
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    reader = QImageReader(path)
+    size = reader.size()
+    if not size.isValid():
+        return st.st_mtime_ns, st.st_size, 0, 0, 1, '', 0
+    return (
+        st.st_mtime_ns, st.st_size, size.width(), size.height(),
+        _EXIF_ORIENTATIONS.get(reader.transformation().value, 1),
+        bytes(reader.format()).decode('ascii', 'replace'),
+        _format_depth(reader.imageFormat()),
+    )
+
+
+def map_files(function, paths, workers=8, cancel=None):
+    """Call function(path) for each path on a thread pool; yield (path, result) in order.
+
+    Reading image headers or thumbnails is mostly waiting on the disk (or the
+    network share), and Qt releases the GIL while it reads and decodes, so
+    threads overlap them well. cancel is an optional threading.Event-like
+    object checked between chunks.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Probe") as pool:
+        # Submit in chunks so cancelling doesn't wait for the whole library
+        chunk = workers * 16
+        for start in range(0, len(paths), chunk):
+            if cancel is not None and cancel.is_set():
+                return
+            batch = paths[start:start + chunk]
+            yield from zip(batch, pool.map(function, batch))
+
+
+def probe_images(paths, workers=8, cancel=None):
+    """Probe paths on a thread pool; yield (path, probe_image() result) in order."""
+    return map_files(probe_image, paths, workers, cancel)
@@ -0,0 +1,147 @@
+"""Filter expressions for building a session from part of the library.
+
+    hands                  path contains "hands" (folder or file name)
+    pose_*                 a folder or file name starts with "pose_"
+    hands/*_01.jpg         * and ? match across the whole path as well
+    "life drawing"         quotes keep spaces in a term
+    -nsfw                  leave out paths containing "nsfw"
+    is:portrait            taller than wide (also is:landscape, is:square)
+    min:1000               at least 1000 pixels on the shorter side
+    min:1600x1200          at least 1600 wide and 1200 tall
+    aspect:>1.5            width / height above 1.5 (or aspect:<0.8)
+
+Terms are case-insensitive and all have to hold. Name terms are matched
+against the path below the root folder, so a root called /refs/hands
+doesn't make every term "hands" match. Size terms use the header
+metadata kept by the library index.
+"""
+
+import re
+
+_TOKEN = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+_WILDCARDS = re.compile(r'[*?]')
+
+# Shortest literal the trigram index can look up
+MIN_INDEXED_LENGTH = 3
+
+# Sides within 2% of each other count as square
+SQUARE_TOLERANCE = 0.02
+
+_CONDITION = re.compile(r'(is|min|aspect):(.*)')
+_MIN_SIZE = re.compile(r'(\d+)(?:x(\d+))?')
+_ASPECT = re.compile(r'([<>]?)(\d+(?:\.\d*)?|\.\d+)')
+
+
+def parse_condition(kind, value):
+    """Turn a size term into (kind, argument); ValueError if it's malformed."""
+    if kind == 'is':
+        if value not in ('portrait', 'landscape', 'square'):
+            raise ValueError(f"is:{value} should be is:portrait, is:landscape or is:square")
+        return kind, value
+    if kind == 'min':
+        match = _MIN_SIZE.fullmatch(value)
+        if not match:
+            raise ValueError(f"min:{value} should be a size such as min:1000 or min:1600x1200")
+        return kind, (int(match.group(1)), int(match.group(2)) if match.group(2) else None)
+    match = _ASPECT.fullmatch(value)
+    if not match or float(match.group(2)) <= 0:
+        raise ValueError(f"aspect:{value} should be a ratio such as aspect:>1.5 or aspect:<0.8")
+    return kind, (match.group(1), float(match.group(2)))
+
+
+def condition_holds(condition, width, height):
+    kind, argument = condition
+    if width <= 0 or height <= 0:
+        return False  # unreadable image
+    if kind == 'is':
+        if abs(width - height) <= SQUARE_TOLERANCE * max(width, height):
+            shape = 'square'
+        else:
+            shape = 'portrait' if height > width else 'landscape'
+        return shape == argument
+    if kind == 'min':
+        min_width, min_height = argument
+        if min_height is None:
+            return min(width, height) >= min_width
+        return width >= min_width and height >= min_height
+    comparison, ratio = argument
+    aspect = width / height
+    if comparison == '>':
+        return aspect > ratio
+    if comparison == '<':
+        return aspect < ratio
+    return abs(aspect - ratio) <= SQUARE_TOLERANCE * ratio
+
+
+def _glob_to_regex(term, star, single):
+    return ''.join(star if c == '*' else single if c == '?' else re.escape(c) for c in term)
+
+
+def term_pattern(term):
+    """Regular expression source for one term, searched in a '/'-separated path."""
+    if not _WILDCARDS.search(term):
+        return re.escape(term)
+    # A pattern matches the whole path or any single folder or file name
+    whole = _glob_to_regex(term, '.*', '.')
+    part = _glob_to_regex(term, '[^/]*', '[^/]')
+    return f'(?:^(?:{whole})$|(?:^|/)(?:{part})(?=/|$))'
+
+
+class ImageQuery:
+    """A parsed filter expression; see the module docstring for the syntax."""
+
+    def __init__(self, include=(), exclude=(), conditions=()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.conditions = list(conditions)  # (negated, (kind, argument))
+        # One compiled expression, as this runs once per candidate image
+        self._regex = re.compile(
+            ''.join(f'(?=.*?{term_pattern(term)})' for term in self.include)
+            + ''.join(f'(?!.*?{term_pattern(term)})' for term in self.exclude),
+            re.DOTALL)
+
+    @classmethod
+    def parse(cls, text):
+        """Parse filter text; raises ValueError for a malformed size term."""
+        include, exclude, conditions = [], [], []
+        for match in _TOKEN.finditer(text):
+            negated, quoted, bare = match.groups()
+            term = (quoted if quoted is not None else bare).strip().lower()
+            condition = _CONDITION.fullmatch(term) if quoted is None else None
+            if condition:
+                conditions.append((bool(negated), parse_condition(*condition.groups())))
+            elif term:
+                (exclude if negated else include).append(term)
+        return cls(include, exclude, conditions)
+
+    def __bool__(self):
+        return bool(self.include or self.exclude or self.conditions)
+
+    def __repr__(self):
+        return (f"ImageQuery(include={self.include!r}, exclude={self.exclude!r}, "
+                f"conditions={self.conditions!r})")
+
+    def matches(self, relative_path):
+        """Whether a '/'-separated path below the root folder passes the filter."""
+        return self._regex.match(relative_path.lower()) is not None
+
+    def matches_size(self, width, height):
+        """Whether an image of this size passes the size terms."""
+        if self.conditions and (width <= 0 or height <= 0):
+            return False  # unreadable, even for negated terms
+        return all(condition_holds(condition, width, height) != negated
+                   for negated, condition in self.conditions)
+
+    def index_literals(self):
+        """Literal pieces every match must contain, for narrowing with the search index.
+
+        Wildcards and folder separators split terms, since the index holds
+        folder and file names separately; pieces too short for trigrams are
+        left to matches().
+        """
+        literals = []
+        for term in self.include:
+            for piece in re.split(r'[*?/]+', term):
+                if len(piece) >= MIN_INDEXED_LENGTH:
+                    literals.append(piece)
+        return literals
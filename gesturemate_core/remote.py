@@ -0,0 +1,269 @@
+"""Reference images served over HTTP: a JSON manifest and the files it lists.
+
+A studio's curated set can live on a plain static web server. The manifest
+lists the images by path, relative to the manifest's own URL unless it
+gives a "base" URL:
+
+    {"images": ["poses/standing_01.jpg", {"path": "hands/h_02.png"}, ...]}
+
+Images are downloaded on demand into a folder in the cache, which the rest
+of the app treats like any other image folder. They're fetched over
+keep-alive connections, several at a time, and the folder is capped in
+size by removing the least recently used files. The last manifest is kept
+too, so a source keeps working offline with whatever has been downloaded.
+http.client (which loads ssl) and concurrent.futures are imported when
+first needed, so the app doesn't pay for them without any web sources.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import quote, urljoin, urlsplit
+
+from .library import SUPPORTED_IMAGE_EXTENSIONS
+from .persistence import write_bytes_atomic
+
+WEB_CACHE_DIR_NAME = "web"
+MANIFEST_FILE_NAME = "manifest.json"
+DEFAULT_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    """Keep-alive HTTP and HTTPS connections, reused across requests and threads."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_idle=8):
+        self.timeout = timeout
+        self.max_idle = max_idle  # per host
+        self.opened = 0
+        self._idle = {}  # (scheme, host, port) -> [connection]
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, host, port):
+        import http.client
+
+        with self._lock:
+            idle = self._idle.get((scheme, host, port))
+            if idle:
+                return idle.pop(), True
+            self.opened += 1
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def get(self, url):
+        """Return the body of url; OSError if it can't be fetched or isn't 200 OK."""
+        import http.client
+
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise OSError(f"{url}: not an http(s) URL")
+        key = (parts.scheme, parts.hostname, parts.port)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        while True:
+            connection, reused = self._connect(*key)
+            try:
+                connection.request('GET', target)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused:
+                    continue  # the server closed it while it sat idle
+                raise OSError(f"{url}: {e}") from e
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            if response.status != 200:
+                raise OSError(f"{url}: HTTP {response.status} {response.reason}")
+            return body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+def parse_manifest(data, manifest_url):
+    """Return (base URL, image paths) from manifest bytes; ValueError if it's malformed.
+
+    Paths that would leave the source's folder, or aren't supported
+    images, are left out.
+    """
+    try:
+        manifest = json.loads(data)
+    except ValueError as e:
+        raise ValueError(f"{manifest_url} isn't a JSON manifest: {e}") from None
+    if isinstance(manifest, list):
+        manifest = {'images': manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('images'), list):
+        raise ValueError(f"{manifest_url} doesn't list any images")
+    base = urljoin(manifest_url, manifest.get('base') or '.')
+    if not base.endswith('/'):
+        base += '/'
+    paths = []
+    for entry in manifest['images']:
+        path = entry.get('path') if isinstance(entry, dict) else entry
+        if not isinstance(path, str):
+            continue
+        parts = path.strip('/').split('/')
+        # Backslashes and drive letters are separators and anchors on Windows
+        if any(part in ('', '.', '..') or '\\' in part or ':' in part for part in parts):
+            continue
+        if os.path.splitext(parts[-1])[1].lower() in SUPPORTED_IMAGE_EXTENSIONS:
+            paths.append('/'.join(parts))
+    return base, paths
+
+
+class WebSource:
+    """One manifest URL and the cache folder its images are downloaded into."""
+
+    def __init__(self, manifest_url, cache_root, pool=None, max_bytes=DEFAULT_CACHE_BYTES):
+        self.manifest_url = manifest_url
+        self.directory = Path(cache_root) / hashlib.sha1(manifest_url.encode('utf-8')).hexdigest()[:16]
+        self.files = self.directory / "files"
+        self.pool = pool or ConnectionPool()
+        self.max_bytes = max_bytes
+        self.offline = False  # whether the last sync() fell back to the saved manifest
+        self._base = None
+        self._paths = None
+        self._usage = None  # bytes under files, counted when first needed
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Download the manifest and return the local paths of its images.
+
+        When the server can't be reached the last downloaded manifest is
+        used instead (offline is set); OSError if there isn't one.
+        ValueError if the server's manifest is malformed.
+        """
+        try:
+            data = self.pool.get(self.manifest_url)
+        except OSError:
+            if not self._load_saved():
+                raise
+            self.offline = True
+            return self.images()
+        self._base, self._paths = parse_manifest(data, self.manifest_url)
+        self.files.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.directory / MANIFEST_FILE_NAME, data)
+        self.offline = False
+        return self.images()
+
+    def _load_saved(self):
+        try:
+            data = (self.directory / MANIFEST_FILE_NAME).read_bytes()
+            self._base, self._paths = parse_manifest(data, self.manifest_url)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def images(self):
+        """Local paths of the manifest's images, downloaded or not, from the saved manifest."""
+        if self._paths is None and not self._load_saved():
+            return []
+        return [os.path.join(self.files, *path.split('/')) for path in self._paths]
+
+    def owns(self, path):
+        return str(path).startswith(str(self.files) + os.sep)
+
+    def url_for(self, path):
+        relative = os.path.relpath(path, self.files).replace(os.sep, '/')
+        return urljoin(self._base, quote(relative))
+
+    def fetch(self, paths, workers=4):
+        """Download any of paths that aren't cached yet, several at a time.
+
+        Cached ones are marked as recently used instead. Returns the paths
+        that couldn't be downloaded. The cache is trimmed afterwards,
+        keeping paths.
+        """
+        if self._paths is None and not self._load_saved():
+            return [path for path in paths if self.owns(path)]
+        missing = []
+        for path in paths:
+            if not self.owns(path):
+                continue
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                missing.append(path)
+            except OSError:
+                pass
+        if not missing:
+            return []
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing)), thread_name_prefix="WebFetch") as pool:
+            failed = [path for path, ok in zip(missing, pool.map(self._download, missing)) if not ok]
+        self.trim(keep=paths)
+        return failed
+
+    def _download(self, path):
+        try:
+            body = self.pool.get(self.url_for(path))
+        except OSError as e:
+            print(f"Couldn't download {e}")
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Temp file and rename, so a reader never sees half an image
+        fd, tmp_name = tempfile.mkstemp(prefix='.download-', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            print(f"Couldn't save {path}: {e}")
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            if self._usage is not None:
+                self._usage += len(body)
+        return True
+
+    def _cached_files(self):
+        for folder, _, names in os.walk(self.files):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime_ns, st.st_size, path
+
+    def trim(self, keep=()):
+        """Delete the least recently used images until the cache fits in max_bytes."""
+        with self._lock:
+            if self._usage is None:
+                self._usage = sum(size for _, size, _ in self._cached_files())
+            if self._usage <= self.max_bytes:
+                return
+            keep = set(keep)
+            files = sorted(self._cached_files())
+            self._usage = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if self._usage <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                self._usage -= size
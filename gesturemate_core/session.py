@@ -0,0 +1,240 @@
+"""The drawing session itself: play order and countdowns, independent of any UI."""
+
+import math
+import random
+
+
+class SessionEngine:
+    """Image order and countdowns for one drawing session.
+
+    The window calls the tick methods once a second and reacts to what they
+    report (beeping, moving on, ending the session); the `plan` command uses
+    the same play order to list a session's images ahead of time.
+    """
+
+    def __init__(self, image_duration=60, session_duration=1800, shuffle=True):
+        self.image_duration = image_duration
+        self.session_duration = session_duration
+        self.shuffle_enabled = shuffle
+        self.folder_images = {}  # folder -> sorted image paths
+        self.images_per_folder = {}
+        self.images = []
+        self.shuffle_seed = None  # reproduces images; None if unshuffled or merged by set_folder_images()
+        self.shuffled = False  # whether images is in shuffled (rather than sorted) order
+        self.current_image_index = 0
+        self.session_time_remaining = 0
+        self.image_time_remaining = 0
+        self.image_duration_half = 0
+        self.halfway_passed = False
+        self.images_viewed = 0
+        self.shown = False  # whether the current image has reached the screen
+        self._counts_as_viewed = False
+
+    def apply_play_order(self, seed=None):
+        """Rebuild the play list from folder_images, shuffled with `seed` (or a fresh one)."""
+        self.images_per_folder = {folder: len(paths) for folder, paths in self.folder_images.items()}
+        self.images = [path for paths in self.folder_images.values() for path in paths]
+
+        # Shuffle images if enabled
+        if self.shuffle_enabled:
+            self.shuffle_seed = seed if seed is not None else random.getrandbits(32)
+            random.Random(self.shuffle_seed).shuffle(self.images)
+        else:
+            self.shuffle_seed = None
+            self.images.sort()
+        self.shuffled = self.shuffle_enabled
+
+        self.current_image_index = 0
+
+    def set_folder_images(self, folder_images):
+        """Switch to a new {folder: images}, keeping the play order of the folders that stay.
+
+        Images of folders that were dropped are taken out and those of new
+        folders are shuffled in at random places (or sorted in), without
+        shuffling the whole play list again. Falls back to apply_play_order()
+        when a folder that stays has different images, or the shuffle setting
+        changed. Either way the session goes back to the first image. A
+        merged shuffled order can't be reproduced from a seed, so
+        shuffle_seed is cleared then.
+        """
+        previous = self.folder_images
+        self.folder_images = folder_images
+        if (self.shuffle_enabled != self.shuffled
+                or len(self.images) != sum(map(len, previous.values()))
+                or any(folder in previous and previous[folder] != paths
+                       for folder, paths in folder_images.items())):
+            self.apply_play_order()
+            return
+        removed = {path for folder, paths in previous.items() if folder not in folder_images for path in paths}
+        added = [path for folder, paths in folder_images.items() if folder not in previous for path in paths]
+        kept = [path for path in self.images if path not in removed] if removed else self.images
+        if not self.shuffle_enabled:
+            self.images = sorted(kept + added)
+        else:
+            rng = random.Random()
+            rng.shuffle(added)
+            # Final positions of the added images; the kept ones fill the rest in order
+            slots = sorted(rng.sample(range(len(kept) + len(added)), len(added)))
+            images = []
+            start = 0
+            for count, (slot, path) in enumerate(zip(slots, added)):
+                images.extend(kept[start:slot - count])
+                images.append(path)
+                start = slot - count
+            images.extend(kept[start:])
+            self.images = images
+            self.shuffle_seed = None
+        self.images_per_folder = {folder: len(paths) for folder, paths in folder_images.items()}
+        self.current_image_index = 0
+
+    @property
+    def current_image(self):
+        if not self.images:
+            return None
+        return self.images[self.current_image_index]
+
+    def upcoming(self, count=1):
+        """Return the next count images in play order, wrapping around at the end."""
+        if not self.images:
+            return []
+        return [self.images[(self.current_image_index + step) % len(self.images)]
+                for step in range(1, min(count, len(self.images) - 1) + 1)]
+
+    def start(self):
+        """Reset the countdowns and go back to the first image."""
+        self.session_time_remaining = self.session_duration
+        self.image_time_remaining = self.image_duration
+        self.image_duration_half = self.image_duration // 2  # Integer division for exact comparison
+        self.current_image_index = 0
+        self.halfway_passed = False
+        self.images_viewed = 0
+        self._moved(True)
+
+    def advance(self):
+        """Move on to the next image, wrapping around at the end."""
+        self.current_image_index = (self.current_image_index + 1) % len(self.images)
+        self.image_time_remaining = self.image_duration
+        self.halfway_passed = False
+        self._moved(True)
+
+    def back(self):
+        """Go back to the previous image."""
+        self.current_image_index = (self.current_image_index - 1) % len(self.images)
+        self.image_time_remaining = self.image_duration
+        self.halfway_passed = False
+        self._moved(False)
+
+    def _moved(self, forward):
+        self.shown = False
+        self._counts_as_viewed = forward
+
+    def displayed(self):
+        """Note that the current image reached the screen; True the first time.
+
+        Images skipped over before they could be shown (holding the arrow
+        key, say) aren't counted as viewed, and going back never is.
+        """
+        if self.shown:
+            return False
+        self.shown = True
+        if self._counts_as_viewed:
+            self.images_viewed += 1
+        return True
+
+    def tick_session(self):
+        """Count down one second of the session; return True when it has run out."""
+        self.session_time_remaining -= 1
+        return self.session_time_remaining <= 0
+
+    def tick_image(self):
+        """Count down one second of the current image.
+
+        Returns (halfway, finished): halfway is True only on the tick that
+        crosses the halfway point, finished once the image's time is up.
+        """
+        self.image_time_remaining -= 1
+        halfway = False
+        if not self.halfway_passed and self.image_time_remaining <= self.image_duration_half:
+            self.halfway_passed = True
+            halfway = True
+        return halfway, self.image_time_remaining <= 0
+
+    def progress(self):
+        """Return how much of the session has elapsed, in percent."""
+        elapsed = self.session_duration - self.session_time_remaining
+        return int((elapsed / self.session_duration) * 100)
+
+    def plan(self):
+        """Return [(start second, image path)] for a session left to run on its own.
+
+        Assumes every image runs its full time, so the list is as long as the
+        session allows, wrapping around when there are fewer images.
+        """
+        if not self.images or self.image_duration <= 0:
+            return []
+        count = math.ceil(self.session_duration / self.image_duration)
+        return [(i * self.image_duration, self.images[i % len(self.images)]) for i in range(count)]
+
+
+# A pose whose image shows up this much after its cue counts as late
+LATE_TOLERANCE_MS = 20
+
+
+class PosePacer:
+    """Millisecond pacing for rapid-fire sessions.
+
+    Each pose lasts pose_ms from the moment its image reaches the screen.
+    If the next image isn't ready when a pose is up, the current one stays
+    on screen until it is, and that next pose is counted as late by however
+    long it was overdue. Times are time.monotonic() values.
+    """
+
+    def __init__(self, pose_ms=3000, tolerance_ms=LATE_TOLERANCE_MS):
+        self.pose_ms = pose_ms
+        self.tolerance_ms = tolerance_ms
+        self.due = None  # when the current pose is up; None before the first, or after a skip
+        self.paused_left_ms = None
+        self.poses = 0
+        self.late = []  # (pose number, image path, ms late)
+
+    def start(self):
+        self.due = None
+        self.paused_left_ms = None
+        self.poses = 0
+        self.late = []
+
+    def shown(self, path, now):
+        """Start a pose for the image that just reached the screen; return how late it was, in ms."""
+        late_ms = 0.0 if self.due is None else max(0.0, (now - self.due) * 1000)
+        self.poses += 1
+        if late_ms > self.tolerance_ms:
+            self.late.append((self.poses, path, round(late_ms, 1)))
+        self.due = now + self.pose_ms / 1000
+        self.paused_left_ms = None
+        return late_ms
+
+    def skip(self):
+        """Forget the current cue; the image moved to by hand isn't late for anything."""
+        self.due = None
+
+    def remaining_ms(self, now):
+        if self.paused_left_ms is not None:
+            return self.paused_left_ms
+        if self.due is None:
+            return self.pose_ms
+        return max(0, math.ceil((self.due - now) * 1000))
+
+    def pause(self, now):
+        self.paused_left_ms = self.remaining_ms(now)
+
+    def resume(self, now):
+        if self.paused_left_ms is not None and self.due is not None:
+            self.due = now + self.paused_left_ms / 1000
+        self.paused_left_ms = None
+
+    def report(self):
+        """One line on how many poses appeared late, for the end of a session."""
+        if not self.late:
+            return f"All {self.poses} poses appeared on time."
+        worst = max(ms for _, _, ms in self.late)
+        return f"{len(self.late)} of {self.poses} poses appeared late (worst {worst:.0f} ms)."
@@ -0,0 +1,165 @@
+"""Perceptual hashes for spotting near-duplicate images, and an index to search them.
+
+A difference hash (dHash) shrinks the image to 9x8 grey pixels and records,
+for each row, whether each pixel is brighter than its right-hand neighbour.
+Resizing, recompression and small crops or colour shifts barely move those
+64 bits, so near-duplicates end up a few bits apart while different photos
+are around 32 apart. Qt is imported lazily, as in displaycache.
+"""
+
+import os
+from itertools import combinations
+
+from .probe import map_files
+
+HASH_SIZE = 8
+
+# Hashes at most this many bits apart count as the same picture (at most HashIndex.MAX_RADIUS).
+# Resized and recompressed copies come out 0-1 bits apart and crops of a few percent around 4.
+DUPLICATE_DISTANCE = 6
+
+
+def dhash(path):
+    """Return the 64-bit difference hash of the image at path, or None if it can't be read."""
+    from PyQt6.QtCore import QSize, Qt
+    from PyQt6.QtGui import QImage, QImageReader
+
+    reader = QImageReader(path)
+    # The JPEG plugin turns this into libjpeg's 1/8-scale decode, so big photos
+    # are never decoded at full size
+    reader.setScaledSize(QSize(HASH_SIZE + 1, HASH_SIZE))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.size() != QSize(HASH_SIZE + 1, HASH_SIZE):
+        image = image.scaled(HASH_SIZE + 1, HASH_SIZE,
+                             transformMode=Qt.TransformationMode.SmoothTransformation)
+    image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+    pixels = image.constBits()
+    pixels.setsize(image.sizeInBytes())
+    pixels = bytes(pixels)
+    stride = image.bytesPerLine()
+    bits = 0
+    for y in range(HASH_SIZE):
+        row = pixels[y * stride:y * stride + HASH_SIZE + 1]
+        for left, right in zip(row, row[1:]):
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def fingerprint(path):
+    """Return (mtime_ns, size, dhash or None) for path, or None if the file is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, dhash(path)
+
+
+def fingerprint_images(paths, workers=8, cancel=None):
+    """Fingerprint paths on a thread pool; yield (path, fingerprint() result) in order."""
+    return map_files(fingerprint, paths, workers, cancel)
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(value):
+        return bin(value).count('1')
+
+
+def hamming(a, b):
+    return _popcount(a ^ b)
+
+
+class HashIndex:
+    """Multi-index hash table for finding hashes within a small Hamming radius.
+
+    A 64-bit hash is eight bytes. Two hashes at most six bits apart differ
+    in at most six of them, so at least two bytes agree exactly: one table
+    per pair of byte positions (28 of them, keyed on those 16 bits) turns a
+    radius search into exact lookups, and only what shares a bucket is
+    compared bit by bit. That stays fast on photo libraries, where unrelated
+    images sit around 32 bits apart, which defeats metric trees such as a
+    BK-tree.
+    """
+
+    BLOCKS = 8
+    MAX_RADIUS = BLOCKS - 2
+    _PAIRS = list(combinations(range(BLOCKS), 2))
+
+    def __init__(self, radius=DUPLICATE_DISTANCE):
+        if not 0 <= radius <= self.MAX_RADIUS:
+            raise ValueError(f"radius must be between 0 and {self.MAX_RADIUS} bits")
+        self.radius = radius
+        self._tables = [{} for _ in self._PAIRS]
+        self._hashes = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _keys(self, value):
+        block = value.to_bytes(self.BLOCKS, 'big')
+        return [(block[i] << 8) | block[j] for i, j in self._PAIRS]
+
+    def add(self, value, item):
+        self.update({item: value})
+
+    def update(self, hashes):
+        """Add {item: hash}; much quicker than add() one by one for a whole library."""
+        self._hashes.update(hashes)
+        items = list(hashes)
+        blocks = [value.to_bytes(self.BLOCKS, 'big') for value in hashes.values()]
+        for table, (i, j) in zip(self._tables, self._PAIRS):
+            for item, key in zip(items, [(block[i] << 8) | block[j] for block in blocks]):
+                bucket = table.get(key)
+                if bucket is None:
+                    table[key] = [item]
+                else:
+                    bucket.append(item)
+
+    def search(self, value):
+        """Return the items whose hash is within radius bits of value."""
+        candidates = set()
+        for table, key in zip(self._tables, self._keys(value)):
+            candidates.update(table.get(key, ()))
+        return [item for item in candidates if hamming(value, self._hashes[item]) <= self.radius]
+
+    def pairs(self):
+        """Yield (item, item) for hashes within radius bits; a pair may come up more than once."""
+        hashes, radius = self._hashes, self.radius
+        for table in self._tables:
+            for bucket in table.values():
+                if len(bucket) < 2:
+                    continue
+                for i, first in enumerate(bucket[:-1]):
+                    value = hashes[first]
+                    for second in bucket[i + 1:]:
+                        if _popcount(value ^ hashes[second]) <= radius:
+                            yield first, second
+
+
+def cluster(hashes, radius=DUPLICATE_DISTANCE):
+    """Group {item: hash} into lists of items linked by hashes within radius bits.
+
+    Groups are transitive (A~B and B~C puts A, B and C together) and come
+    back in the order of their first item in hashes.
+    """
+    index = HashIndex(radius)
+    index.update(hashes)
+    parent = {item: item for item in hashes}
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for first, second in index.pairs():
+        first, second = find(first), find(second)
+        if first != second:
+            parent[second] = first
+    groups = {}
+    for item in hashes:
+        groups.setdefault(find(item), []).append(item)
+    return list(groups.values())
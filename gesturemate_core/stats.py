@@ -0,0 +1,171 @@
+"""Usage statistics: daily practice time with precomputed rollups and streaks."""
+
+from array import array
+from datetime import date, timedelta
+
+
+def format_duration(seconds):
+    """Format a duration in seconds as a compact human-readable string."""
+    hours, remainder = divmod(seconds, 3600)
+    minutes = remainder // 60
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m"
+    return f"{seconds}s"
+
+
+class StatsStore:
+    """Usage statistics with unlimited daily history and precomputed rollups.
+
+    Practice seconds live in a day-indexed array starting at the first
+    practised day. Weekly, monthly and yearly totals and the current streak
+    are updated as sessions are added, so drawing any range is a lookup
+    rather than a walk over the history.
+    """
+
+    def __init__(self):
+        self.total_time = 0
+        self.sessions_completed = 0
+        self.images_viewed = 0
+        self.first_day = None      # date ordinal of days[0]
+        self.days = array('I')     # practice seconds per day from first_day
+        self.weekly = {}           # Monday ordinal -> seconds
+        self.monthly = {}          # (year, month) -> seconds
+        self.yearly = {}           # year -> seconds
+        self.yearly_peak = {}      # year -> seconds on that year's busiest day
+        self._streak_end = None    # ordinal of the last day of the latest run
+        self._streak_length = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a store from its saved form (or the older ``daily_time`` map)."""
+        store = cls()
+        store.total_time = int(data.get('total_time', 0))
+        store.sessions_completed = int(data.get('sessions_completed', 0))
+        store.images_viewed = int(data.get('images_viewed', 0))
+        by_ordinal = {}
+        if data.get('daily_start'):
+            store.first_day = date.fromisoformat(data['daily_start']).toordinal()
+            store.days = array('I', (int(v) for v in data.get('daily_seconds', [])))
+        elif data.get('daily_time'):
+            by_ordinal = {date.fromisoformat(day).toordinal(): int(seconds)
+                          for day, seconds in data['daily_time'].items() if seconds > 0}
+        if by_ordinal:
+            store.first_day = min(by_ordinal)
+            store.days = array('I', [0]) * (max(by_ordinal) - store.first_day + 1)
+            for ordinal, seconds in by_ordinal.items():
+                store.days[ordinal - store.first_day] = seconds
+        store._rebuild()
+        return store
+
+    def to_dict(self):
+        """Return the compact saved form of the statistics."""
+        data = {
+            'total_time': self.total_time,
+            'sessions_completed': self.sessions_completed,
+            'images_viewed': self.images_viewed,
+        }
+        if self.first_day is not None:
+            data['daily_start'] = date.fromordinal(self.first_day).isoformat()
+            data['daily_seconds'] = self.days.tolist()
+        return data
+
+    def add_session(self, seconds, images_viewed, day=None):
+        """Record a finished session of `seconds` practice on `day` (default today)."""
+        self.total_time += seconds
+        self.sessions_completed += 1
+        self.images_viewed += images_viewed
+        self.add_time(seconds, day)
+
+    def add_time(self, seconds, day=None):
+        """Add practice seconds to a day, keeping rollups and the streak current."""
+        if seconds <= 0:
+            return
+        day = day or date.today()
+        ordinal = day.toordinal()
+        if self.first_day is None:
+            self.first_day = ordinal
+        elif ordinal < self.first_day:
+            self.days[0:0] = array('I', [0]) * (self.first_day - ordinal)
+            self.first_day = ordinal
+        index = ordinal - self.first_day
+        if index >= len(self.days):
+            self.days.extend(array('I', [0]) * (index - len(self.days) + 1))
+        was_empty = not self.days[index]
+        self.days[index] += seconds
+        self._add_rollups(day, ordinal, seconds, self.days[index])
+        if was_empty:
+            end = self._streak_end
+            if end is None or ordinal > end + 1:
+                self._streak_end, self._streak_length = ordinal, 1
+            elif ordinal == end + 1:
+                self._streak_end, self._streak_length = ordinal, self._streak_length + 1
+            else:
+                # A gap in the past was filled in; recount the latest run
+                self._rebuild_streak()
+
+    def _add_rollups(self, day, ordinal, seconds, day_total):
+        monday = ordinal - day.weekday()
+        self.weekly[monday] = self.weekly.get(monday, 0) + seconds
+        month = (day.year, day.month)
+        self.monthly[month] = self.monthly.get(month, 0) + seconds
+        self.yearly[day.year] = self.yearly.get(day.year, 0) + seconds
+        if day_total > self.yearly_peak.get(day.year, 0):
+            self.yearly_peak[day.year] = day_total
+
+    def _rebuild(self):
+        self.weekly, self.monthly, self.yearly, self.yearly_peak = {}, {}, {}, {}
+        for index, seconds in enumerate(self.days):
+            if seconds:
+                ordinal = self.first_day + index
+                self._add_rollups(date.fromordinal(ordinal), ordinal, seconds, seconds)
+        self._rebuild_streak()
+
+    def _rebuild_streak(self):
+        self._streak_end, self._streak_length = None, 0
+        index = len(self.days) - 1
+        while index >= 0 and not self.days[index]:
+            index -= 1
+        if index < 0:
+            return
+        self._streak_end = self.first_day + index
+        while index >= 0 and self.days[index]:
+            self._streak_length += 1
+            index -= 1
+
+    def day_seconds(self, day):
+        """Return the practice seconds recorded on `day`."""
+        if self.first_day is None:
+            return 0
+        index = day.toordinal() - self.first_day
+        return self.days[index] if 0 <= index < len(self.days) else 0
+
+    def week_total(self, monday):
+        return self.weekly.get(monday.toordinal(), 0)
+
+    def month_total(self, year, month):
+        return self.monthly.get((year, month), 0)
+
+    def year_total(self, year):
+        return self.yearly.get(year, 0)
+
+    def peak_between(self, first, last):
+        """Return the busiest day's seconds between two dates (inclusive)."""
+        if self.first_day is None:
+            return 0
+        start = max(0, first.toordinal() - self.first_day)
+        stop = min(len(self.days), last.toordinal() - self.first_day + 1)
+        return max(self.days[start:stop], default=0)
+
+    def years(self):
+        """Return the years with recorded practice, oldest first."""
+        return sorted(self.yearly)
+
+    def streak(self, today=None):
+        """Count consecutive days of practice ending today (or yesterday)."""
+        today = (today or date.today()).toordinal()
+        # The streak is still alive if the last practice was yesterday
+        if self._streak_end is not None and today - 1 <= self._streak_end <= today:
+            return self._streak_length
+        return 0
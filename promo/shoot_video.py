@@ -1,24 +1,171 @@
 #!/usr/bin/env python3
-"""Render a promotional demo video of GestureMate frame-by-frame, offscreen."""
-import sys, os, shutil
+"""Render a promotional demo video of GestureMate frame-by-frame, offscreen.
+
+The GUI thread only drives the window and grabs frames. Encoding happens
+off it: numbered JPG/PNG files are written by a thread pool, or raw frames
+are streamed through a bounded queue into an encoder's stdin (--stream).
+Consecutive identical frames (most of every hold) are encoded once; on
+disk the repeats are hardlinks to the first file.
+
+    python promo/shoot_video.py                         # /tmp/gm-frames/00000.jpg ...
+    python promo/shoot_video.py --stream promo/gesturemate-demo.mp4
+"""
+import sys, os, shutil, argparse, queue, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
 
 os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 os.environ["XDG_CONFIG_HOME"] = "/tmp/gm-config-demo"
 sys.path.insert(0, "/home/augustine/projects/GestureMate")
 
+from PyQt6.QtGui import QImage
 from PyQt6.QtWidgets import QApplication
 import gesturemate
 
-FRAMES = "/tmp/gm-frames"
-shutil.rmtree(FRAMES, ignore_errors=True)
-os.makedirs(FRAMES)
-
 FPS = 30
 DEMO_FOLDERS = {
     "/tmp/gm-demo/Figure_Studies": True,
     "/tmp/gm-demo/Hands_and_Feet": True,
     "/tmp/gm-demo/Animal_Sketches": True,
 }
+# Raw BGRA frames (QImage RGB32 on little-endian machines) in, H.264 out
+ENCODER = ("ffmpeg -y -loglevel error -f rawvideo -pix_fmt bgra -s {width}x{height} -r {fps} -i - "
+           "-c:v libx264 -pix_fmt yuv420p {output}")
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--frames", default="/tmp/gm-frames", help="folder for numbered frame files")
+parser.add_argument("--format", choices=("jpg", "png"), default="jpg", help="frame file format")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="frame encoding threads")
+parser.add_argument("--stream", metavar="OUTPUT", help="pipe raw frames into the encoder instead of writing files")
+parser.add_argument("--encoder", default=ENCODER,
+                    help="encoder command for --stream; {width}, {height}, {fps} and {output} are filled in")
+args = parser.parse_args()
+
+
+class FrameSink:
+    """Takes (frame, repeat count) from the GUI thread; merges runs of identical frames."""
+
+    def __init__(self):
+        self.frames = 0
+        self.encoded = 0
+        self._run = None  # [image, count] not handed on yet
+
+    def add(self, image, count):
+        if count <= 0:
+            return
+        if self._run is not None and self._run[0] == image:
+            self._run[1] += count
+            return
+        self._flush()
+        self._run = [image, count]
+
+    def close(self):
+        self._flush()
+
+    def _flush(self):
+        if self._run is not None:
+            image, count = self._run
+            self._run = None
+            self._emit(image, self.frames, count)
+            self.frames += count
+            self.encoded += 1
+
+
+class FileSink(FrameSink):
+    """Numbered frame files, encoded on a thread pool (Qt releases the GIL while it encodes)."""
+
+    def __init__(self, directory, fmt, workers):
+        super().__init__()
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        self.directory = directory
+        self.fmt = fmt
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="Frames")
+        self._pending = []
+
+    def _emit(self, image, first, count):
+        # Bounded, so a slow disk can't pile up full-size frames in memory
+        while len(self._pending) >= self.workers * 2:
+            self._pending.pop(0).result()
+        self._pending.append(self._pool.submit(self._write, image, first, count))
+
+    def _write(self, image, first, count):
+        path = f"{self.directory}/{first:05d}.{self.fmt}"
+        if not image.save(path, self.fmt.upper(), 92 if self.fmt == "jpg" else -1):
+            raise OSError(f"couldn't write {path}")
+        for frame_no in range(first + 1, first + count):
+            os.link(path, f"{self.directory}/{frame_no:05d}.{self.fmt}")
+
+    def close(self):
+        super().close()
+        for future in self._pending:
+            future.result()
+        self._pool.shutdown()
+
+
+class StreamSink(FrameSink):
+    """Raw frames written to an encoder's stdin by a writer thread, through a bounded queue."""
+
+    def __init__(self, command, output):
+        super().__init__()
+        self.command = command
+        self.output = output
+        self._queue = queue.Queue(maxsize=8)
+        self._process = None
+        self._writer = threading.Thread(target=self._write, name="Encoder", daemon=True)
+        self._error = None
+
+    def _emit(self, image, first, count):
+        if self._process is None:
+            command = self.command.format(width=image.width(), height=image.height(), fps=FPS,
+                                          output=self.output)
+            self._process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE)
+            self._writer.start()
+        if self._error is not None:
+            self._fail()
+        self._queue.put((image, count))
+
+    def _write(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                image, count = item
+                image = image.convertToFormat(QImage.Format.Format_RGB32)
+                pixels = image.constBits()
+                pixels.setsize(image.sizeInBytes())
+                data = pixels.asstring()
+                for _ in range(count):
+                    self._process.stdin.write(data)
+        except OSError as e:  # the encoder quit early
+            self._error = e
+            while self._queue.get() is not None:
+                pass
+
+    def close(self):
+        super().close()
+        if self._process is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        try:
+            self._process.stdin.close()
+        except OSError as e:
+            self._error = self._error or e
+        if self._process.wait() != 0 or self._error is not None:
+            self._fail()
+
+    def _fail(self):
+        raise SystemExit(f"encoder failed: {self.command.split()[0]} exited with status "
+                         f"{self._process.wait()} ({self._error or 'no error writing frames'})")
+
+
+if args.stream:
+    sink = StreamSink(args.encoder, args.stream)
+else:
+    sink = FileSink(args.frames, args.format, args.workers)
+started = time.perf_counter()
 
 app = QApplication(sys.argv)
 app.setApplicationName("GestureMate")
@@ -36,15 +183,10 @@ win.session_duration = 1800
 win.halfway_sound_enabled = False
 win.shuffle_enabled = False
 
-frame_no = 0
 def grab(seconds):
     """Capture the current state for `seconds` of video time."""
-    global frame_no
     app.processEvents()
-    pm = win.grab()
-    for _ in range(round(seconds * FPS)):
-        pm.save(f"{FRAMES}/{frame_no:05d}.jpg", "JPG", 92)
-        frame_no += 1
+    sink.add(win.grab().toImage(), round(seconds * FPS))
 
 def tick(n=1, hold=1.0):
     """Advance n simulated seconds, holding each state on screen for `hold` video-seconds."""
@@ -110,4 +252,6 @@ show("Two Figure Studies of a Young Woman")
 grab(0.5)
 tick(2)
 
-print("frames:", frame_no, "-> duration %.1fs" % (frame_no / FPS))
+sink.close()
+print("frames:", sink.frames, "-> duration %.1fs" % (sink.frames / FPS),
+      "| %d encoded, rendered in %.1fs" % (sink.encoded, time.perf_counter() - started))
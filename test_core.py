@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Tests for the GUI-free gesturemate_core package and its command-line front end.
+None of these import Qt.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gesturemate_core import (
+    FolderScans, HashIndex, ImageQuery, LibraryIndex, PosePacer, SessionEngine, WebSource, cluster,
+    enabled_folders, scan_folders,
+)
+from gesturemate_core.cli import main as cli_main
+
+
+def make_library(root):
+    for relative in ("figures/a.jpg", "figures/b.PNG", "figures/notes.txt",
+                     "figures/poses/c.webp", "hands/d.jpg"):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    return root
+
+
+def test_scan_folders_and_enabled_folders(tmp_path):
+    root = make_library(tmp_path)
+    folder_images, dir_mtimes = scan_folders([str(root / "figures"), str(root / "missing")])
+    assert folder_images == {str(root / "figures"): sorted([
+        str(root / "figures/a.jpg"), str(root / "figures/b.PNG"), str(root / "figures/poses/c.webp")])}
+    assert str(root / "figures/poses") in dir_mtimes
+
+    saved = {str(root / "figures"): True, str(root / "figures/poses"): True, str(root / "hands"): False}
+    assert enabled_folders(saved) == [str(root / "figures/poses")]
+
+
+def test_folder_scans_only_scan_added_folders(tmp_path):
+    root = make_library(tmp_path)
+    figures, hands = str(root / "figures"), str(root / "hands")
+    scans = FolderScans()
+    assert scans.update([figures, str(root / "missing")]) == ([figures], [])
+    (root / "figures/new.jpg").write_bytes(b"x")  # not picked up until figures is rescanned
+    assert scans.update([figures, hands]) == ([hands], [])
+    assert scans.folder_images() == {figures: sorted([
+        str(root / "figures/a.jpg"), str(root / "figures/b.PNG"), str(root / "figures/poses/c.webp")]),
+        hands: [str(root / "hands/d.jpg")]}
+    assert scans.update([hands]) == ([], [figures])
+    assert scans.dir_mtimes() == {hands: os.stat(hands).st_mtime_ns}
+
+    folder_images, dir_mtimes = scan_folders([figures, hands])
+    scans.replace([figures, hands], folder_images, dir_mtimes)
+    assert scans.mtimes[figures] == {path: mtime for path, mtime in dir_mtimes.items() if path != hands}
+    assert str(root / "figures/new.jpg") in scans.images[figures]
+
+
+def test_session_engine_keeps_play_order_when_folders_change():
+    engine = SessionEngine()
+    engine.set_folder_images({f'/{folder}': [f'/{folder}/{i:02d}.jpg' for i in range(20)] for folder in 'abc'})
+    order = engine.images
+    assert engine.shuffle_seed is not None and sorted(order) != order
+
+    engine.set_folder_images({'/a': engine.folder_images['/a'], '/c': engine.folder_images['/c'],
+                              '/d': ['/d/x.jpg', '/d/y.jpg']})
+    assert [path for path in engine.images if not path.startswith('/d')] == [
+        path for path in order if not path.startswith('/b')]
+    assert len(engine.images) == 42 and engine.images_per_folder == {'/a': 20, '/c': 20, '/d': 2}
+    assert engine.shuffle_seed is None and engine.shuffled  # the merged order has no seed
+
+    engine.set_folder_images({'/a': ['/a/00.jpg']})  # a folder's images changed: shuffled afresh
+    assert engine.images == ['/a/00.jpg']
+
+    engine.shuffle_enabled = False
+    engine.set_folder_images({'/b': ['/b/1.jpg'], '/a': ['/a/00.jpg']})
+    engine.set_folder_images({'/b': ['/b/1.jpg'], '/a': ['/a/00.jpg'], '/0': ['/0/z.jpg']})
+    assert engine.images == ['/0/z.jpg', '/a/00.jpg', '/b/1.jpg']
+
+
+def test_library_index_only_relists_changed_directories(tmp_path):
+    root = make_library(tmp_path / "refs")
+    with LibraryIndex(tmp_path / "index.sqlite3") as index:
+        first = index.update(str(root))
+        assert first['images'] == 4 and first['listed'] == first['directories'] == 4
+
+        again = index.update(str(root))
+        assert again['listed'] == 0 and again['images'] == 4
+
+        (root / "figures/poses/e.jpg").write_bytes(b"x")
+        (root / "hands/d.jpg").unlink()
+        changed = index.update(str(root))
+        assert changed['listed'] == 2
+        assert index.images(str(root / "figures/poses")) == [
+            str(root / "figures/poses/c.webp"), str(root / "figures/poses/e.jpg")]
+        assert index.folder_images([str(root / "hands")]) == {}
+
+        for path in (root / "figures/poses").iterdir():
+            path.unlink()
+        (root / "figures/poses").rmdir()
+        assert index.update(str(root))['removed'] == 1
+        assert index.image_count(str(root)) == 2
+
+
+def test_image_query_terms():
+    query = ImageQuery.parse('Hands pose_* -nsfw "life drawing"')
+    assert query.include == ['hands', 'pose_*', 'life drawing'] and query.exclude == ['nsfw']
+    assert query.matches("Life Drawing/pose_01/hands.jpg")
+    assert not query.matches("life drawing/pose_01/hands_nsfw.jpg")
+    assert not query.matches("life drawing/xpose_01/hands.jpg")
+    assert ImageQuery.parse("figures/*.webp").matches("figures/poses/c.webp")
+    assert not ImageQuery.parse("*.png").matches("figures/a.jpg")
+    assert query.index_literals() == ['hands', 'pose_', 'life drawing']
+
+
+def test_image_query_size_terms():
+    query = ImageQuery.parse('hands is:portrait min:1000 -aspect:<0.5 "min:10"')
+    assert query.include == ['hands', 'min:10'] and len(query.conditions) == 3
+    assert query.matches_size(1000, 1500)
+    assert not query.matches_size(1500, 1000)  # landscape
+    assert not query.matches_size(900, 1500)   # too small
+    assert not query.matches_size(1000, 2500)  # too narrow
+    assert not query.matches_size(0, 0)        # unreadable
+    assert ImageQuery.parse("is:square").matches_size(1000, 1010)
+    assert ImageQuery.parse("min:1600x1200").matches_size(1600, 1200)
+    assert not ImageQuery.parse("min:1600x1200").matches_size(1200, 1600)
+    for bad in ("is:tall", "min:big", "aspect:>0"):
+        with pytest.raises(ValueError):
+            ImageQuery.parse(bad)
+
+
+def test_library_index_search(tmp_path):
+    root = make_library(tmp_path / "hands-refs")
+    (root / "figures/nsfw").mkdir()
+    (root / "figures/nsfw/hands.jpg").write_bytes(b"x")
+    with LibraryIndex(tmp_path / "index.sqlite3") as index:
+        index.update(str(root))
+        for search_index in (True, False):  # FTS5 trigram index, then the LIKE fallback
+            index.has_search_index = index.has_search_index and search_index
+            # The root's own name ("hands-refs") doesn't count
+            assert index.search([str(root)], "hands") == {
+                str(root): [str(root / "figures/nsfw/hands.jpg"), str(root / "hands/d.jpg")]}
+            assert index.search([str(root)], "hands -nsfw") == {str(root): [str(root / "hands/d.jpg")]}
+            assert index.search([str(root / "figures")], "*.webp -xyz") == {
+                str(root / "figures"): [str(root / "figures/poses/c.webp")]}
+            assert index.search([str(root)], "feet") == {}
+
+
+def test_hash_index_finds_near_duplicates():
+    base = 0x0123456789ABCDEF
+    near = base ^ 0b10110 ^ (1 << 63)         # 4 bits apart
+    chained = near ^ (0b111 << 40)            # 7 from base, 3 from near
+    far = base ^ 0xFFFFFFFF                   # 32 bits apart
+    index = HashIndex(radius=4)
+    index.update({'base': base, 'near': near, 'chained': chained, 'far': far})
+    assert sorted(index.search(base)) == ['base', 'near']
+    assert sorted(index.search(chained)) == ['chained', 'near']
+    assert cluster({'base': base, 'far': far, 'near': near, 'chained': chained}, radius=4) == [
+        ['base', 'near', 'chained'], ['far']]
+    with pytest.raises(ValueError):
+        HashIndex(radius=7)
+
+
+def test_session_engine_ticks_and_wraps():
+    engine = SessionEngine(image_duration=4, session_duration=10, shuffle=False)
+    engine.folder_images = {'/refs': ['/refs/b.jpg', '/refs/a.jpg']}
+    engine.apply_play_order()
+    assert engine.images == ['/refs/a.jpg', '/refs/b.jpg'] and engine.shuffle_seed is None
+
+    engine.start()
+    assert engine.displayed() and not engine.displayed()
+    assert engine.tick_image() == (False, False)
+    assert engine.tick_image() == (True, False)  # 2 of 4 seconds left
+    assert engine.tick_image() == (False, False)
+    assert engine.tick_image() == (False, True)
+    engine.advance()  # skipped before it was shown
+    engine.advance()
+    engine.displayed()
+    assert engine.current_image == '/refs/a.jpg' and engine.images_viewed == 2
+    engine.back()
+    engine.displayed()
+    assert engine.current_image == '/refs/b.jpg' and engine.images_viewed == 2
+    assert engine.upcoming(3) == ['/refs/a.jpg']  # wraps, without repeating the current image
+
+    for _ in range(9):
+        assert not engine.tick_session()
+    assert engine.progress() == 90
+    assert engine.tick_session()
+
+    assert engine.plan() == [(0, '/refs/a.jpg'), (4, '/refs/b.jpg'), (8, '/refs/a.jpg')]
+
+
+def test_pose_pacer_times_poses_from_when_they_appear_and_reports_late_ones():
+    pacer = PosePacer(pose_ms=2000)
+    pacer.start()
+    assert pacer.shown('a.jpg', 10.0) == 0 and pacer.remaining_ms(10.5) == 1500
+    assert pacer.shown('b.jpg', 12.01) == pytest.approx(10)  # within tolerance
+    late = pacer.shown('c.jpg', 14.26)  # the image arrived 250 ms after its cue
+    assert late == pytest.approx(250) and pacer.remaining_ms(14.26) == 2000
+
+    pacer.pause(15.0)
+    assert pacer.remaining_ms(99.0) == 1260
+    pacer.resume(20.0)
+    assert pacer.shown('d.jpg', 21.26) == 0
+
+    pacer.skip()  # moved on by hand
+    assert pacer.shown('e.jpg', 30.0) == 0
+    assert pacer.late == [(3, 'c.jpg', 250.0)]
+    assert pacer.report() == "1 of 5 poses appeared late (worst 250 ms)."
+
+
+def test_shuffle_is_reproducible_from_the_seed():
+    folder_images = {'/refs': [f'/refs/{i:02d}.jpg' for i in range(30)]}
+    orders = []
+    for _ in range(2):
+        engine = SessionEngine()
+        engine.folder_images = folder_images
+        engine.apply_play_order(seed=1234)
+        orders.append(engine.images)
+    assert orders[0] == orders[1] != sorted(orders[0])
+
+
+def test_web_source_downloads_over_kept_alive_connections_and_works_offline(tmp_path):
+    import functools
+    import threading
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    served = make_library(tmp_path / "served")
+    (served / "set.json").write_text(json.dumps({'images': [
+        "figures/a.jpg", {"path": "figures/poses/c.webp"}, "hands/d.jpg", "figures/notes.txt",
+        "../outside.jpg", "hands/missing.jpg", "..\\..\\outside.jpg", "C:/Windows/outside.jpg",
+        "figures/C:outside.jpg"]}))
+
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(served)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    source = WebSource(f"http://127.0.0.1:{server.server_port}/set.json", tmp_path / "cache", max_bytes=2)
+    try:
+        images = source.sync()
+        assert [os.path.relpath(path, source.files) for path in images] == [
+            os.path.join("figures", "a.jpg"), os.path.join("figures", "poses", "c.webp"),
+            os.path.join("hands", "d.jpg"), os.path.join("hands", "missing.jpg")]
+        assert source.fetch(images[:2], workers=1) == [] and source.fetch(images[3:]) == images[3:]
+        assert open(images[0], 'rb').read() == b"x" and source.pool.opened == 1  # one connection throughout
+        assert source.fetch(images[2:3]) == []
+        # Over the 2 byte cap, the least recently used image goes
+        assert not os.path.exists(images[0]) and os.path.exists(images[1]) and os.path.exists(images[2])
+    finally:
+        server.shutdown()
+        server.server_close()
+        source.pool.close()
+
+    offline = WebSource(source.manifest_url, tmp_path / "cache")
+    assert offline.sync() == images and offline.offline
+    assert offline.fetch(images[1:3]) == [] and offline.fetch(images[:1]) == images[:1]
+    with pytest.raises(OSError):
+        WebSource(source.manifest_url + "?other", tmp_path / "cache").sync()
+
+
+def test_parse_manifest_keeps_paths_inside_the_source():
+    from gesturemate_core.remote import parse_manifest
+
+    base, paths = parse_manifest(json.dumps({'base': "img/", 'images': [
+        "a.jpg", "/b/c.png", "../up.jpg", "b/./c.jpg", "b//c.jpg", "..\\up.jpg", "b\\c.jpg",
+        "C:/up.jpg", "C:up.jpg", "b/d:stream.jpg", "notes.txt", 7]}), "http://host/set/list.json")
+    assert base == "http://host/set/img/" and paths == ["a.jpg", "b/c.png"]
+
+
+def test_cli_scan_stats_and_plan(tmp_path, capsys):
+    root = make_library(tmp_path / "refs")
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "gesturemate_config.json").write_text(json.dumps({
+        'folders': {str(root / "figures"): True}, 'image_duration': 30, 'session_duration': 60}))
+    (config_dir / "gesturemate_stats.json").write_text(json.dumps({
+        'total_time': 5400, 'sessions_completed': 3, 'images_viewed': 90}))
+
+    assert cli_main(["--config-dir", str(config_dir), "scan", "--json"]) == 0
+    scanned = json.loads(capsys.readouterr().out)
+    assert scanned[str(root / "figures")]['images'] == 3
+    assert (config_dir / "gesturemate_index.sqlite3").exists()
+
+    assert cli_main(["--config-dir", str(config_dir), "stats", "--json"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats['total_time'] == 5400 and stats['sessions_completed'] == 3
+
+    assert cli_main(["--config-dir", str(config_dir), "plan", "--use-index", "--seed", "7", "--json"]) == 0
+    plan = json.loads(capsys.readouterr().out)
+    assert plan['seed'] == 7 and [item['start'] for item in plan['images']] == [0, 30]
+
+    assert cli_main(["--config-dir", str(config_dir), "plan", str(root / "hands"), "--no-shuffle"]) == 0
+    assert str(root / "hands/d.jpg") in capsys.readouterr().out
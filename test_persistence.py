@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Tests for GestureMate's settings and statistics persistence.
+These don't need a display; only the PyQt6 package has to be importable.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gesturemate_core import ConfigWriter, read_json_file, write_json_atomic
+
+
+def test_write_json_atomic_replaces_file(tmp_path):
+    target = tmp_path / "config.json"
+    target.write_text('{"old": true}')
+    write_json_atomic(target, {"new": 1}, indent=2)
+    assert json.loads(target.read_text()) == {"new": 1}
+    # No temp files are left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+
+
+def test_read_json_file_sets_corrupt_file_aside(tmp_path):
+    target = tmp_path / "config.json"
+    target.write_text('{"folders": {"/a": tr')
+    assert read_json_file(target) == {}
+    assert not target.exists()
+    assert (tmp_path / "config.json.corrupt").exists()
+
+
+def test_config_writer_coalesces_bursts(tmp_path):
+    target = tmp_path / "stats.json"
+    writer = ConfigWriter(delay=60)
+    try:
+        for i in range(50):
+            writer.write(target, {"n": i})
+        # Nothing is written while the burst is still settling
+        assert not target.exists()
+        writer.flush()
+        assert json.loads(target.read_text()) == {"n": 49}
+    finally:
+        writer.close()
+
+
+def test_config_writer_close_writes_pending(tmp_path):
+    config = tmp_path / "config.json"
+    stats = tmp_path / "stats.json"
+    writer = ConfigWriter(delay=60)
+    writer.write(config, {"image_duration": 30}, indent=2)
+    writer.write(stats, {"total_time": 90})
+    writer.close()
+    assert read_json_file(config) == {"image_duration": 30}
+    assert read_json_file(stats) == {"total_time": 90}
+    # Saves after close are still persisted
+    writer.write(stats, {"total_time": 120})
+    assert read_json_file(stats) == {"total_time": 120}
+
+
+def test_config_writer_background_write(tmp_path):
+    target = tmp_path / "config.json"
+    writer = ConfigWriter(delay=0.01)
+    try:
+        writer.write(target, {"ok": True})
+        for _ in range(200):
+            if target.exists():
+                break
+            writer._thread.join(0.01)
+        assert read_json_file(target) == {"ok": True}
+    finally:
+        writer.close()
+
+
+def test_practice_log_tracks_per_image_totals(tmp_path):
+    from gesturemate_core import PracticeLog
+
+    log = PracticeLog(tmp_path / "practice.sqlite3")
+    try:
+        log.log("/refs/a.jpg", 'completed', 60, session=1)
+        log.log("/refs/b.jpg", 'skipped', 2.5, PracticeLog.GREYSCALE, session=1)
+        log.log("/refs/a.jpg", 'back', 4, PracticeLog.FLIP_HORIZONTAL, session=1)
+        log.log("/refs/b.jpg", 'skipped', 1, session=2)
+        log.flush()
+
+        totals = log.image_totals(["/refs/a.jpg", "/refs/b.jpg", "/refs/unseen.jpg"])
+        assert set(totals) == {"/refs/a.jpg", "/refs/b.jpg"}
+        assert totals["/refs/a.jpg"]['shown'] == 2
+        assert totals["/refs/a.jpg"]['completed'] == 1
+        assert totals["/refs/a.jpg"]['back'] == 1
+        assert totals["/refs/a.jpg"]['seconds'] == 64
+        assert totals["/refs/b.jpg"]['skipped'] == 2
+        assert log.most_drawn(1) == [("/refs/a.jpg", 2)]
+        assert log.most_skipped() == [("/refs/b.jpg", 2)]
+    finally:
+        log.close()
+
+
+def test_stats_store_rollups_and_streak():
+    from datetime import date, timedelta
+    from gesturemate_core import StatsStore
+
+    today = date(2026, 3, 4)  # a Wednesday
+    stats = StatsStore()
+    for offset in (0, 1, 2, 5, 400, 800):
+        stats.add_session(600, 10, today - timedelta(days=offset))
+    stats.add_time(300, today)
+
+    assert stats.sessions_completed == 6
+    assert stats.total_time == 6 * 600
+    assert stats.day_seconds(today) == 900
+    assert stats.day_seconds(today - timedelta(days=3)) == 0
+    assert stats.week_total(date(2026, 3, 2)) == 900 + 600 + 600
+    assert stats.month_total(2026, 3) == 900 + 600 + 600
+    assert stats.year_total(2023) == 600
+    assert stats.years() == [2023, 2025, 2026]
+    assert stats.yearly_peak[2026] == 900
+    assert stats.streak(today) == 3
+    assert stats.streak(today + timedelta(days=1)) == 3
+    assert stats.streak(today + timedelta(days=2)) == 0
+
+    # Filling the gap in the past joins the runs
+    stats.add_time(60, today - timedelta(days=3))
+    stats.add_time(60, today - timedelta(days=4))
+    assert stats.streak(today) == 6
+
+
+def test_stats_store_round_trip_and_legacy_format():
+    from datetime import date
+    from gesturemate_core import StatsStore
+
+    legacy = {
+        'total_time': 1500, 'sessions_completed': 2, 'images_viewed': 40,
+        'daily_time': {'2025-12-31': 900, '2026-01-01': 600},
+    }
+    stats = StatsStore.from_dict(legacy)
+    assert stats.day_seconds(date(2025, 12, 31)) == 900
+    assert stats.year_total(2026) == 600
+
+    restored = StatsStore.from_dict(stats.to_dict())
+    assert restored.to_dict() == stats.to_dict()
+    assert restored.to_dict()['daily_seconds'] == [900, 600]
+    assert restored.streak(date(2026, 1, 2)) == 2
+    assert StatsStore.from_dict({}).to_dict() == {
+        'total_time': 0, 'sessions_completed': 0, 'images_viewed': 0}
+
+
+def test_playset_snapshot_round_trip():
+    from gesturemate_core import decode_playset, encode_playset
+
+    folder_images = {'/refs/a': ['/refs/a/1.jpg', '/refs/a/2.png'], '/refs/b': ['/refs/b/x.jpg']}
+    data = encode_playset(['/refs/a', '/refs/b', '/refs/empty'], folder_images,
+                          {'/refs/a': 11, '/refs/b': 12}, seed=42)
+    snapshot = decode_playset(data)
+    assert snapshot['folder_images'] == folder_images
+    assert snapshot['scanned'] == ['/refs/a', '/refs/b', '/refs/empty']
+    assert snapshot['seed'] == 42
+    assert decode_playset(b'garbage') is None
+    assert decode_playset(data[:-5]) is None
+
+
+def test_image_cache_evicts_least_recently_used():
+    from PyQt6.QtGui import QImage
+    from gesturemate import ImageCache
+
+    image = QImage(100, 100, QImage.Format.Format_RGB32)  # 40,000 bytes
+    cache = ImageCache(max_bytes=100_000)
+    cache.put("a", image)
+    cache.put("b", image)
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", image)
+    assert cache.get("b") is None
+    assert len(cache) == 2 and cache.total_bytes == 80_000
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.trim(50_000, keep="a")  # the image on screen stays, even when it's the oldest
+    assert "a" in cache and "c" not in cache
+    cache.put("c", image)
+    cache.trim(0)  # going idle keeps only the newest
+    assert "c" in cache and len(cache) == 1 and cache.total_bytes == 40_000
+    cache.clear()
+    assert cache.total_bytes == 0
+
+
+
+def test_folder_tree_model_loads_lazily_and_propagates_checks(tmp_path):
+    from PyQt6.QtCore import Qt
+    from gesturemate import FolderTreeModel
+    from gesturemate_core import LibraryIndex, enabled_folders
+
+    for sub in ("a/x/1", "a/x/2", "a/y", "b"):
+        (tmp_path / sub).mkdir(parents=True)
+        (tmp_path / sub / "image.jpg").touch()
+    root, a, b = str(tmp_path), str(tmp_path / "a"), str(tmp_path / "b")
+    x1 = str(tmp_path / "a" / "x" / "1")
+    check = Qt.ItemDataRole.CheckStateRole
+
+    model = FolderTreeModel(LibraryIndex(":memory:"))
+    model.load({root: True, a: True, b: False})  # the old one-level format
+    top = model.index(0, 0)
+    assert model.data(top, check) == Qt.CheckState.PartiallyChecked
+    assert model.data(model.index(0, 1)) == "4"
+    assert model.hasChildren(top) and model.rowCount(top) == 0  # nothing fetched until expanded
+    model.fetchMore(top)
+    assert [model.data(model.index(row, 1, top)) for row in range(2)] == ["3", "1"]
+
+    # Checking everything stores the root alone; subfolders follow it unfetched
+    model.setData(top, Qt.CheckState.Checked.value, check)
+    assert model.selection() == {root: True}
+
+    a_index = model.index(0, 0, top)
+    model.fetchMore(a_index)
+    x_index = model.index(0, 0, a_index)
+    model.fetchMore(x_index)
+    model.setData(model.index(0, 0, x_index), Qt.CheckState.Unchecked.value, check)
+    assert model.data(top, check) == Qt.CheckState.PartiallyChecked
+    saved = model.selection()
+    assert saved[x1] is False and saved[b] is True
+    assert sorted(enabled_folders(saved)) == [str(tmp_path / "a" / "x" / "2"), str(tmp_path / "a" / "y"), b]
+
+    model.load(saved)
+    assert model.selection() == saved
+
+def test_tracer_exports_chrome_trace(tmp_path):
+    from gesturemate_core import Tracer
+
+    tracer = Tracer(capacity=3)
+    tracer.enabled = False
+    with tracer.span('ignored'):
+        pass
+    assert not tracer.events
+
+    tracer.enabled = True
+    with tracer.span('load_images', 'scan', folders=2):
+        pass
+    tracer.add_stages('display_current_image', 'image', tracer.origin, {'read': 0.002, 'decode': 0.003})
+    assert len(tracer.events) == 3  # the ring buffer dropped the oldest span
+
+    assert tracer.export(tmp_path / "trace.json") == 3
+    events = json.loads((tmp_path / "trace.json").read_text())['traceEvents']
+    spans = {e['name']: e for e in events if e['ph'] == 'X'}
+    assert set(spans) == {'read', 'decode', 'display_current_image'}
+    assert spans['decode']['ts'] == 2000 and spans['decode']['dur'] == 3000
+    assert spans['display_current_image']['dur'] == 5000
+
+
+def test_memory_monitor_flags_growth_across_sessions(tmp_path, monkeypatch):
+    from gesturemate_core import MemoryMonitor
+
+    monitor = MemoryMonitor(tmp_path / "memory.jsonl")
+    mb = 1024 * 1024
+    readings = iter([100 * mb, 120 * mb, 200 * mb, 260 * mb, 400 * mb])
+    monkeypatch.setattr(MemoryMonitor, 'rss', staticmethod(lambda: next(readings)))
+    for session, cache_bytes in enumerate([0, 0, 0, 0, 32 * mb]):
+        monitor.start_session()
+        report = monitor.end_session({'image_cache': cache_bytes})
+        if session < 3:
+            assert report['warnings'] == []
+
+    assert len(report['warnings']) == 2
+    assert "300 MB above the first session" in report['warnings'][0]
+    assert report['warnings'][1].startswith("image_cache holds 32 MB more")
+    lines = (tmp_path / "memory.jsonl").read_text().splitlines()
+    assert [json.loads(line)['rss_retained'] for line in lines] == [
+        100 * mb, 120 * mb, 200 * mb, 260 * mb, 400 * mb]
+
+
+def test_session_recorder_round_trip(tmp_path, monkeypatch):
+    import pytest
+    from gesturemate_core import SessionRecorder, read_recording
+
+    monkeypatch.setattr(SessionRecorder, 'KEEP', 2)
+    recorder = SessionRecorder(tmp_path)
+    recorder.record('next_image', 1.0, 0.001)  # not recording yet
+    assert not recorder.active
+
+    paths = []
+    for _ in range(3):
+        recorder.begin({'images': ['a.jpg', 'b.jpg']}, 10.0, 0.02)
+        recorder.record('next_image', 11.5, 0.004, image=0)
+        recorder.record('resize', 12.0, 0.003, image=1, width=800, height=600)
+        paths.append(recorder.path)
+    recorder.end()
+    assert not recorder.active
+    assert set(tmp_path.glob("session-*.jsonl")) == set(paths[1:])  # only the newest KEEP
+
+    start, events = read_recording(paths[-1])
+    assert start['images'] == ['a.jpg', 'b.jpg'] and start['ms'] == 20.0
+    assert [(e['event'], e['t'], e['image']) for e in events] == [('next_image', 1.5, 0), ('resize', 2.0, 1)]
+
+    # A recording cut off mid-line still reads up to the last whole input
+    with open(paths[-1], 'a') as f:
+        f.write('{"event": "prev')
+    assert len(read_recording(paths[-1])[1]) == 2
+
+    (tmp_path / "other.jsonl").write_text('{"event": "tick"}\n')
+    with pytest.raises(ValueError):
+        read_recording(tmp_path / "other.jsonl")
+
+
+def test_display_cache_warms_and_serves_fresh_copies(tmp_path):
+    from PyQt6.QtGui import QImage
+    from gesturemate_core import DisplayCache
+
+    large, small = str(tmp_path / "large.png"), str(tmp_path / "small.png")
+    QImage(400, 200, QImage.Format.Format_RGB32).save(large)
+    QImage(50, 50, QImage.Format.Format_RGB32).save(small)
+
+    with DisplayCache(tmp_path / "cache") as cache:
+        result = cache.warm([large, small, str(tmp_path / "missing.png")], max_edge=100, workers=1)
+        assert (result['rendered'], result['skipped'], result['failed']) == (2, 0, 0)
+        copy = cache.lookup(large, min_edge=100)
+        assert copy is not None and QImage(str(copy)).size().width() == 100
+        assert cache.lookup(large, min_edge=200) is None  # too small for a bigger window
+        assert cache.lookup(small) is None  # already fits, so the original is shown
+
+        # A second run skips everything; an edited file is rendered again
+        assert cache.warm([large, small], max_edge=100, workers=1)['skipped'] == 2
+        QImage(300, 300, QImage.Format.Format_RGB32).save(large)
+        os.utime(large, ns=(0, 0))
+        assert cache.lookup(large) is None
+        assert cache.warm([large, small], max_edge=100, workers=1)['rendered'] == 1
+
+
+def test_library_index_probes_sizes_for_filters(tmp_path):
+    from PyQt6.QtGui import QImage
+    from gesturemate_core import ImageQuery, LibraryIndex
+
+    root = tmp_path / "refs"
+    root.mkdir()
+    for name, size in (("portrait.png", (200, 300)), ("landscape.png", (300, 200)), ("thumb.png", (40, 60))):
+        QImage(*size, QImage.Format.Format_RGB32).save(str(root / name))
+    (root / "broken.jpg").write_bytes(b"not an image")
+    paths = {name: str(root / name) for name in os.listdir(root)}
+
+    with LibraryIndex(tmp_path / "index.sqlite3") as index:
+        index.update(str(root))
+        # Without probing, images of unknown size pass until their headers are read
+        assert index.search([str(root)], "is:portrait", probe=False) == {str(root): sorted(paths.values())}
+        assert index.unprobed(index.images(str(root))) == index.images(str(root))
+        assert index.probe(index.images(str(root))) == 4
+        assert index.unprobed(index.images(str(root))) == []
+        assert index.search([str(root)], "is:portrait", probe=False) == {
+            str(root): [paths["portrait.png"], paths["thumb.png"]]}
+        assert index.probe(index.images(str(root))) == 0  # already known
+        assert index.metadata([paths["portrait.png"]]) == {paths["portrait.png"]: (200, 300, 1, 'png', 32)}
+        assert index.search([str(root)], "is:portrait min:100") == {str(root): [paths["portrait.png"]]}
+        assert index.search([str(root)], "-is:portrait") == {str(root): [paths["landscape.png"]]}
+        assert index.filter_images({str(root): sorted(paths.values())}, ImageQuery.parse("min:50")) == {
+            str(root): [paths["landscape.png"], paths["portrait.png"]]}
+
+        # Rewriting a file drops its probe when the folder is re-listed
+        QImage(300, 200, QImage.Format.Format_RGB32).save(paths["portrait.png"])
+        os.utime(root, ns=(0, 0))
+        index.update(str(root))
+        assert paths["portrait.png"] not in index.metadata([paths["portrait.png"]])
+        assert index.search([str(root)], "is:portrait") == {str(root): [paths["thumb.png"]]}
+
+
+def test_library_index_keeps_one_of_each_near_duplicate_group(tmp_path):
+    from PyQt6.QtCore import QPointF, Qt
+    from PyQt6.QtGui import QColor, QImage, QPainter
+    from gesturemate_core import LibraryIndex
+
+    def picture(seed):
+        image = QImage(320, 240, QImage.Format.Format_RGB32)
+        image.fill(QColor(40, 40, 40))
+        painter = QPainter(image)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for i in range(6):
+            painter.setBrush(QColor((seed * 71 + i * 37) % 256, (i * 91) % 256, (seed * 53) % 256))
+            painter.drawEllipse(QPointF((seed * 97 + i * 61) % 320, (seed * 31 + i * 43) % 240), 50, 40)
+        painter.end()
+        return image
+
+    root = tmp_path / "refs"
+    root.mkdir()
+    picture(1).save(str(root / "a.png"))
+    picture(1).scaled(160, 120, transformMode=Qt.TransformationMode.SmoothTransformation).save(
+        str(root / "a-copy.jpg"), quality=70)
+    picture(2).save(str(root / "b.png"))
+    (root / "broken.jpg").write_bytes(b"not an image")
+    folder_images = {str(root): sorted(str(path) for path in root.iterdir())}
+
+    with LibraryIndex(tmp_path / "index.sqlite3") as index:
+        index.update(str(root))
+        assert index.representatives(folder_images) == folder_images  # nothing hashed yet
+        assert index.hash_images(folder_images[str(root)]) == 4
+        assert index.hash_images(folder_images[str(root)]) == 0
+        assert len(index.perceptual_hashes(folder_images[str(root)])) == 3
+        index.probe(folder_images[str(root)])
+        # The smaller copy sorts first but the larger one is kept
+        assert index.duplicate_groups(folder_images[str(root)]) == [
+            [str(root / "a.png"), str(root / "a-copy.jpg")]]
+        assert index.representatives(folder_images) == {
+            str(root): [str(root / "a.png"), str(root / "b.png"), str(root / "broken.jpg")]}
+
+
+def test_decoder_registry_picks_fastest_backend_and_falls_back_to_qt():
+    import time
+    from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+    from PyQt6.QtGui import QImage
+    from gesturemate_core import REDUCED_TEXT_KEY, DecoderRegistry, QtDecoder, sniff_format
+
+    image = QImage(400, 200, QImage.Format.Format_Indexed8)
+    image.setColorTable([0xff336699])
+    image.fill(0)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    png = bytes(data)
+    assert sniff_format(png) == 'png'
+
+    class Broken:
+        name, formats = 'broken', frozenset(('png',))
+
+        def decode(self, data, max_edge=None):
+            return QImage()
+
+    class Slow(QtDecoder):
+        name = 'slow'
+
+        def decode(self, data, max_edge=None):
+            time.sleep(0.01)
+            return super().decode(data, max_edge)
+
+    registry = DecoderRegistry([QtDecoder(), Broken(), Slow()])
+    results = registry.benchmark(max_edge=100, repeat=1, samples={'png': png})
+    assert set(results['png']) == {'qt', 'slow'}  # broken couldn't decode the sample
+    assert registry.selection == {'png': 'qt'}
+
+    # Every backend hands back owned RGB32/ARGB32 pixels, marked when decoded small
+    decoded = registry.decode(png, max_edge=100)
+    assert decoded.size().width() == 100 and decoded.format() == QImage.Format.Format_RGB32
+    assert decoded.text(REDUCED_TEXT_KEY) and not registry.decode(png).text(REDUCED_TEXT_KEY)
+    registry.selection['png'] = 'broken'
+    assert registry.decode(png).width() == 400  # Qt steps in
+    assert registry.decode(b'not an image').isNull()
+
+    saved = registry.to_dict()
+    assert DecoderRegistry([QtDecoder(), Broken(), Slow()]).load(saved)
+    assert not DecoderRegistry([QtDecoder()]).load(saved)  # installed backends changed
+
+
+def test_decode_pool_shares_pixels_and_restarts_stuck_or_dead_workers():
+    import gc
+    from gesturemate_core import REDUCED_TEXT_KEY, DecodePool, DecoderRegistry
+    from gesturemate_core.decoders import benchmark_samples
+
+    jpeg = benchmark_samples(('jpeg',))['jpeg']
+    with DecodePool(workers=1) as pool:
+        image = pool.decode(jpeg, max_edge=1000)
+        assert image == DecoderRegistry().decode(jpeg, max_edge=1000)
+        assert image.text(REDUCED_TEXT_KEY)
+        assert pool.decode(b'not an image').isNull()
+
+        # Images sharing the pool's pixels keep them mapped after it goes
+        decoded = pool.decode(jpeg, max_edge=1000)
+        same_size = decoded.scaled(decoded.size())
+        same_format = decoded.convertToFormat(decoded.format())
+        pixel = decoded.pixel(10, 10)
+        del decoded
+        gc.collect()
+        assert same_size.pixel(10, 10) == pixel and same_format.pixel(10, 10) == pixel
+        assert same_size == image
+
+        pool.timeout = 0.001
+        assert pool.decode(jpeg).isNull() and pool.timeouts == 1
+        pool.timeout = 30
+        assert pool.decode(jpeg, max_edge=1000) == image  # on a fresh worker
+
+        worker = pool._idle.get()
+        worker.process.kill()
+        worker.process.join()
+        pool._idle.put(worker)
+        assert pool.decode(jpeg, max_edge=1000) == image and pool.crashes == 1
+    assert pool.decode(jpeg).isNull()  # closed
@@ -30,7 +30,7 @@ def test_supported_formats():
     """Test image format definitions."""
     print("\nTesting image format support...")
     # Extract the image extensions from the code
-    with open('gesturemate.py', 'r') as f:
+    with open(os.path.join('gesturemate_core', 'library.py'), 'r') as f:
         code = f.read()
         # Check for all supported formats
         required_formats = ["'.jpg'", "'.jpeg'", "'.png'", "'.bmp'", "'.gif'", "'.webp'"]